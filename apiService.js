@@ -9,8 +9,9 @@ const apiClient = axios.create({
   },
 });
 
-export const getScores = () => {
-  return apiClient.get('/scores');
+// Optional params: offset, limit, sort (prefix '-' for descending), fields, min_<score>/max_<score>
+export const getScores = (params) => {
+  return apiClient.get('/scores', params ? { params } : undefined);
 };
 
 export const getCoinDetailsByIdentifier = (identifier) => {
@@ -4,6 +4,7 @@ import json
 import requests
 import argparse
 import time
+from http_client import get_http_client
 
 CMC_API_KEY = ""
 
@@ -35,8 +36,9 @@ def get_newly_added_eth_contracts(api_key, limit=100, existing_contracts=None):
 
     print(f"Fetching up to {limit} newly added tokens from CoinMarketCap...")
 
+    response = None
     try:
-        response = requests.get(url, headers=headers, params=parameters)
+        response = get_http_client().get(url, headers=headers, params=parameters)
         response.raise_for_status() # Raise an exception for HTTP errors
         data = response.json()
     except requests.exceptions.RequestException as e:
@@ -121,5 +123,6 @@ if __name__ == "__main__":
     else:
         print(f"Already have {len(existing_contracts_set)} contracts, which meets or exceeds the minimum of {args.min_total_contracts}.")
 
+    get_http_client().print_stats()
     print(f"Process finished. Total unique contracts in {args.output_file}: {len(existing_contracts_set)}")
 
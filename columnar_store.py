@@ -0,0 +1,160 @@
+#!/usr/bin/env python3.11
+import os
+import argparse
+from decimal import Decimal, InvalidOperation
+from typing import List, Any, Optional, Tuple
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# Typed schema for the integrated scores. tweet_id is stored as int64 so IDs keep full precision.
+SCORES_SCHEMA = pa.schema([
+    ("query_term", pa.string()),
+    ("tweet_id", pa.int64()),
+    ("full_text", pa.string()),
+    ("user_screen_name", pa.string()),
+    ("sentiment_compound_input", pa.float64()),
+    ("calculated_sentiment_score_0_10", pa.float64()),
+    ("calculated_engagement_score_0_10", pa.float64()),
+    ("context_financial_stability_score_0_10", pa.float64()),
+    ("overall_potential_score_0_10", pa.float64())
+])
+
+# Typed schema for the windowed onchain features produced by onchain_anomaly_detector.py.
+# Columns not listed here are still written, with their types inferred by Arrow.
+ONCHAIN_FEATURES_SCHEMA = pa.schema([
+    ("window_start", pa.timestamp("ns")),
+    ("window_end", pa.timestamp("ns")),
+    ("address", pa.string()),
+    ("total_transactions_in_window", pa.int64()),
+    ("incoming_tx_count", pa.int64()),
+    ("outgoing_tx_count", pa.int64()),
+    ("total_eth_volume_in", pa.float64()),
+    ("total_eth_volume_out", pa.float64()),
+    ("avg_eth_tx_value_in", pa.float64()),
+    ("avg_eth_tx_value_out", pa.float64()),
+    ("max_eth_tx_value_in", pa.float64()),
+    ("max_eth_tx_value_out", pa.float64()),
+    ("unique_counterparties_in", pa.int64()),
+    ("unique_counterparties_out", pa.int64()),
+    ("total_gas_fee_eth_spent_by_address", pa.float64()),
+    ("avg_gas_fee_eth_spent_by_address", pa.float64()),
+    ("avg_time_between_tx_sec", pa.float64()),
+    ("std_time_between_tx_sec", pa.float64()),
+    ("incoming_to_outgoing_volume_ratio", pa.float64()),
+    ("incoming_to_outgoing_count_ratio", pa.float64())
+])
+
+# Row predicate in pyarrow's DNF form, e.g. [("overall_potential_score_0_10", ">=", 7.0)]
+Filters = List[Tuple[str, str, Any]]
+
+def parse_tweet_id(value: Any) -> Optional[int]:
+    """Parses a tweet ID from an int, a digit string or a float-formatted string such as '1.92e+18'."""
+    if value is None or (isinstance(value, float) and pd.isna(value)):
+        return None
+    if isinstance(value, int):
+        return value
+    try:
+        parsed = Decimal(str(value).strip())
+    except InvalidOperation:
+        return None
+    if not parsed.is_finite() or parsed != parsed.to_integral_value():
+        return None
+    return int(parsed)
+
+def _table_from_frame(df: pd.DataFrame, schema: pa.Schema) -> pa.Table:
+    """Builds an Arrow table, casting known columns to the schema and inferring the rest."""
+    fields = []
+    for column in df.columns:
+        if column in schema.names:
+            fields.append(schema.field(column))
+        else:
+            fields.append(pa.field(column, pa.Array.from_pandas(df[column]).type))
+    return pa.Table.from_pandas(df, schema=pa.schema(fields), preserve_index=False)
+
+def _read_table(path: str, columns: Optional[List[str]], filters: Optional[Filters]) -> pd.DataFrame:
+    # memory_map avoids copying the file into the heap; columns/filters are pushed down to the reader
+    table = pq.read_table(path, columns=columns, filters=filters or None, memory_map=True)
+    return table.to_pandas(types_mapper={pa.int64(): pd.Int64Dtype()}.get)
+
+def read_scores_csv(path: str) -> pd.DataFrame:
+    """Reads a legacy integrated scores CSV, parsing tweet_id without going through float64."""
+    df = pd.read_csv(path, dtype={"tweet_id": str})
+    if "tweet_id" in df.columns:
+        df["tweet_id"] = pd.array([parse_tweet_id(value) for value in df["tweet_id"]], dtype="Int64")
+    return df
+
+def write_scores(df: pd.DataFrame, path: str) -> None:
+    """Writes the integrated scores frame to Parquet with the typed scores schema."""
+    df = df.copy()
+    if "tweet_id" in df.columns:
+        df["tweet_id"] = pd.array([parse_tweet_id(value) for value in df["tweet_id"]], dtype="Int64")
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    pq.write_table(_table_from_frame(df, SCORES_SCHEMA), path)
+
+def read_scores(path: str, columns: Optional[List[str]] = None, filters: Optional[Filters] = None) -> pd.DataFrame:
+    """
+    Reads integrated scores, loading only the requested columns and rows.
+    Parquet files are memory-mapped; legacy .csv files are still accepted and filtered after load.
+    """
+    if path.endswith(".csv"):
+        df = read_scores_csv(path)
+        if filters:
+            df = df[_apply_filters(df, filters)]
+        return df[columns] if columns else df
+    return _read_table(path, columns, filters)
+
+def _apply_filters(df: pd.DataFrame, filters: Filters) -> pd.Series:
+    """Evaluates simple (column, op, value) conjunctions against an in-memory frame."""
+    mask = pd.Series(True, index=df.index)
+    for column, op, value in filters:
+        series = df[column]
+        if op in ("=", "=="):
+            mask &= series == value
+        elif op == "!=":
+            mask &= series != value
+        elif op == "<":
+            mask &= series < value
+        elif op == "<=":
+            mask &= series <= value
+        elif op == ">":
+            mask &= series > value
+        elif op == ">=":
+            mask &= series >= value
+        elif op == "in":
+            mask &= series.isin(value)
+        else:
+            raise ValueError(f"Unsupported filter operator: {op}")
+    return mask.fillna(False).astype(bool)
+
+def write_features(df: pd.DataFrame, path: str) -> None:
+    """Writes a windowed onchain feature frame to Parquet with the typed features schema."""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    pq.write_table(_table_from_frame(df, ONCHAIN_FEATURES_SCHEMA), path)
+
+def read_features(path: str, columns: Optional[List[str]] = None, filters: Optional[Filters] = None) -> pd.DataFrame:
+    """Reads a windowed onchain feature frame, loading only the requested columns and rows."""
+    return _read_table(path, columns, filters)
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert an integrated scores CSV into the typed Parquet store.")
+    parser.add_argument("-i", "--input_file", type=str, required=True, help="Path to the input integrated scores CSV.")
+    parser.add_argument("-o", "--output_file", type=str, required=True, help="Path to the output Parquet file.")
+
+    args = parser.parse_args()
+
+    try:
+        df = read_scores_csv(args.input_file)
+    except FileNotFoundError:
+        print(f"Error: Input file not found: {args.input_file}")
+        return
+    except pd.errors.EmptyDataError:
+        print(f"Error: Input file is empty: {args.input_file}")
+        return
+
+    write_scores(df, args.output_file)
+    print(f"Wrote {len(df)} score records to {args.output_file}")
+
+if __name__ == "__main__":
+    main()
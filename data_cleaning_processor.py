@@ -1,9 +1,11 @@
 #!/usr/bin/env python3.11
+import os
 import json
 import argparse
-import pandas as pd
 import re
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterable, Iterator, Callable
+
+from json_stream import open_record_stream, load_json, write_records, save_json, reserve_stdout_for_records, NotARecordStreamError
 
 # Basic text cleaning functions (can be expanded)
 def normalize_text(text: str) -> str:
@@ -16,7 +18,10 @@ def normalize_text(text: str) -> str:
 
 def clean_twitter_data(data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
     """Cleans a list of tweet objects."""
-    cleaned_data = []
+    return list(iter_clean_twitter_data(data))
+
+def iter_clean_twitter_data(data: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+    """Cleans tweet objects one at a time; only the seen IDs are kept in memory."""
     seen_ids = set()
     for record in data:
         if not isinstance(record, dict) or "id_str" not in record or not record["id_str"]:
@@ -34,13 +39,13 @@ def clean_twitter_data(data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         
         # Example: Convert created_at to a standard format if needed (assuming it exists)
         # For now, we keep it as is, but this is where date parsing would go.
-        cleaned_data.append(record)
-    return cleaned_data
+        yield record
 
 def clean_financial_data(data: List[Dict[str, Any]], id_key: str = "symbol") -> List[Dict[str, Any]]:
     """Cleans a list of financial data records (e.g., Yahoo Finance)."""
     # For financial data, we might convert strings to numbers, handle NaNs
     # This is a placeholder; specific cleaning depends on the exact structure
+    import pandas as pd # Only the financial cleaner needs pandas; the other data types start without it
     df = pd.DataFrame(data)
     if df.empty:
         return []
@@ -61,7 +66,10 @@ def clean_financial_data(data: List[Dict[str, Any]], id_key: str = "symbol") ->
 
 def clean_etherscan_transactions(data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
     """Cleans a list of Etherscan transaction records."""
-    cleaned_data = []
+    return list(iter_clean_etherscan_transactions(data))
+
+def iter_clean_etherscan_transactions(data: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+    """Cleans Etherscan transaction records one at a time; only the seen hashes are kept in memory."""
     seen_hashes = set()
     for tx in data:
         if not isinstance(tx, dict) or "hash" not in tx or not tx["hash"]:
@@ -77,8 +85,7 @@ def clean_etherscan_transactions(data: List[Dict[str, Any]]) -> List[Dict[str, A
                     tx[key] = int(tx[key]) if tx[key].isdigit() else float(tx[key])
                 except ValueError:
                     pass # Keep as string if conversion fails
-        cleaned_data.append(tx)
-    return cleaned_data
+        yield tx
 
 def clean_scraped_website_data(data: Dict[str, Any]) -> Dict[str, Any]:
     """Cleans a single scraped website data object."""
@@ -90,20 +97,59 @@ def clean_scraped_website_data(data: Dict[str, Any]) -> Dict[str, Any]:
         data["cleaned_title"] = normalize_text(data["title"])
     return data
 
+# Record-list data types that are cleaned as a stream instead of loading the whole input file
+STREAMING_CLEANERS: Dict[str, Callable[[Iterable[Dict[str, Any]]], Iterator[Dict[str, Any]]]] = {
+    "twitter": iter_clean_twitter_data,
+    "etherscan_transactions": iter_clean_etherscan_transactions
+}
+
+def stream_clean_records(input_file: str, output_file: str, cleaner: Callable[[Iterable[Dict[str, Any]]], Iterator[Dict[str, Any]]]) -> None:
+    """
+    Reads records one at a time from a JSON array (or NDJSON) file, cleans them and writes the output
+    incrementally (NDJSON for *.ndjson / *.jsonl / '-' outputs), so memory stays flat regardless of input size.
+    """
+    try:
+        # Open and validate the input before the output file is created
+        records = open_record_stream(input_file)
+    except FileNotFoundError:
+        print(f"Error: Input file not found: {input_file}")
+        return
+    except NotARecordStreamError:
+        records = iter(()) # e.g. an API error object: nothing to clean
+    except json.JSONDecodeError:
+        print(f"Error: Could not decode JSON from input file: {input_file}")
+        return
+
+    try:
+        count = write_records(output_file, cleaner(records))
+        if count == 0:
+            print(f"Input file {input_file} is empty or contains no data. Writing empty list/dict to output.")
+        print(f"Cleaned data saved to {output_file} ({count} records)")
+    except json.JSONDecodeError:
+        print(f"Error: Could not decode JSON from input file: {input_file}")
+        if output_file != "-" and os.path.exists(output_file):
+            os.remove(output_file) # Do not leave a truncated output behind
+    except Exception as e:
+        print(f"Error writing cleaned data to {output_file}: {e}")
+
 def main():
     parser = argparse.ArgumentParser(description="Clean and preprocess data from various sources.")
-    parser.add_argument("-i", "--input_file", type=str, required=True, help="Path to the input JSON file.")
-    parser.add_argument("-o", "--output_file", type=str, required=True, help="Path to the output cleaned JSON file.")
+    parser.add_argument("-i", "--input_file", type=str, required=True, help="Path to the input JSON or NDJSON file ('-' for stdin).")
+    parser.add_argument("-o", "--output_file", type=str, required=True, help="Path to the output cleaned file; *.ndjson / *.jsonl or '-' (stdout) writes compact NDJSON.")
     parser.add_argument("-t", "--data_type", type=str, required=True, 
                         choices=["twitter", "yahoo_finance_chart", "yahoo_finance_holders", 
                                  "yahoo_finance_insights", "yahoo_finance_sec", "etherscan_transactions", "scraped_website"],
                         help="Type of data to clean (e.g., twitter, financial, etherscan, scraped_website).")
 
     args = parser.parse_args()
+    reserve_stdout_for_records(args.output_file)
+
+    if args.data_type in STREAMING_CLEANERS:
+        stream_clean_records(args.input_file, args.output_file, STREAMING_CLEANERS[args.data_type])
+        return
 
     try:
-        with open(args.input_file, "r", encoding="utf-8") as f:
-            raw_data = json.load(f)
+        raw_data = load_json(args.input_file)
     except FileNotFoundError:
         print(f"Error: Input file not found: {args.input_file}")
         return
@@ -132,14 +178,16 @@ def main():
     elif args.data_type == "etherscan_transactions":
         cleaned_data = clean_etherscan_transactions(raw_data if isinstance(raw_data, list) else [])
     elif args.data_type == "scraped_website":
-        cleaned_data = clean_scraped_website_data(raw_data if isinstance(raw_data, dict) else {})
+        if isinstance(raw_data, list): # NDJSON input: one scraped page per line
+            cleaned_data = [clean_scraped_website_data(page) for page in raw_data]
+        else:
+            cleaned_data = clean_scraped_website_data(raw_data if isinstance(raw_data, dict) else {})
     else:
         print(f"Error: Unknown data type 	'{args.data_type}	'. No cleaning performed.")
         cleaned_data = raw_data # Pass through if unknown
 
     try:
-        with open(args.output_file, "w", encoding="utf-8") as f:
-            json.dump(cleaned_data, f, ensure_ascii=False, indent=4)
+        save_json(args.output_file, cleaned_data)
         print(f"Cleaned data saved to {args.output_file}")
     except Exception as e:
         print(f"Error writing cleaned data to {args.output_file}: {e}")
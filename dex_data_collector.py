@@ -3,6 +3,7 @@ import json
 import argparse
 import os
 import time
+from json_stream import save_json
 # Placeholder for actual API client or scraping library
 # from dex_tool_client import DexToolClient 
 
@@ -54,8 +55,7 @@ def fetch_dex_data_for_pair(pair_address: str, output_file: str, chain: str = "e
         "simulated_liquidity_usd": 50000,
         "simulated_volume_24h_usd": 100000
     }
-    with open(output_file, "w", encoding="utf-8") as f:
-        json.dump(placeholder_data, f, ensure_ascii=False, indent=4)
+    save_json(output_file, placeholder_data)
     print(f"Placeholder DEX data saved to {output_file}")
 
 if __name__ == "__main__":
@@ -1,12 +1,27 @@
 #!/usr/bin/env python3.11
+import io
 import json
 import argparse
 import os
 import requests # For making direct API calls
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import List, Dict, Any, Optional
+from json_stream import save_json, write_json_array, write_records, iter_ndjson_records, is_ndjson_output, COMPACT_SEPARATORS, CHUNK_SIZE
+from rate_limiter import TokenBucket, backoff_delay
+from http_client import get_http_client, configure_http_client, DEFAULT_CONNECT_TIMEOUT, DEFAULT_READ_TIMEOUT, DEFAULT_MAX_PER_HOST
+from response_cache import configure_response_cache, print_cache_stats, DEFAULT_MAX_BYTES
 
 # It's good practice to use environment variables for API keys.
 ETHERSCAN_API_KEY = os.getenv("ETHERSCAN_API_KEY", "YourApiKeyToken") # Default to placeholder if not set
+ETHERSCAN_API_URL = os.getenv("ETHERSCAN_API_URL", "https://api.etherscan.io/api")
+
+# Calls per second allowed by each Etherscan API plan
+ETHERSCAN_RATE_LIMITS = {"free": 5, "standard": 10, "advanced": 20, "professional": 30}
+DEFAULT_MAX_RETRIES = 5
+# Etherscan serves at most page * offset <= 10,000 results for one query
+MAX_RESULT_WINDOW = 10000
+DEFAULT_PAGE_SIZE = 10000
 
 def get_api_key(provided_key=None):
     """Helper function to get the API key."""
@@ -17,12 +32,44 @@ def get_api_key(provided_key=None):
     print("Warning: Etherscan API key not found. Please set the ETHERSCAN_API_KEY environment variable or provide it via --api_key argument. Using placeholder, API calls may fail.")
     return "YourApiKeyToken" # Fallback to placeholder
 
-def fetch_etherscan_address_transactions(address: str, output_file: str, api_key_val: str, start_block: int = 0, end_block: int = 99999999, page: int = 1, offset: int = 100, sort: str = "asc"):
+def is_rate_limited(data: Dict[str, Any]) -> bool:
+    """Etherscan reports an exceeded rate limit as status "0" with a "Max rate limit reached" / "Max calls per sec" result."""
+    return data.get("status") == "0" and "rate limit" in str(data.get("result", "")).lower()
+
+def is_cacheable_response(response: requests.Response) -> bool:
+    """Only successful results (including an empty "No transactions found") go to the response cache, never errors."""
+    try:
+        data = response.json()
+    except ValueError:
+        return False
+    return data.get("status") == "1" or "No transactions found" in str(data.get("result", ""))
+
+def etherscan_get(params: Dict[str, Any], rate_limiter: Optional[TokenBucket] = None, max_retries: int = DEFAULT_MAX_RETRIES, cache_type: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Calls the Etherscan API through the shared HTTP client and returns the decoded response. Each attempt first
+    takes a token from the shared rate limiter; HTTP 429, server and connection errors are retried by the client,
+    and the API's own NOTOK rate-limit responses are retried here with jittered exponential backoff. A rate-limit
+    response also pauses the limiter, so every concurrent worker backs off together.
+    With a cache_type, successful responses are served from the response cache while fresh (no API call).
+    """
+    for attempt in range(max_retries + 1):
+        response = get_http_client().get(ETHERSCAN_API_URL, params=params, rate_limiter=rate_limiter, max_retries=max_retries, cache_type=cache_type, cacheable=is_cacheable_response)
+        response.raise_for_status()  # Raise an exception for HTTP errors (4xx or 5xx)
+        data = response.json()
+        if not is_rate_limited(data) or attempt == max_retries:
+            return data
+        delay = max(1.0, backoff_delay(attempt)) # The limit is counted per second
+        if rate_limiter is not None:
+            rate_limiter.pause(delay)
+        print(f"Etherscan rate limit reached ({data.get('result')}); retry {attempt + 1}/{max_retries} in {delay:.1f}s")
+        time.sleep(delay)
+    return data
+
+def fetch_etherscan_address_transactions(address: str, output_file: str, api_key_val: str, start_block: int = 0, end_block: int = 99999999, page: int = 1, offset: int = 100, sort: str = "asc", rate_limiter: Optional[TokenBucket] = None, max_retries: int = DEFAULT_MAX_RETRIES):
     """
     Fetches transaction history for a given Ethereum address using direct Etherscan API calls
     and saves it to a JSON file.
     """
-    api_url = "https://api.etherscan.io/api"
     params = {
         "module": "account",
         "action": "txlist",
@@ -36,56 +83,46 @@ def fetch_etherscan_address_transactions(address: str, output_file: str, api_key
     }
     try:
         print(f"Fetching Etherscan transaction data for address: {address} via direct API call")
-        response = requests.get(api_url, params=params)
-        response.raise_for_status()  # Raise an exception for HTTP errors (4xx or 5xx)
-        data = response.json()
+        data = etherscan_get(params, rate_limiter, max_retries, cache_type="etherscan_transactions")
 
         if data.get("status") == "1" and data.get("message") == "OK":
             transactions = data.get("result", [])
             print(f"Successfully fetched {len(transactions)} transactions for address: {address}")
-            with open(output_file, "w", encoding="utf-8") as f:
-                json.dump(transactions, f, ensure_ascii=False, indent=4)
+            save_json(output_file, transactions)
             print(f"Etherscan transaction data saved to {output_file}")
             return True
         elif data.get("message") == "NOTOK" and "Invalid API Key" in data.get("result", ""):
             print(f"Error: Invalid API Key. Please check your Etherscan API key.")
-            with open(output_file, "w", encoding="utf-8") as f:
-                json.dump({"error": "Invalid API Key", "message": data.get("result")}, f, ensure_ascii=False, indent=4)
+            save_json(output_file, {"error": "Invalid API Key", "message": data.get("result")})
             return False
         elif data.get("message") == "NOTOK" and "No transactions found" in data.get("result", ""):
             print(f"No transactions found for address: {address}")
-            with open(output_file, "w", encoding="utf-8") as f:
-                json.dump({"message": "No transactions found", "address": address, "data": []}, f, ensure_ascii=False, indent=4)
+            save_json(output_file, {"message": "No transactions found", "address": address, "data": []})
             return True # Not an error, just no data
         elif data.get("message") == "NOTOK":
             print(f"Etherscan API Error for transactions: {data.get('result', 'Unknown error')}")
-            with open(output_file, "w", encoding="utf-8") as f:
-                json.dump({"error": "API Error", "message": data.get("result")}, f, ensure_ascii=False, indent=4)
+            save_json(output_file, {"error": "API Error", "message": data.get("result")})
             return False
         else:
             print(f"Received unexpected response from Etherscan API for transactions: {data}")
-            with open(output_file, "w", encoding="utf-8") as f:
-                json.dump(data, f, ensure_ascii=False, indent=4)
+            save_json(output_file, data)
             return False
 
     except requests.exceptions.RequestException as e:
         print(f"An HTTP error occurred while fetching Etherscan data for address '{address}': {e}")
-        with open(output_file, "w", encoding="utf-8") as f:
-            json.dump({"error": str(e), "address": address}, f, ensure_ascii=False, indent=4)
+        save_json(output_file, {"error": str(e), "address": address})
         return False
     except Exception as e:
         print(f"An unexpected error occurred while fetching Etherscan data for address '{address}': {e}")
-        with open(output_file, "w", encoding="utf-8") as f:
-            json.dump({"error": str(e), "address": address}, f, ensure_ascii=False, indent=4)
+        save_json(output_file, {"error": str(e), "address": address})
         return False
 
-def fetch_erc20_token_holders(contract_address: str, output_file: str, api_key_val: str, page: int = 1, offset: int = 100):
+def fetch_erc20_token_holders(contract_address: str, output_file: str, api_key_val: str, page: int = 1, offset: int = 100, rate_limiter: Optional[TokenBucket] = None, max_retries: int = DEFAULT_MAX_RETRIES):
     """
     Fetches the list of ERC20 token holders for a given contract address using the Etherscan API (PRO endpoint).
     Saves the result to a JSON file.
     Note: This uses a PRO endpoint, which might be restricted on free API keys.
     """
-    api_url = "https://api.etherscan.io/api"
     params = {
         "module": "token",
         "action": "tokenholderlist",
@@ -97,75 +134,280 @@ def fetch_erc20_token_holders(contract_address: str, output_file: str, api_key_v
 
     try:
         print(f"Fetching ERC20 token holder list for contract: {contract_address}")
-        response = requests.get(api_url, params=params)
-        response.raise_for_status()  # Raise an exception for HTTP errors (4xx or 5xx)
-        data = response.json()
+        data = etherscan_get(params, rate_limiter, max_retries, cache_type="token_holders")
 
         if data.get("status") == "1" and data.get("message") == "OK":
             holders = data.get("result", [])
             print(f"Successfully fetched {len(holders)} token holder records for contract: {contract_address}")
-            with open(output_file, "w", encoding="utf-8") as f:
-                json.dump(holders, f, ensure_ascii=False, indent=4)
+            save_json(output_file, holders)
             print(f"Token holder data saved to {output_file}")
             return True
         elif data.get("message") == "NOTOK" and "Invalid API Key" in data.get("result", ""):
             print(f"Error: Invalid API Key. Please check your Etherscan API key.")
-            with open(output_file, "w", encoding="utf-8") as f:
-                json.dump({"error": "Invalid API Key", "message": data.get("result")}, f, ensure_ascii=False, indent=4)
+            save_json(output_file, {"error": "Invalid API Key", "message": data.get("result")})
             return False
         elif data.get("message") == "NOTOK":
             print(f"Etherscan API Error for token holders: {data.get('result', 'Unknown error')}")
-            with open(output_file, "w", encoding="utf-8") as f:
-                json.dump({"error": "API Error", "message": data.get("result")}, f, ensure_ascii=False, indent=4)
+            save_json(output_file, {"error": "API Error", "message": data.get("result")})
             return False
         else:
             print(f"Received unexpected response from Etherscan API for token holders: {data}")
-            with open(output_file, "w", encoding="utf-8") as f:
-                json.dump(data, f, ensure_ascii=False, indent=4) # Save the full response for inspection
+            save_json(output_file, data) # Save the full response for inspection
             return False # Consider unexpected as failure for batch processing
 
     except requests.exceptions.RequestException as e:
         print(f"An HTTP error occurred while fetching token holder data for contract '{contract_address}': {e}")
-        with open(output_file, "w", encoding="utf-8") as f:
-            json.dump({"error": str(e), "contract_address": contract_address}, f, ensure_ascii=False, indent=4)
+        save_json(output_file, {"error": str(e), "contract_address": contract_address})
         return False
     except Exception as e:
         print(f"An unexpected error occurred while fetching token holder data for contract '{contract_address}': {e}")
-        with open(output_file, "w", encoding="utf-8") as f:
-            json.dump({"error": str(e), "contract_address": contract_address}, f, ensure_ascii=False, indent=4)
+        save_json(output_file, {"error": str(e), "contract_address": contract_address})
         return False
 
-def batch_fetch_etherscan_data(tasks_file: str, output_dir: str, api_key_val: str):
+def _load_checkpoint(checkpoint_file: str, query: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Returns the saved pagination state if it belongs to the same query, else None."""
+    try:
+        with open(checkpoint_file, "r", encoding="utf-8") as f:
+            state = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+    if state.get("query") != query:
+        print(f"Ignoring checkpoint {checkpoint_file}: it was written for a different query.")
+        return None
+    return state
+
+def _write_json_atomically(path: str, state: Dict[str, Any]) -> None:
+    # Written to a temporary file and renamed, so a crash never leaves a half-written state file
+    temp_file = f"{path}.tmp"
+    with open(temp_file, "w", encoding="utf-8") as f:
+        json.dump(state, f)
+    os.replace(temp_file, path)
+
+def fetch_all_pages(params: Dict[str, Any], output_file: str, label: str, page_size: int = DEFAULT_PAGE_SIZE, block_ranges: bool = False, rate_limiter: Optional[TokenBucket] = None, max_retries: int = DEFAULT_MAX_RETRIES, cache_type: Optional[str] = None) -> bool:
     """
-    Processes a list of Etherscan data fetching tasks from a JSON file.
-    Each task specifies the action (fetch_transactions or fetch_token_holders) and relevant parameters.
+    Fetches every page of a paginated Etherscan query and writes all records to output_file.
+    Pages are requested page_size records at a time. With block_ranges (txlist), once the next page would pass
+    the 10,000-result window the query restarts from the last block seen, skipping records of that block
+    already written; its hashes are collected over every page that reached it, since a busy block can span
+    several. Each page is appended to <output_file>.part as NDJSON as soon as it arrives, and the position
+    reached is saved to <output_file>.checkpoint, so memory stays at one page and an interrupted fetch
+    resumes from the last completed page. The part file becomes output_file once the last page is in.
+    With a cache_type, pages are read through the response cache.
     """
-    os.makedirs(output_dir, exist_ok=True)
-    all_successful = True
-    try:
-        with open(tasks_file, "r", encoding="utf-8") as f:
-            tasks = json.load(f)
-    except FileNotFoundError:
-        print(f"Error: Tasks file not found at {tasks_file}")
-        return False
-    except json.JSONDecodeError:
-        print(f"Error: Could not decode JSON from tasks file: {tasks_file}")
-        return False
+    part_file = f"{output_file}.part"
+    checkpoint_file = f"{output_file}.checkpoint"
+    page_size = max(1, min(page_size, MAX_RESULT_WINDOW))
+    query = {key: value for key, value in params.items() if key != "apikey"}
+    query["page_size"] = page_size
+    descending = params.get("sort") == "desc"
+
+    state = _load_checkpoint(checkpoint_file, query) if os.path.exists(part_file) else None
+    if state is not None:
+        print(f"Resuming {label} from page {state['page']} (blocks {state['start_block']}-{state['end_block']}, {state['records']} records already saved).")
+    else:
+        state = {"query": query, "page": 1, "start_block": params.get("startblock"), "end_block": params.get("endblock"), "boundary_hashes": [], "tail_block": None, "tail_hashes": [], "records": 0, "bytes": 0}
+    # Hashes of every record fetched so far in the last block reached
+    tail_hashes = set(state.get("tail_hashes", []))
+
+    with open(part_file, "a+b") as f:
+        f.truncate(state["bytes"]) # Drops a page appended after the last checkpoint
+        while True:
+            page_params = dict(params, page=state["page"], offset=page_size)
+            if block_ranges:
+                page_params.update(startblock=state["start_block"], endblock=state["end_block"])
+            try:
+                data = etherscan_get(page_params, rate_limiter, max_retries, cache_type)
+            except requests.exceptions.RequestException as e:
+                print(f"An HTTP error occurred while fetching {label} (page {state['page']}): {e}. Re-run to resume from this page.")
+                return False
+            result = data.get("result")
+            if data.get("status") == "1" and isinstance(result, list):
+                page_records = result
+            elif data.get("status") == "0" and (isinstance(result, list) or "No transactions found" in str(result)):
+                page_records = [] # Empty result past the last record
+            else:
+                print(f"Etherscan API Error for {label} (page {state['page']}): {result}. Re-run to resume from this page.")
+                return False
+
+            boundary_hashes = set(state["boundary_hashes"])
+            new_records = [record for record in page_records if record.get("hash") not in boundary_hashes] if boundary_hashes else page_records
+            for record in new_records:
+                f.write((json.dumps(record, ensure_ascii=False, separators=COMPACT_SEPARATORS) + "\n").encode("utf-8"))
+            f.flush()
+            os.fsync(f.fileno())
+            state["bytes"] = f.tell()
+            state["records"] += len(new_records)
+            if block_ranges:
+                for record in page_records:
+                    block = int(record["blockNumber"])
+                    if block != state.get("tail_block"):
+                        state["tail_block"] = block
+                        tail_hashes = set()
+                    tail_hashes.add(record.get("hash"))
+                state["tail_hashes"] = sorted(tail_hashes)
+            print(f"Fetched {label} page {state['page']}: {len(new_records)} new records ({state['records']} total).")
 
-    for i, task in enumerate(tasks):
-        action = task.get("action")
-        output_filename_prefix = task.get("output_prefix", f"task_{i+1}")
-        output_file = os.path.join(output_dir, f"{output_filename_prefix}.json")
-        success = False
+            if len(page_records) < page_size:
+                break
+            if block_ranges and (state["page"] + 1) * page_size > MAX_RESULT_WINDOW:
+                last_block = state["tail_block"]
+                previous_boundary = state["start_block"] if not descending else state["end_block"]
+                if previous_boundary is not None and last_block == int(previous_boundary):
+                    print(f"Error: block {last_block} alone holds more than {MAX_RESULT_WINDOW} results for {label}; cannot page past it.")
+                    return False
+                # Records of the last block may continue in the next range, so the block is queried again and its known hashes skipped
+                state["boundary_hashes"] = sorted(tail_hashes)
+                state["start_block" if not descending else "end_block"] = last_block
+                state["page"] = 1
+            else:
+                state["page"] += 1
+            _write_json_atomically(checkpoint_file, state)
 
-        print(f"\nProcessing task {i+1}/{len(tasks)}: action='{action}', output='{output_file}'")
+    if is_ndjson_output(output_file):
+        os.replace(part_file, output_file)
+    else:
+        with open(part_file, "r", encoding="utf-8") as f:
+            write_json_array(output_file, iter_ndjson_records(f))
+        os.remove(part_file)
+    if os.path.exists(checkpoint_file):
+        os.remove(checkpoint_file)
+    print(f"Saved {state['records']} records ({label}) to {output_file}")
+    return True
+
+def fetch_all_address_transactions(address: str, output_file: str, api_key_val: str, start_block: int = 0, end_block: int = 99999999, sort: str = "asc", page_size: int = DEFAULT_PAGE_SIZE, rate_limiter: Optional[TokenBucket] = None, max_retries: int = DEFAULT_MAX_RETRIES) -> bool:
+    """Fetches the full transaction history of an address, paging through block ranges beyond the 10,000-result window."""
+    params = {
+        "module": "account",
+        "action": "txlist",
+        "address": address,
+        "startblock": start_block,
+        "endblock": end_block,
+        "sort": sort,
+        "apikey": api_key_val
+    }
+    print(f"Fetching full Etherscan transaction history for address: {address}")
+    return fetch_all_pages(params, output_file, f"transactions of {address}", page_size, block_ranges=True, rate_limiter=rate_limiter, max_retries=max_retries)
 
-        if action == "fetch_transactions":
-            address = task.get("address")
-            if not address:
-                print(f"Skipping task {i+1}: 'address' not provided for fetch_transactions.")
-                all_successful = False
+def fetch_all_erc20_token_holders(contract_address: str, output_file: str, api_key_val: str, page_size: int = DEFAULT_PAGE_SIZE, rate_limiter: Optional[TokenBucket] = None, max_retries: int = DEFAULT_MAX_RETRIES) -> bool:
+    """Fetches every page of the ERC20 token holder list (PRO endpoint)."""
+    params = {
+        "module": "token",
+        "action": "tokenholderlist",
+        "contractaddress": contract_address,
+        "apikey": api_key_val
+    }
+    print(f"Fetching full ERC20 token holder list for contract: {contract_address}")
+    return fetch_all_pages(params, output_file, f"token holders of {contract_address}", page_size, rate_limiter=rate_limiter, max_retries=max_retries, cache_type="token_holders")
+
+def _truncate_partial_line(path: str) -> None:
+    """Cuts a trailing line left incomplete by a crash during an append, so the store ends on a whole record."""
+    with open(path, "r+b") as f:
+        end = f.seek(0, os.SEEK_END)
+        position = end
+        while position > 0:
+            chunk_start = max(0, position - CHUNK_SIZE)
+            f.seek(chunk_start)
+            newline = f.read(position - chunk_start).rfind(b"\n")
+            if newline != -1:
+                position = chunk_start + newline + 1
+                break
+            position = chunk_start
+        if position != end:
+            print(f"Dropping an incomplete record at the end of {path}.")
+            f.truncate(position)
+
+def _scan_transaction_store(store_file: str) -> Dict[str, Any]:
+    """Rebuilds sync state from an NDJSON transaction store: highest blockNumber, its hashes, record count and size."""
+    state = {"last_block": None, "last_block_hashes": [], "records": 0, "bytes": 0}
+    if not os.path.exists(store_file):
+        return state
+    _truncate_partial_line(store_file)
+    last_block_hashes = set()
+    with open(store_file, "r", encoding="utf-8") as f:
+        for record in iter_ndjson_records(f):
+            state["records"] += 1
+            block = int(record.get("blockNumber", -1))
+            if state["last_block"] is None or block > state["last_block"]:
+                state["last_block"] = block
+                last_block_hashes = set()
+            if block == state["last_block"]:
+                last_block_hashes.add(record.get("hash"))
+    state["last_block_hashes"] = sorted(last_block_hashes)
+    state["bytes"] = os.path.getsize(store_file)
+    return state
+
+def sync_address_transactions(address: str, store_file: str, api_key_val: str, start_block: int = 0, page_size: int = DEFAULT_PAGE_SIZE, rate_limiter: Optional[TokenBucket] = None, max_retries: int = DEFAULT_MAX_RETRIES, delta_file: Optional[str] = None) -> bool:
+    """
+    Brings an append-only NDJSON store of an address's transactions up to date. The highest blockNumber already
+    stored is kept in <store_file>.sync, and only blocks after it are requested (startblock = last + 1), so a
+    routine refresh costs one call per page of new transactions. New transactions are deduplicated by hash
+    against the last stored block and appended; the store is never rewritten. If delta_file is given, the
+    newly appended transactions are also written there (e.g. for the anomaly detector's incremental mode).
+    """
+    state_file = f"{store_file}.sync"
+    state = None
+    if os.path.exists(state_file):
+        with open(state_file, "r", encoding="utf-8") as f:
+            state = json.load(f)
+    store_size = os.path.getsize(store_file) if os.path.exists(store_file) else 0
+    if state is None or state.get("address", "").lower() != address.lower() or state.get("bytes") != store_size:
+        # No state yet, or the store changed after the state was saved (e.g. a crash between append and save)
+        state = dict(_scan_transaction_store(store_file), address=address)
+        store_size = state["bytes"]
+
+    from_block = state["last_block"] + 1 if state["last_block"] is not None else start_block
+    print(f"Syncing transactions of {address} from block {from_block} into {store_file}...")
+    new_file = f"{store_file}.new.ndjson"
+    if not fetch_all_address_transactions(address, new_file, api_key_val, start_block=from_block, page_size=page_size, rate_limiter=rate_limiter, max_retries=max_retries):
+        return False
+
+    known_hashes = set(state["last_block_hashes"])
+    appended = 0
+    with open(new_file, "r", encoding="utf-8") as new_f, open(store_file, "a", encoding="utf-8") as store_f:
+        for record in iter_ndjson_records(new_f):
+            if record.get("hash") in known_hashes:
                 continue
+            known_hashes.add(record.get("hash"))
+            store_f.write(json.dumps(record, ensure_ascii=False, separators=COMPACT_SEPARATORS) + "\n")
+            block = int(record["blockNumber"])
+            if state["last_block"] is None or block > state["last_block"]:
+                state["last_block"] = block
+                state["last_block_hashes"] = []
+            if block == state["last_block"]:
+                state["last_block_hashes"].append(record.get("hash"))
+            state["records"] += 1
+            appended += 1
+        store_f.flush()
+        os.fsync(store_f.fileno())
+    state["bytes"] = os.path.getsize(store_file)
+    state["last_synced"] = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+    _write_json_atomically(state_file, state)
+    os.remove(new_file)
+
+    if delta_file:
+        # The new transactions are exactly the bytes appended to the store by this sync
+        with open(store_file, "rb") as f:
+            f.seek(store_size)
+            write_records(delta_file, iter_ndjson_records(io.TextIOWrapper(f, encoding="utf-8")))
+    print(f"Appended {appended} new transactions for {address} ({state['records']} stored, last block {state['last_block']}).")
+    return True
+
+def run_etherscan_task(task_number: int, task: Dict[str, Any], output_dir: str, api_key_val: str, file_extension: str = ".json", rate_limiter: Optional[TokenBucket] = None, max_retries: int = DEFAULT_MAX_RETRIES) -> Dict[str, Any]:
+    """Runs one batch task and returns its status record: task number, action, output file, status ("ok", "failed" or "skipped"), elapsed seconds and any error."""
+    action = task.get("action")
+    output_filename_prefix = task.get("output_prefix", f"task_{task_number}")
+    output_file = os.path.join(output_dir, f"{output_filename_prefix}{file_extension}")
+    status = {"task": task_number, "action": action, "output_file": output_file, "status": "failed", "elapsed_sec": 0.0, "error": None}
+    started = time.perf_counter()
+
+    if action == "fetch_transactions":
+        address = task.get("address")
+        if not address:
+            status.update(status="skipped", error="'address' not provided for fetch_transactions")
+            return status
+        if task.get("all_pages"):
+            success = fetch_all_address_transactions(address, output_file, api_key_val, task.get("start_block", 0), task.get("end_block", 99999999), task.get("sort", "asc"), task.get("page_size", DEFAULT_PAGE_SIZE), rate_limiter, max_retries)
+        else:
             success = fetch_etherscan_address_transactions(
                 address=address,
                 output_file=output_file,
@@ -174,45 +416,114 @@ def batch_fetch_etherscan_data(tasks_file: str, output_dir: str, api_key_val: st
                 end_block=task.get("end_block", 99999999),
                 page=task.get("page", 1),
                 offset=task.get("offset", 100),
-                sort=task.get("sort", "asc")
+                sort=task.get("sort", "asc"),
+                rate_limiter=rate_limiter,
+                max_retries=max_retries
             )
-        elif action == "fetch_token_holders":
-            contract_address = task.get("contract_address")
-            if not contract_address:
-                print(f"Skipping task {i+1}: 'contract_address' not provided for fetch_token_holders.")
-                all_successful = False
-                continue
+    elif action == "fetch_token_holders":
+        contract_address = task.get("contract_address")
+        if not contract_address:
+            status.update(status="skipped", error="'contract_address' not provided for fetch_token_holders")
+            return status
+        if task.get("all_pages"):
+            success = fetch_all_erc20_token_holders(contract_address, output_file, api_key_val, task.get("page_size", DEFAULT_PAGE_SIZE), rate_limiter, max_retries)
+        else:
             success = fetch_erc20_token_holders(
                 contract_address=contract_address,
                 output_file=output_file,
                 api_key_val=api_key_val,
                 page=task.get("page", 1),
-                offset=task.get("offset", 100)
+                offset=task.get("offset", 100),
+                rate_limiter=rate_limiter,
+                max_retries=max_retries
             )
-        else:
-            print(f"Skipping task {i+1}: Unknown action '{action}'.")
-            all_successful = False
-        
-        if not success:
-            all_successful = False # Mark overall batch as not fully successful if any task fails
-            print(f"Task {i+1} ('{action}') failed or returned no data. Check {output_file} for details.")
-        else:
-            print(f"Task {i+1} ('{action}') completed.")
-        
-        # Etherscan API rate limit is 5 calls/second for free tier, 10 calls/second for standard
-        # Add a small delay to be safe, especially for batch processing.
-        time.sleep(0.25) # 250ms delay, allows for up to 4 calls/sec
-            
-    return all_successful
+    elif action == "sync_transactions":
+        address = task.get("address")
+        if not address:
+            status.update(status="skipped", error="'address' not provided for sync_transactions")
+            return status
+        # The append-only store is always NDJSON
+        status["output_file"] = os.path.join(output_dir, f"{output_filename_prefix}.ndjson")
+        delta_file = os.path.join(output_dir, task["delta_file"]) if task.get("delta_file") else None
+        success = sync_address_transactions(address, status["output_file"], api_key_val, task.get("start_block", 0), task.get("page_size", DEFAULT_PAGE_SIZE), rate_limiter, max_retries, delta_file)
+    else:
+        status.update(status="skipped", error=f"Unknown action '{action}'")
+        return status
+
+    status["elapsed_sec"] = round(time.perf_counter() - started, 3)
+    if success:
+        status["status"] = "ok"
+    else:
+        status["error"] = f"Failed or returned no data; see {output_file}"
+    return status
+
+def batch_fetch_etherscan_data(tasks_file: str, output_dir: str, api_key_val: str, file_extension: str = ".json", rate_limit: float = ETHERSCAN_RATE_LIMITS["free"], workers: Optional[int] = None, max_retries: int = DEFAULT_MAX_RETRIES, status_file: Optional[str] = None):
+    """
+    Processes a list of Etherscan data fetching tasks from a JSON file.
+    Each task specifies the action (fetch_transactions, fetch_token_holders or sync_transactions) and relevant parameters;
+    "all_pages": true fetches the full history / holder list (with an optional "page_size") instead of one page.
+    sync_transactions appends only transactions after the last stored block to <output_prefix>.ndjson.
+    Outputs are written as <output_prefix><file_extension>; ".ndjson" writes compact newline-delimited records.
+    Tasks run concurrently on a thread pool and share one token-bucket limiter of rate_limit calls/sec,
+    so throughput follows the API plan's rate limit rather than response latency. Each task's status is
+    printed as it finishes and, if status_file is given, all statuses are saved there.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    try:
+        with open(tasks_file, "r", encoding="utf-8") as f:
+            tasks = json.load(f)
+    except FileNotFoundError:
+        print(f"Error: Tasks file not found at {tasks_file}")
+        return False
+    except json.JSONDecodeError:
+        print(f"Error: Could not decode JSON from tasks file: {tasks_file}")
+        return False
+
+    rate_limiter = TokenBucket(rate_limit)
+    # Enough requests in flight to use the whole rate budget while others wait on responses
+    workers = workers or max(4, int(rate_limit * 2))
+    print(f"Processing {len(tasks)} Etherscan tasks with {workers} workers at up to {rate_limit:g} calls/sec...")
+    started = time.perf_counter()
+    statuses: List[Dict[str, Any]] = []
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(run_etherscan_task, i + 1, task, output_dir, api_key_val, file_extension, rate_limiter, max_retries): i + 1
+            for i, task in enumerate(tasks)
+        }
+        for future in as_completed(futures):
+            try:
+                status = future.result()
+            except Exception as e:
+                status = {"task": futures[future], "action": tasks[futures[future] - 1].get("action"), "output_file": None, "status": "failed", "elapsed_sec": None, "error": str(e)}
+            statuses.append(status)
+            detail = f" ({status['error']})" if status["error"] else ""
+            print(f"[{len(statuses)}/{len(tasks)}] Task {status['task']} ('{status['action']}'): {status['status']} in {status['elapsed_sec'] or 0:.2f}s{detail}")
+
+    statuses.sort(key=lambda status: status["task"])
+    elapsed = time.perf_counter() - started
+    counts = {outcome: sum(1 for status in statuses if status["status"] == outcome) for outcome in ("ok", "failed", "skipped")}
+    print(f"Batch finished in {elapsed:.1f}s: {counts['ok']} ok, {counts['failed']} failed, {counts['skipped']} skipped "
+          f"({rate_limiter.acquired} API calls, {rate_limiter.acquired / elapsed if elapsed else 0:.1f} calls/sec).")
+    get_http_client().print_stats()
+    print_cache_stats()
+    if status_file:
+        save_json(status_file, statuses)
+        print(f"Task statuses saved to {status_file}")
+    return counts["ok"] == len(tasks)
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Fetch data from Etherscan API. Can run in single mode or batch mode.")
     parser.add_argument("--api_key", type=str, default=None, help="Etherscan API Key. Overrides ETHERSCAN_API_KEY env var.")
+    parser.add_argument("--connect_timeout", type=float, default=DEFAULT_CONNECT_TIMEOUT, help="Seconds to wait for a connection to the API.")
+    parser.add_argument("--read_timeout", type=float, default=DEFAULT_READ_TIMEOUT, help="Seconds to wait for each response.")
+    parser.add_argument("--max_per_host", type=int, default=DEFAULT_MAX_PER_HOST, help="Maximum concurrent requests (and pooled keep-alive connections) per host.")
+    parser.add_argument("--cache_file", type=str, default=os.getenv("RESPONSE_CACHE_FILE"), help="SQLite response cache; fresh responses are reused instead of calling the API again (default: $RESPONSE_CACHE_FILE, unset disables caching).")
+    parser.add_argument("--cache_max_mb", type=float, default=DEFAULT_MAX_BYTES / (1024 * 1024), help="Size cap of the response cache; least recently used responses are evicted beyond it.")
     
     mode_parser = parser.add_subparsers(dest="mode", required=True, help="Operation mode")
 
     single_mode_parser = mode_parser.add_parser("single", help="Perform a single Etherscan action.")
-    single_mode_parser.add_argument("-o", "--output_file", type=str, required=True, help="The path to the output JSON file for the single action.")
+    single_mode_parser.add_argument("-o", "--output_file", type=str, required=True, help="The path to the output JSON file for the single action (*.ndjson writes compact NDJSON).")
     action_subparsers = single_mode_parser.add_subparsers(dest="action", required=True, help="Action to perform")
 
     parser_tx = action_subparsers.add_parser("fetch_transactions", help="Fetch normal transaction history for an address.")
@@ -222,24 +533,48 @@ if __name__ == "__main__":
     parser_tx.add_argument("--page", type=int, default=1, help="Page number for pagination.")
     parser_tx.add_argument("--offset", type=int, default=100, help="Number of transactions per page (max 10000).")
     parser_tx.add_argument("--sort", type=str, default="asc", choices=["asc", "desc"], help="Sort order for transactions.")
+    parser_tx.add_argument("--all_pages", action="store_true", help="Fetch the full history: every page, then block ranges past the 10,000-result window. Resumes an interrupted fetch of the same query.")
+    parser_tx.add_argument("--page_size", type=int, default=DEFAULT_PAGE_SIZE, help="Records per request with --all_pages (max 10000).")
 
     parser_holders = action_subparsers.add_parser("fetch_token_holders", help="Fetch ERC20 token holder list for a contract address.")
     parser_holders.add_argument("-c", "--contract_address", type=str, required=True, help="The ERC20 token contract address.")
     parser_holders.add_argument("--page", type=int, default=1, help="Page number for pagination.")
     parser_holders.add_argument("--offset", type=int, default=100, help="Number of records per page.")
+    parser_holders.add_argument("--all_pages", action="store_true", help="Fetch every page of the holder list. Resumes an interrupted fetch of the same query.")
+    parser_holders.add_argument("--page_size", type=int, default=DEFAULT_PAGE_SIZE, help="Records per request with --all_pages (max 10000).")
+
+    parser_sync = action_subparsers.add_parser("sync_transactions", help="Append transactions after the last stored block to an append-only NDJSON store (the output file).")
+    parser_sync.add_argument("-a", "--address", type=str, required=True, help="The Ethereum address to sync.")
+    parser_sync.add_argument("--start_block", type=int, default=0, help="First block to fetch when the store is empty.")
+    parser_sync.add_argument("--page_size", type=int, default=DEFAULT_PAGE_SIZE, help="Records per request (max 10000).")
+    parser_sync.add_argument("--delta_file", type=str, default=None, help="Also write only the newly appended transactions to this file.")
 
     batch_mode_parser = mode_parser.add_parser("batch", help="Process multiple tasks from a JSON file.")
     batch_mode_parser.add_argument("--tasks_file", type=str, required=True, help="Path to a JSON file containing a list of tasks.")
     batch_mode_parser.add_argument("--output_dir", type=str, required=True, help="Directory to save output files for batch tasks.")
+    batch_mode_parser.add_argument("--ndjson", action="store_true", help="Write one compact .ndjson file per task instead of indented .json.")
+    batch_mode_parser.add_argument("--tier", type=str, default="free", choices=list(ETHERSCAN_RATE_LIMITS), help="Etherscan API plan, which sets the calls/sec limit shared by all workers.")
+    batch_mode_parser.add_argument("--rate_limit", type=float, default=None, help="Calls per second; overrides --tier.")
+    batch_mode_parser.add_argument("--workers", type=int, default=None, help="Concurrent requests (default: twice the rate limit, at least 4).")
+    batch_mode_parser.add_argument("--max_retries", type=int, default=DEFAULT_MAX_RETRIES, help="Retries per request on rate-limit, server or connection errors.")
+    batch_mode_parser.add_argument("--status_file", type=str, default=None, help="Save every task's status (ok/failed/skipped, elapsed time, error) to this JSON file.")
 
     args = parser.parse_args()
     current_api_key = get_api_key(args.api_key)
+    configure_http_client(args.connect_timeout, args.read_timeout, max_per_host=args.max_per_host)
+    configure_response_cache(args.cache_file, int(args.cache_max_mb * 1024 * 1024))
 
     if args.mode == "single":
-        if args.action == "fetch_transactions":
+        if args.action == "fetch_transactions" and args.all_pages:
+            fetch_all_address_transactions(args.address, args.output_file, current_api_key, args.start_block, args.end_block, args.sort, args.page_size)
+        elif args.action == "fetch_transactions":
             fetch_etherscan_address_transactions(args.address, args.output_file, current_api_key, args.start_block, args.end_block, args.page, args.offset, args.sort)
+        elif args.action == "fetch_token_holders" and args.all_pages:
+            fetch_all_erc20_token_holders(args.contract_address, args.output_file, current_api_key, args.page_size)
         elif args.action == "fetch_token_holders":
             fetch_erc20_token_holders(args.contract_address, args.output_file, current_api_key, args.page, args.offset)
+        elif args.action == "sync_transactions":
+            sync_address_transactions(args.address, args.output_file, current_api_key, args.start_block, args.page_size, delta_file=args.delta_file)
     elif args.mode == "batch":
-        batch_fetch_etherscan_data(args.tasks_file, args.output_dir, current_api_key)
+        batch_fetch_etherscan_data(args.tasks_file, args.output_dir, current_api_key, ".ndjson" if args.ndjson else ".json", args.rate_limit or ETHERSCAN_RATE_LIMITS[args.tier], args.workers, args.max_retries, args.status_file)
 
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3.11
+import os
+import time
+import threading
+from collections import deque
+from email.utils import parsedate_to_datetime
+from typing import Dict, Any, Optional, Tuple, Callable
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+from rate_limiter import TokenBucket, backoff_delay
+from response_cache import get_response_cache, request_cache_key
+
+DEFAULT_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "10"))
+DEFAULT_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "30"))
+DEFAULT_MAX_RETRIES = int(os.getenv("HTTP_MAX_RETRIES", "3"))
+DEFAULT_MAX_PER_HOST = int(os.getenv("HTTP_MAX_PER_HOST", "8"))
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+MAX_RETRY_AFTER_SEC = 60.0
+# Latency percentiles are computed over this many most recent requests per host
+LATENCY_WINDOW = 1024
+# Response headers kept alongside cached bodies
+CACHED_HEADERS = ("Content-Type", "ETag", "Last-Modified")
+
+def cached_response(url: str, entry: Dict[str, Any]) -> requests.Response:
+    """Rebuilds a requests.Response from a response cache entry, so callers handle it like a live one."""
+    response = requests.Response()
+    response.status_code = 200
+    response.url = url
+    response._content = entry["body"]
+    response.headers = CaseInsensitiveDict(entry["headers"])
+    response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+    return response
+
+def retry_after_seconds(response: requests.Response) -> Optional[float]:
+    """Parses a Retry-After header given in seconds or as an HTTP date."""
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+class HostStats:
+    def __init__(self):
+        self.requests = 0
+        self.responses = 0
+        self.retries = 0
+        self.errors = 0
+        self.latencies_ms = deque(maxlen=LATENCY_WINDOW)
+
+class HttpClient:
+    """
+    Shared HTTP layer for the collectors: one pooled keep-alive session per host, connect/read timeouts on
+    every request, retries with jittered exponential backoff on connection errors and 429/5xx responses
+    (honouring Retry-After), and a cap on concurrent requests per host. Safe to share between threads.
+    """
+    def __init__(self, connect_timeout: float = DEFAULT_CONNECT_TIMEOUT, read_timeout: float = DEFAULT_READ_TIMEOUT, max_retries: int = DEFAULT_MAX_RETRIES, max_per_host: int = DEFAULT_MAX_PER_HOST):
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.max_per_host = max(1, max_per_host)
+        self._lock = threading.Lock()
+        self._sessions: Dict[str, requests.Session] = {}
+        self._slots: Dict[str, threading.BoundedSemaphore] = {}
+        self._stats: Dict[str, HostStats] = {}
+
+    def _host_state(self, url: str) -> Tuple[str, requests.Session, threading.BoundedSemaphore, HostStats]:
+        parts = urlsplit(url)
+        host = f"{parts.scheme}://{parts.netloc}"
+        with self._lock:
+            session = self._sessions.get(host)
+            if session is None:
+                session = requests.Session()
+                # Pool as many connections as requests may be in flight to the host, so every slot can reuse one
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.max_per_host, max_retries=0)
+                session.mount(f"{parts.scheme}://", adapter)
+                self._sessions[host] = session
+                self._slots[host] = threading.BoundedSemaphore(self.max_per_host)
+                self._stats[host] = HostStats()
+            return host, session, self._slots[host], self._stats[host]
+
+    def request(self, method: str, url: str, params: Optional[Dict[str, Any]] = None, headers: Optional[Dict[str, str]] = None, timeout: Optional[Any] = None, max_retries: Optional[int] = None, rate_limiter: Optional[TokenBucket] = None, **kwargs) -> requests.Response:
+        """
+        Sends a request and returns the final response; a retryable status that persists past max_retries is
+        returned as is (callers keep using raise_for_status). Connection errors and timeouts are raised once
+        retries run out. If given, rate_limiter is acquired before every attempt and paused on a 429.
+        """
+        host, session, slots, stats = self._host_state(url)
+        max_retries = self.max_retries if max_retries is None else max_retries
+        for attempt in range(max_retries + 1):
+            if rate_limiter is not None:
+                rate_limiter.acquire()
+            started = time.perf_counter()
+            try:
+                with slots:
+                    response = session.request(method, url, params=params, headers=headers, timeout=timeout or self.timeout, **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                with self._lock:
+                    stats.requests += 1
+                    stats.errors += 1
+                if attempt == max_retries:
+                    raise
+                delay = backoff_delay(attempt)
+                print(f"Request to {host} failed ({e}); retry {attempt + 1}/{max_retries} in {delay:.1f}s")
+            else:
+                with self._lock:
+                    stats.requests += 1
+                    stats.responses += 1
+                    stats.latencies_ms.append((time.perf_counter() - started) * 1000)
+                    if response.status_code >= 400:
+                        stats.errors += 1
+                if response.status_code not in RETRY_STATUS_CODES or attempt == max_retries:
+                    return response
+                retry_after = retry_after_seconds(response)
+                delay = min(retry_after, MAX_RETRY_AFTER_SEC) if retry_after is not None else backoff_delay(attempt)
+                if response.status_code == 429 and rate_limiter is not None:
+                    rate_limiter.pause(max(1.0, delay))
+                print(f"{host} returned {response.status_code}; retry {attempt + 1}/{max_retries} in {delay:.1f}s")
+                response.close()
+            with self._lock:
+                stats.retries += 1
+            time.sleep(delay)
+
+    def get(self, url: str, params: Optional[Dict[str, Any]] = None, headers: Optional[Dict[str, str]] = None, cache_type: Optional[str] = None, cacheable: Optional[Callable[[requests.Response], bool]] = None, **kwargs) -> requests.Response:
+        """
+        With a cache_type and the shared response cache enabled, a fresh cached response is returned without a
+        request, and a stale one is revalidated with If-None-Match/If-Modified-Since. Only 200 responses for
+        which cacheable(response) holds (default: all) are stored.
+        """
+        cache = get_response_cache() if cache_type else None
+        if cache is None:
+            return self.request("GET", url, params=params, headers=headers, **kwargs)
+        key = request_cache_key(url, params)
+        entry = cache.lookup(key)
+        if entry is not None and entry["fresh"]:
+            cache.record("hits")
+            return cached_response(url, entry)
+        request_headers = dict(headers or {})
+        if entry is not None:
+            if entry["etag"]:
+                request_headers["If-None-Match"] = entry["etag"]
+            if entry["last_modified"]:
+                request_headers["If-Modified-Since"] = entry["last_modified"]
+        response = self.request("GET", url, params=params, headers=request_headers, **kwargs)
+        if response.status_code == 304 and entry is not None:
+            cache.record("revalidated")
+            cache.refresh(key, cache_type)
+            return cached_response(url, entry)
+        cache.record("misses")
+        if response.status_code == 200 and (cacheable is None or cacheable(response)):
+            cache.store(key, cache_type, url, response.content, {name: response.headers[name] for name in CACHED_HEADERS if name in response.headers},
+                        response.headers.get("ETag"), response.headers.get("Last-Modified"))
+        return response
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Per-host request, retry and error counts, connections opened vs reused, and latency percentiles."""
+        report = {}
+        with self._lock:
+            hosts = list(self._stats.items())
+        for host, stats in hosts:
+            pools = self._sessions[host].get_adapter(host).poolmanager.pools
+            connections_opened = sum(pool.num_connections for pool in (pools.get(key) for key in pools.keys()) if pool is not None)
+            with self._lock:
+                latencies = sorted(stats.latencies_ms)
+                report[host] = {
+                    "requests": stats.requests,
+                    "retries": stats.retries,
+                    "errors": stats.errors,
+                    "connections_opened": connections_opened,
+                    "connection_reuse_rate": max(0.0, 1 - connections_opened / stats.responses) if stats.responses else 0.0,
+                    "p50_ms": latencies[len(latencies) // 2] if latencies else 0.0,
+                    "p95_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] if latencies else 0.0
+                }
+        return report
+
+    def print_stats(self) -> None:
+        for host, host_stats in self.stats().items():
+            print(f"HTTP {host}: {host_stats['requests']} requests, {host_stats['connections_opened']} connections opened "
+                  f"({host_stats['connection_reuse_rate']:.0%} reuse), {host_stats['retries']} retries, {host_stats['errors']} errors, "
+                  f"p50 {host_stats['p50_ms']:.0f}ms, p95 {host_stats['p95_ms']:.0f}ms")
+
+    def close(self) -> None:
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+
+# Process-wide client shared by every collector
+_default_client: Optional[HttpClient] = None
+_default_client_lock = threading.Lock()
+
+def get_http_client() -> HttpClient:
+    global _default_client
+    if _default_client is None:
+        with _default_client_lock:
+            if _default_client is None:
+                _default_client = HttpClient()
+    return _default_client
+
+def configure_http_client(connect_timeout: float = DEFAULT_CONNECT_TIMEOUT, read_timeout: float = DEFAULT_READ_TIMEOUT, max_retries: int = DEFAULT_MAX_RETRIES, max_per_host: int = DEFAULT_MAX_PER_HOST) -> HttpClient:
+    """Replaces the shared client, e.g. with timeouts or a per-host cap from the command line."""
+    global _default_client
+    with _default_client_lock:
+        if _default_client is not None:
+            _default_client.close()
+        _default_client = HttpClient(connect_timeout, read_timeout, max_retries, max_per_host)
+    return _default_client
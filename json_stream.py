@@ -0,0 +1,330 @@
+#!/usr/bin/env python3.11
+import io
+import sys
+import json
+import itertools
+from array import array
+from typing import Dict, Any, Iterator, Iterable, Optional, IO
+
+try:
+    import ijson # Optional: used to stream arrays nested inside a top-level object
+except ImportError:
+    ijson = None
+
+CHUNK_SIZE = 1 << 16
+NDJSON_EXTENSIONS = (".ndjson", ".jsonl")
+# Compact encoding used for NDJSON lines: no indentation and no spaces after separators
+COMPACT_SEPARATORS = (",", ":")
+# Characters that can extend a number cut off at a chunk boundary (never valid right after a complete value)
+NUMBER_CONTINUATION_CHARS = "0123456789+-.eE"
+
+# The real stdout, once a stage writes its records to '-' (see reserve_stdout_for_records)
+_record_stdout: Optional[IO[str]] = None
+
+class NotARecordStreamError(ValueError):
+    """Raised when a file holds a single JSON document (e.g. an API error object) instead of records."""
+
+def is_ndjson_path(path: str) -> bool:
+    return path.lower().endswith(NDJSON_EXTENSIONS)
+
+def is_ndjson_output(path: str) -> bool:
+    """Outputs named *.ndjson / *.jsonl, or '-' (stdout, for piping into the next stage), are written as NDJSON."""
+    return path == "-" or is_ndjson_path(path)
+
+def reserve_stdout_for_records(*paths: Optional[str]) -> None:
+    """
+    When any output path is '-', records are written to stdout; progress print()s are then routed
+    to stderr so they never interleave with the records read by the next stage of a pipe.
+    """
+    global _record_stdout
+    if "-" in paths and _record_stdout is None:
+        _record_stdout = sys.stdout
+        sys.stdout = sys.stderr
+
+def iter_json_array_items(f: IO[str], chunk_size: int = CHUNK_SIZE) -> Iterator[Any]:
+    """
+    Yields the items of a top-level JSON array one at a time, reading the file in chunks.
+    Only the current item and one chunk are held in memory, regardless of file size or indentation.
+    """
+    decoder = json.JSONDecoder()
+    buffer = ""
+    pos = 0
+    eof = False
+
+    def read_more() -> None:
+        nonlocal buffer, eof
+        chunk = f.read(chunk_size)
+        if chunk:
+            buffer += chunk
+        else:
+            eof = True
+
+    def skip_whitespace(start: int) -> int:
+        while True:
+            while start < len(buffer) and buffer[start] in " \t\r\n":
+                start += 1
+            if start < len(buffer):
+                return start
+            if eof:
+                raise json.JSONDecodeError("Unexpected end of data", buffer, start)
+            read_more()
+
+    pos = skip_whitespace(pos)
+    if buffer[pos] != "[":
+        raise NotARecordStreamError("Top-level JSON value is not an array")
+    pos += 1
+    first = True
+    while True:
+        pos = skip_whitespace(pos)
+        if buffer[pos] == "]":
+            return
+        if not first:
+            if buffer[pos] != ",":
+                raise json.JSONDecodeError("Expecting ',' delimiter", buffer, pos)
+            pos = skip_whitespace(pos + 1)
+        while True:
+            try:
+                value, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                read_more() # The item continues in the next chunk
+                continue
+            if not eof and (end == len(buffer) or buffer[end] in NUMBER_CONTINUATION_CHARS):
+                # A number may continue in the next chunk ("1." + "5e10" decodes as 1 until both are read)
+                read_more()
+                continue
+            break
+        yield value
+        first = False
+        pos = end
+        if pos >= chunk_size:
+            # Drop the consumed prefix so the buffer stays around one chunk
+            buffer = buffer[pos:]
+            pos = 0
+
+def iter_ndjson_records(f: IO[str]) -> Iterator[Any]:
+    """Yields one decoded record per non-empty line of a newline-delimited JSON stream."""
+    for line_number, line in enumerate(f, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except json.JSONDecodeError as e:
+            raise json.JSONDecodeError(f"Line {line_number}: {e.msg}", e.doc, e.pos)
+
+def iter_json_records(path: str) -> Iterator[Any]:
+    """
+    Streams records from a JSON array file or an NDJSON file ('-' reads stdin).
+    NDJSON is recognized by extension, or by a first line that is a complete JSON value.
+    Raises NotARecordStreamError if the file holds a single multi-line JSON document.
+    """
+    f = sys.stdin if path == "-" else open(path, "r", encoding="utf-8")
+    try:
+        if path != "-" and is_ndjson_path(path):
+            yield from iter_ndjson_records(f)
+            return
+        # stdin is peeked a line at a time, so the first record of a pipe is handled without waiting for more input
+        read_head = f.readline if path == "-" else (lambda: f.read(CHUNK_SIZE))
+        head = read_head()
+        while head and not head.strip():
+            head = read_head()
+        reader = _PrefixedReader(head, f)
+        first_char = head.lstrip()[:1]
+        if first_char == "[":
+            yield from iter_json_array_items(reader)
+            return
+        if not first_char:
+            raise json.JSONDecodeError("Expecting value", head, 0)
+        first_line = reader.readline()
+        while not first_line.strip():
+            first_line = reader.readline()
+        try:
+            first_record = json.loads(first_line)
+        except json.JSONDecodeError:
+            raise NotARecordStreamError("File holds a single JSON document, not a list of records")
+        yield first_record
+        yield from iter_ndjson_records(reader)
+    finally:
+        if f is not sys.stdin:
+            f.close()
+
+class _PrefixedReader:
+    """Minimal text reader that replays an already-read head before the rest of the file."""
+    def __init__(self, head: str, f: IO[str]):
+        self.head = head
+        self.f = f
+
+    def read(self, size: int = -1) -> str:
+        if self.head:
+            head, self.head = self.head, ""
+            return head
+        return self.f.read(size)
+
+    def readline(self) -> str:
+        if not self.head:
+            return self.f.readline()
+        line, newline, rest = self.head.partition("\n")
+        if newline:
+            self.head = rest
+            return line + newline
+        self.head = ""
+        return line + self.f.readline()
+
+    def __iter__(self) -> Iterator[str]:
+        while True:
+            line = self.readline()
+            if not line:
+                return
+            yield line
+
+def open_record_stream(path: str) -> Iterator[Any]:
+    """
+    Like iter_json_records, but opens the input eagerly: a missing file, a decode error at the start
+    or a single non-record document raises here, before the caller creates its output.
+    """
+    records = iter_json_records(path)
+    for first_record in records:
+        return itertools.chain([first_record], records)
+    return iter(())
+
+def load_json(path: str) -> Any:
+    """
+    Loads a whole JSON document ('-' reads stdin). NDJSON input, recognized by extension or by
+    failing to parse as a single document, is returned as a list of records.
+    """
+    if path == "-":
+        text = sys.stdin.read()
+    else:
+        with open(path, "r", encoding="utf-8") as f:
+            if is_ndjson_path(path):
+                return list(iter_ndjson_records(f))
+            text = f.read()
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError:
+        if "\n" not in text.strip():
+            raise
+        return list(iter_ndjson_records(io.StringIO(text)))
+
+def iter_nested_array_items(path: str, key: str) -> Iterator[Any]:
+    """
+    Streams the items of the array stored under `key` in a top-level JSON object.
+    Uses ijson when installed; otherwise falls back to loading the document.
+    """
+    if ijson is not None:
+        with open(path, "rb") as f:
+            yield from ijson.items(f, f"{key}.item", use_float=True)
+        return
+    with open(path, "r", encoding="utf-8") as f:
+        document = json.load(f)
+    yield from (document.get(key) or []) if isinstance(document, dict) else []
+
+def records_to_columns(records: Iterable[Dict[str, Any]], schema: Dict[str, str]) -> Dict[str, Any]:
+    """
+    Streams records into typed column buffers ("int" -> int64, "float" -> float64, "str" -> interned strings),
+    keeping only the schema's fields. Missing or unparsable numbers become NaN (ints fall back to float).
+    """
+    buffers: Dict[str, Any] = {}
+    for column, column_type in schema.items():
+        buffers[column] = array("q") if column_type == "int" else array("d") if column_type == "float" else []
+    for record in records:
+        if not isinstance(record, dict):
+            continue
+        for column, column_type in schema.items():
+            value = record.get(column)
+            buffer = buffers[column]
+            if column_type == "str":
+                buffer.append(sys.intern(value) if isinstance(value, str) else value)
+                continue
+            if buffer.typecode == "q":
+                try:
+                    buffer.append(int(value))
+                    continue
+                except (TypeError, ValueError, OverflowError):
+                    # Switch the column to float64 so NaN / fractional / out-of-range values fit
+                    buffer = buffers[column] = array("d", buffer)
+            try:
+                buffer.append(float(value))
+            except (TypeError, ValueError):
+                buffer.append(float("nan"))
+
+    import numpy as np # Deferred so stages that only stream records never load numpy
+    columns = {}
+    for column, buffer in buffers.items():
+        if isinstance(buffer, array):
+            columns[column] = np.frombuffer(buffer, dtype=np.int64 if buffer.typecode == "q" else np.float64)
+        else:
+            columns[column] = buffer
+    return columns
+
+def _open_output(path: str) -> IO[str]:
+    if path == "-":
+        return _StdoutHandle(_record_stdout or sys.stdout)
+    return open(path, "w", encoding="utf-8")
+
+class _StdoutHandle:
+    """Context manager around stdout that flushes instead of closing it."""
+    def __init__(self, stream: IO[str]):
+        self.stream = stream
+
+    def __enter__(self) -> IO[str]:
+        return self.stream
+
+    def __exit__(self, *exc_info) -> None:
+        self.stream.flush()
+
+def write_json_array(path: str, records: Iterable[Any], indent: Optional[int] = 4) -> int:
+    """
+    Writes records as a JSON array one item at a time, formatted like json.dump(list, indent=indent).
+    Returns the number of records written.
+    """
+    count = 0
+    with _open_output(path) as f:
+        for record in records:
+            encoded = json.dumps(record, ensure_ascii=False, indent=indent)
+            if indent is None:
+                f.write(("[" if count == 0 else ", ") + encoded)
+            else:
+                padding = " " * indent
+                f.write(("[\n" if count == 0 else ",\n") + padding + encoded.replace("\n", "\n" + padding))
+            count += 1
+        if count == 0:
+            f.write("[]")
+        else:
+            f.write("]" if indent is None else "\n]")
+    return count
+
+def write_ndjson(path: str, records: Iterable[Any], default: Optional[Any] = None) -> int:
+    """
+    Writes one compact JSON record per line. Lines are flushed as they are written when streaming
+    to stdout, so a downstream stage can start on the first record immediately.
+    Returns the number of records written.
+    """
+    count = 0
+    with _open_output(path) as f:
+        line_buffered = path == "-"
+        for record in records:
+            f.write(json.dumps(record, ensure_ascii=False, separators=COMPACT_SEPARATORS, default=default) + "\n")
+            if line_buffered:
+                f.flush()
+            count += 1
+    return count
+
+def write_records(path: str, records: Iterable[Any]) -> int:
+    """Writes a record stream as NDJSON or as an indented JSON array, depending on the output path."""
+    if is_ndjson_output(path):
+        return write_ndjson(path, records)
+    return write_json_array(path, records)
+
+def save_json(path: str, data: Any, default: Optional[Any] = None) -> None:
+    """
+    Saves a stage's output document. For NDJSON outputs a list is written one record per line and any
+    other document (a report or an error object) as a single compact line; otherwise indented JSON.
+    """
+    if is_ndjson_output(path):
+        write_ndjson(path, data if isinstance(data, list) else [data], default=default)
+        return
+    with _open_output(path) as f:
+        json.dump(data, f, ensure_ascii=False, indent=4, default=default)
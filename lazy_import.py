@@ -0,0 +1,23 @@
+#!/usr/bin/env python3.11
+import sys
+import importlib.util
+from types import ModuleType
+
+def lazy_module(name: str) -> ModuleType:
+    """
+    Returns a module whose import is deferred until one of its attributes is first used,
+    so CLI tools can bind heavy dependencies (pandas, numpy) at module level without paying
+    their import time on --help, argument errors or code paths that never touch them.
+    """
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        raise ModuleNotFoundError(f"No module named '{name}'", name=name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
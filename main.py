@@ -1,34 +1,171 @@
 import sys
 import os
+import gzip
+import hashlib
+from datetime import datetime, timezone
+from typing import Dict, Optional
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from flask import Flask, jsonify, request
+from flask import Flask, Response, jsonify, request
 from flask_cors import CORS
-import pandas as pd
-import numpy as np # Import numpy for np.nan
+from score_store import ScoreStore
+
+try:
+    import brotli # Optional: enables "br" content-coding when installed
+except ImportError:
+    brotli = None
 
 app = Flask(__name__)
 CORS(app, resources={r"/api/*": {"origins": "http://localhost:5173"}})
 
-SOURCE_DATA_FILE_PATH = "/home/ubuntu/meme_coin_pattern_recognition_platform/engineered_features/integrated_scores.csv"
+# Typed columnar store; convert a legacy CSV with `python columnar_store.py -i integrated_scores.csv -o integrated_scores.parquet`
+SOURCE_DATA_FILE_PATH = "/home/ubuntu/meme_coin_pattern_recognition_platform/engineered_features/integrated_scores.parquet"
+# Served while the Parquet file has not been generated yet, so existing deployments keep working
+LEGACY_SOURCE_DATA_FILE_PATH = "/home/ubuntu/meme_coin_pattern_recognition_platform/engineered_features/integrated_scores.csv"
+
+# Parsed once per process and reloaded only when the source file changes
+SCORE_STORE = ScoreStore(SOURCE_DATA_FILE_PATH, LEGACY_SOURCE_DATA_FILE_PATH)
+
+SCORES_QUERY_PARAMS = {"offset", "limit", "sort", "order", "fields"}
+MAX_PAGE_SIZE = 1000
+MIN_COMPRESS_BYTES = 1024 # Smaller bodies are not worth the compression overhead
+SUPPORTED_ENCODINGS = ["br", "gzip"] if brotli is not None else ["gzip"]
+
+def compress_body(body: bytes, encoding: str) -> bytes:
+    """Compresses a response body with the given content-coding."""
+    if encoding == "br":
+        return brotli.compress(body, quality=5)
+    return gzip.compress(body, compresslevel=6)
+
+def not_modified_response(etag: str, last_modified: Optional[float]) -> Optional[Response]:
+    """
+    Returns a 304 response if the client's validators match the current representation, otherwise None.
+    Checked before any query or serialization work is done.
+    """
+    if request.if_none_match:
+        # Compressed variants carry an encoding suffix, so accept any of them
+        candidate_etags = [etag] + [f"{etag}-{encoding}" for encoding in SUPPORTED_ENCODINGS]
+        if not any(request.if_none_match.contains(candidate) for candidate in candidate_etags):
+            return None
+    elif request.if_modified_since is None or last_modified is None:
+        return None
+    elif request.if_modified_since < datetime.fromtimestamp(int(last_modified), tz=timezone.utc):
+        return None
+
+    response = Response(status=304)
+    response.set_etag(etag)
+    if last_modified is not None:
+        response.last_modified = datetime.fromtimestamp(last_modified, tz=timezone.utc)
+    response.headers["Cache-Control"] = "no-cache"
+    response.vary.add("Accept-Encoding")
+    return response
+
+def json_body_response(body: bytes, etag: str, last_modified: Optional[float], encoded_cache: Optional[Dict[str, bytes]] = None) -> Response:
+    """
+    Builds a 200 JSON response with validators, compressing the body if the client accepts it.
+    encoded_cache, when given, memoizes compressed bodies across requests for the same data version.
+    """
+    encoding = request.accept_encodings.best_match(SUPPORTED_ENCODINGS) if len(body) >= MIN_COMPRESS_BYTES else None
+    if encoding:
+        if encoded_cache is not None and encoding in encoded_cache:
+            encoded_body = encoded_cache[encoding]
+        else:
+            encoded_body = compress_body(body, encoding)
+            if encoded_cache is not None:
+                encoded_cache[encoding] = encoded_body
+        response = Response(encoded_body, status=200, mimetype="application/json")
+        response.headers["Content-Encoding"] = encoding
+        response.set_etag(f"{etag}-{encoding}")
+    else:
+        response = Response(body, status=200, mimetype="application/json")
+        response.set_etag(etag)
+
+    if last_modified is not None:
+        response.last_modified = datetime.fromtimestamp(last_modified, tz=timezone.utc)
+    # Clients may cache, but must revalidate with the ETag on every use
+    response.headers["Cache-Control"] = "no-cache"
+    response.vary.add("Accept-Encoding")
+    return response
+
+def request_etag(snapshot, *parts: str) -> str:
+    """Derives a strong ETag from the data version and whatever else selects the representation."""
+    if not parts:
+        return snapshot.version
+    digest = hashlib.sha1("\x00".join(parts).encode("utf-8")).hexdigest()[:16]
+    return f"{snapshot.version}-{digest}"
+
+def parse_scores_query(args) -> dict:
+    """
+    Translates /scores query parameters into ScoreSnapshot.query keyword arguments.
+    Supports offset/limit paging, sort=<column> (prefix with '-' or pass order=desc for descending),
+    min_<score column>/max_<score column> range filters and a comma-separated fields= projection.
+    """
+    query_kwargs = {"offset": 0, "ranges": {}}
+    if "offset" in args:
+        offset = args.get("offset", type=int)
+        if offset is None:
+            raise ValueError("offset must be an integer")
+        query_kwargs["offset"] = offset
+    if "limit" in args:
+        limit = args.get("limit", type=int)
+        if limit is None:
+            raise ValueError("limit must be an integer")
+        query_kwargs["limit"] = min(limit, MAX_PAGE_SIZE)
+
+    sort_column = args.get("sort")
+    if sort_column:
+        descending = args.get("order", "asc").lower() == "desc"
+        if sort_column.startswith("-"):
+            sort_column, descending = sort_column[1:], True
+        query_kwargs["sort_column"] = sort_column
+        query_kwargs["descending"] = descending
+
+    if args.get("fields"):
+        query_kwargs["fields"] = [field.strip() for field in args["fields"].split(",") if field.strip()]
+
+    for param_name, value in args.items():
+        if param_name.startswith("min_") or param_name.startswith("max_"):
+            column = param_name[4:]
+            try:
+                bound = float(value)
+            except ValueError:
+                raise ValueError(f"{param_name} must be a number")
+            lower, upper = query_kwargs["ranges"].get(column, (None, None))
+            query_kwargs["ranges"][column] = (bound, upper) if param_name.startswith("min_") else (lower, bound)
+        elif param_name not in SCORES_QUERY_PARAMS:
+            raise ValueError(f"Unknown query parameter: {param_name}")
+    return query_kwargs
 
 @app.route("/api/v1/scores", methods=["GET"])
 def get_scores():
-    """Endpoint to retrieve all integrated scores."""
+    """
+    Endpoint to retrieve integrated scores.
+    Without query parameters, all records are returned; otherwise the result is paged, filtered,
+    sorted and projected server-side.
+    """
     try:
-        if not os.path.exists(SOURCE_DATA_FILE_PATH):
+        snapshot = SCORE_STORE.get_snapshot()
+        if snapshot is None:
             return jsonify({"error": "Source data file not found"}), 404
 
-        df = pd.read_csv(SOURCE_DATA_FILE_PATH)
-        if df.empty:
-            return jsonify({"scores": []}), 200 
-            
-        df = df.replace({pd.NA: None, np.nan: None})
-        scores = df.to_dict(orient="records")
-        return jsonify({"scores": scores}), 200
-    except pd.errors.EmptyDataError:
-        return jsonify({"scores": []}), 200
+        if not request.args:
+            etag = request_etag(snapshot)
+            not_modified = not_modified_response(etag, snapshot.last_modified)
+            if not_modified is not None:
+                return not_modified
+            # The full list is serialized (and compressed) once per data version, not once per request
+            return json_body_response(snapshot.scores_json, etag, snapshot.last_modified, snapshot.encoded_scores_json)
+
+        etag = request_etag(snapshot, request.query_string.decode("utf-8"))
+        not_modified = not_modified_response(etag, snapshot.last_modified)
+        if not_modified is not None:
+            return not_modified
+        try:
+            page = snapshot.query(**parse_scores_query(request.args))
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        return json_body_response(app.json.dumps(page).encode("utf-8"), etag, snapshot.last_modified)
     except Exception as e:
         print(f"An error occurred while fetching all scores: {e}")
         return jsonify({"error": str(e)}), 500
@@ -37,34 +174,24 @@ def get_scores():
 def get_score_by_identifier(identifier):
     """Endpoint to retrieve a specific score by user_screen_name or tweet_id."""
     try:
-        if not os.path.exists(SOURCE_DATA_FILE_PATH):
+        snapshot = SCORE_STORE.get_snapshot()
+        if snapshot is None:
             return jsonify({"error": "Source data file not found"}), 404
 
-        df = pd.read_csv(SOURCE_DATA_FILE_PATH)
-        if df.empty:
+        if not snapshot.records:
             return jsonify({"error": "No data available"}), 404
 
-        df = df.replace({pd.NA: None, np.nan: None})
-        
-        # Try to find by user_screen_name first
-        coin_data = df[df["user_screen_name"] == identifier]
-        
-        if coin_data.empty: # Corrected: .empty is a property, not a method
-            # If not found by user_screen_name, try by tweet_id (converting identifier to float if it's a numeric string)
-            try:
-                tweet_id_identifier = float(identifier)
-                coin_data = df[df["tweet_id"] == tweet_id_identifier]
-            except ValueError:
-                # If identifier cannot be converted to float, it's not a valid tweet_id format we expect
-                pass # coin_data remains empty
-
-        if coin_data.empty: # Corrected: .empty is a property, not a method
+        # O(1) lookup by user_screen_name first, then by tweet_id; resolved before the validators so an unknown identifier is a 404, not a 304
+        coin_data = snapshot.find(identifier)
+        if coin_data is None:
             return jsonify({"error": "Coin not found"}), 404
-        
-        # Assuming identifier is unique or we take the first match
-        return jsonify(coin_data.iloc[0].to_dict()), 200
-    except pd.errors.EmptyDataError:
-        return jsonify({"error": "No data available"}), 404 # Should be caught by df.empty earlier
+
+        etag = request_etag(snapshot, identifier)
+        not_modified = not_modified_response(etag, snapshot.last_modified)
+        if not_modified is not None:
+            return not_modified
+
+        return json_body_response(app.json.dumps(coin_data).encode("utf-8"), etag, snapshot.last_modified)
     except Exception as e:
         print(f"An error occurred while fetching score for {identifier}: {e}")
         return jsonify({"error": str(e)}), 500
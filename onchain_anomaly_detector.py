@@ -1,35 +1,97 @@
 #!/usr/bin/env python3.11
+from __future__ import annotations # Annotations mention pd/np types without importing them
+
+import os
+import math
 import json
+import time
 import argparse
-import pandas as pd
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from datetime import datetime, timedelta
-from typing import List, Dict, Any, Optional
-import numpy as np
+from typing import List, Dict, Any, Optional, Union, Iterator
+from lazy_import import lazy_module
+from json_stream import iter_json_records, records_to_columns, save_json, reserve_stdout_for_records, NotARecordStreamError
+
+# Imported on first use, so --help and argument errors return without loading them
+pd = lazy_module("pandas")
+np = lazy_module("numpy")
+
+# Only these transaction fields are kept at ingest, each in a typed column buffer
+TRANSACTION_COLUMNS = {
+    "timeStamp": "int",
+    "from": "str",
+    "to": "str",
+    "value": "float",
+    "gasPrice": "float",
+    "gasUsed": "float",
+    "hash": "str"
+}
 
-def calculate_windowed_features(all_transactions: List[Dict[str, Any]], target_address: str, window_hours: int = 24, step_hours: int = 1, period_start_time: Optional[datetime] = None, period_end_time: Optional[datetime] = None) -> pd.DataFrame:
+def normalize_address_column(addresses: pd.Series) -> pd.Series:
     """
-    Calculates features for rolling time windows from a list of transactions for a specific address
-    within a given period_start_time and period_end_time.
+    Lower-cases an address column into a categorical, doing the string work once per distinct
+    address instead of once per row.
     """
-    if not all_transactions:
-        return pd.DataFrame()
+    codes, uniques = pd.factorize(addresses)
+    lowered_codes, lowered_uniques = pd.factorize(pd.Index(uniques).astype(str).str.lower())
+    normalized_codes = np.full(len(codes), -1, dtype=np.int64)
+    present = codes >= 0
+    normalized_codes[present] = lowered_codes[codes[present]]
+    return pd.Series(pd.Categorical.from_codes(normalized_codes, categories=lowered_uniques), index=addresses.index)
 
+def load_transaction_columns(input_file: str) -> Dict[str, Any]:
+    """
+    Streams a JSON array (or NDJSON) transaction file into typed column buffers without materializing
+    per-transaction dicts. Raises NotARecordStreamError if the file holds a single object (e.g. an API error).
+    Records without a timeStamp (e.g. an error object written as an NDJSON line) are skipped.
+    """
+    transactions = (tx for tx in iter_json_records(input_file) if isinstance(tx, dict) and "timeStamp" in tx)
+    return records_to_columns(transactions, TRANSACTION_COLUMNS)
+
+def prepare_transactions_frame(all_transactions: Union[List[Dict[str, Any]], Dict[str, Any]], target_address: str) -> pd.DataFrame:
+    """
+    Builds the typed, time-sorted transaction frame used for feature calculation: parses numeric fields,
+    normalizes the from/to addresses once and classifies each transaction's direction with array comparisons.
+    all_transactions is a list of transaction dicts or the column buffers from load_transaction_columns.
+    """
     df_all = pd.DataFrame(all_transactions)
-    df_all["datetime"] = pd.to_datetime(df_all["timeStamp"], unit="s")
+    if df_all.empty:
+        return df_all
+    df_all["datetime"] = pd.to_datetime(pd.to_numeric(df_all["timeStamp"]), unit="s")
     df_all.sort_values(by="datetime", inplace=True)
     df_all["value_eth"] = df_all["value"].astype(float) / (10**18)
     df_all["gasPrice_gwei"] = df_all["gasPrice"].astype(float) / (10**9)
     df_all["gasUsed"] = df_all["gasUsed"].astype(float)
-    df_all["gas_fee_eth"] = (df_all["gasPrice"].astype(float) * df_all["gasUsed"].astype(float)) / (10**18)
+    df_all["gas_fee_eth"] = (df_all["gasPrice"].astype(float) * df_all["gasUsed"]) / (10**18)
+
+    df_all["from"] = normalize_address_column(df_all["from"])
+    df_all["to"] = normalize_address_column(df_all["to"])
 
     target_address_lower = target_address.lower()
-    df_all["transaction_type"] = df_all.apply(
-        lambda row: "incoming" if row["to"].lower() == target_address_lower 
-        else ("outgoing" if row["from"].lower() == target_address_lower 
-              else "internal_or_unrelated"), axis=1
+    is_incoming = (df_all["to"] == target_address_lower).to_numpy()
+    is_outgoing = ~is_incoming & (df_all["from"] == target_address_lower).to_numpy()
+    df_all["transaction_type"] = pd.Categorical(
+        np.select([is_incoming, is_outgoing], ["incoming", "outgoing"], default="internal_or_unrelated"),
+        categories=["incoming", "outgoing", "internal_or_unrelated"]
     )
-    
-    df_address_related = df_all[(df_all["to"].str.lower() == target_address_lower) | (df_all["from"].str.lower() == target_address_lower)].copy()
+    return df_all
+
+def calculate_windowed_features(all_transactions: Union[List[Dict[str, Any]], pd.DataFrame], target_address: str, window_hours: int = 24, step_hours: int = 1, period_start_time: Optional[datetime] = None, period_end_time: Optional[datetime] = None) -> pd.DataFrame:
+    """
+    Calculates features for rolling time windows from a list of transactions for a specific address
+    within a given period_start_time and period_end_time.
+    all_transactions may also be a frame from prepare_transactions_frame, so several periods can share one ingest.
+    """
+    if isinstance(all_transactions, pd.DataFrame):
+        df_all = all_transactions
+    elif not all_transactions:
+        return pd.DataFrame()
+    else:
+        df_all = prepare_transactions_frame(all_transactions, target_address)
+    if df_all.empty:
+        return pd.DataFrame()
+
+    df_address_related = df_all[df_all["transaction_type"] != "internal_or_unrelated"]
 
     if df_address_related.empty:
         return pd.DataFrame()
@@ -45,183 +107,337 @@ def calculate_windowed_features(all_transactions: List[Dict[str, Any]], target_a
 
     window_duration = timedelta(hours=window_hours)
     step_duration = timedelta(hours=step_hours)
-    
-    min_time_in_period = df_address_related["datetime"].min()
-    max_time_in_period = df_address_related["datetime"].max()
-    
-    windowed_features_list = []
-    
-    current_window_start_time = min_time_in_period
-    while current_window_start_time <= max_time_in_period:
-        current_window_end_time = current_window_start_time + window_duration
-        
-        window_df = df_address_related[
-            (df_address_related["datetime"] >= current_window_start_time) & 
-            (df_address_related["datetime"] < current_window_end_time)
-        ]
-        
-        # Always create a feature row, even if empty, to represent the window
-        features = {"window_start": current_window_start_time, "window_end": current_window_end_time}
-        features["address"] = target_address
-        
-        if not window_df.empty:
-            features["total_transactions_in_window"] = len(window_df)
-            incoming_tx = window_df[window_df["transaction_type"] == "incoming"]
-            outgoing_tx = window_df[window_df["transaction_type"] == "outgoing"]
-
-            features["incoming_tx_count"] = len(incoming_tx)
-            features["outgoing_tx_count"] = len(outgoing_tx)
-            features["total_eth_volume_in"] = incoming_tx["value_eth"].sum()
-            features["total_eth_volume_out"] = outgoing_tx["value_eth"].sum()
-            features["avg_eth_tx_value_in"] = incoming_tx["value_eth"].mean() if not incoming_tx.empty else 0
-            features["avg_eth_tx_value_out"] = outgoing_tx["value_eth"].mean() if not outgoing_tx.empty else 0
-            features["max_eth_tx_value_in"] = incoming_tx["value_eth"].max() if not incoming_tx.empty else 0
-            features["max_eth_tx_value_out"] = outgoing_tx["value_eth"].max() if not outgoing_tx.empty else 0
-            features["unique_counterparties_in"] = incoming_tx["from"].nunique()
-            features["unique_counterparties_out"] = outgoing_tx["to"].nunique()
-            features["total_gas_fee_eth_spent_by_address"] = outgoing_tx["gas_fee_eth"].sum()
-            features["avg_gas_fee_eth_spent_by_address"] = outgoing_tx["gas_fee_eth"].mean() if not outgoing_tx.empty else 0
-
-            if len(window_df) > 1:
-                time_diffs_sec = window_df["datetime"].diff().dt.total_seconds().dropna()
-                features["avg_time_between_tx_sec"] = time_diffs_sec.mean() if not time_diffs_sec.empty else 0
-                features["std_time_between_tx_sec"] = time_diffs_sec.std() if not time_diffs_sec.empty else 0
-            else:
-                features["avg_time_between_tx_sec"] = 0
-                features["std_time_between_tx_sec"] = 0
-            features["incoming_to_outgoing_volume_ratio"] = features["total_eth_volume_in"] / (features["total_eth_volume_out"] + 1e-9)
-            features["incoming_to_outgoing_count_ratio"] = features["incoming_tx_count"] / (features["outgoing_tx_count"] + 1e-9)
-        else: # Fill with zeros if window is empty
-            feature_keys = ["total_transactions_in_window", "incoming_tx_count", "outgoing_tx_count", 
-                            "total_eth_volume_in", "total_eth_volume_out", "avg_eth_tx_value_in", 
-                            "avg_eth_tx_value_out", "max_eth_tx_value_in", "max_eth_tx_value_out", 
-                            "unique_counterparties_in", "unique_counterparties_out", 
-                            "total_gas_fee_eth_spent_by_address", "avg_gas_fee_eth_spent_by_address",
-                            "avg_time_between_tx_sec", "std_time_between_tx_sec",
-                            "incoming_to_outgoing_volume_ratio", "incoming_to_outgoing_count_ratio"]
-            for key in feature_keys:
-                features[key] = 0
-        
-        windowed_features_list.append(features)
-        
-        if current_window_start_time + step_duration > max_time_in_period and current_window_start_time < max_time_in_period:
-             if current_window_end_time >= max_time_in_period:
-                 break
-             current_window_start_time = max_time_in_period - window_duration + timedelta(seconds=1) 
-             if current_window_start_time < min_time_in_period: current_window_start_time = min_time_in_period
-        elif current_window_start_time + step_duration > max_time_in_period:
-            break 
+
+    return compute_window_features(df_address_related, target_address, window_duration, step_duration)
+
+def window_start_times(min_time_ns: int, max_time_ns: int, window_ns: int, step_ns: int) -> np.ndarray:
+    """
+    Returns the window start times (int64 ns) of the rolling window walk: starts every step from the
+    first transaction while the start is not past the last transaction. If the last regular window ends
+    before the last transaction, one extra window ending just after it is added.
+    """
+    if step_ns <= 0:
+        raise ValueError("step_hours must be positive")
+    starts = np.arange(min_time_ns, max_time_ns + 1, step_ns, dtype=np.int64)
+    last_start = int(starts[-1])
+    if last_start < max_time_ns and last_start + window_ns < max_time_ns:
+        extra_start = max(max_time_ns - window_ns + 1_000_000_000, min_time_ns)
+        if extra_start <= max_time_ns:
+            starts = np.append(starts, np.int64(extra_start))
+    return starts
+
+def _window_reduce(ufunc: np.ufunc, values: np.ndarray, start_idx: np.ndarray, end_idx: np.ndarray, empty_value: float = 0.0) -> np.ndarray:
+    """
+    Applies ufunc.reduce to values[start_idx[k]:end_idx[k]] for every window k in one C-level pass.
+    Windows may overlap; empty windows get empty_value.
+    """
+    result = np.full(len(start_idx), empty_value, dtype=float)
+    if len(values) == 0 or len(start_idx) == 0:
+        return result
+    # A trailing sentinel keeps end indices equal to len(values) valid for reduceat
+    padded = np.append(values.astype(float), empty_value)
+    bounds = np.empty(2 * len(start_idx), dtype=np.intp)
+    bounds[0::2] = start_idx
+    bounds[1::2] = end_idx
+    reduced = ufunc.reduceat(padded, bounds)[0::2]
+    non_empty = end_idx > start_idx
+    result[non_empty] = reduced[non_empty]
+    return result
+
+def _window_sum(values: np.ndarray, start_idx: np.ndarray, end_idx: np.ndarray) -> np.ndarray:
+    """
+    Sums values[start_idx[k]:end_idx[k]] for every window k as a difference of prefix sums, in O(len(values) + windows).
+    The prefix sums are accumulated in extended precision to limit cancellation in windows late in a long history,
+    and empty windows are exactly 0.
+    """
+    prefix = np.concatenate(([0.0], np.cumsum(values, dtype=np.longdouble)))
+    return np.where(end_idx > start_idx, (prefix[end_idx] - prefix[start_idx]).astype(float), 0.0)
+
+def _window_distinct_counts(codes: np.ndarray, start_idx: np.ndarray, end_idx: np.ndarray) -> np.ndarray:
+    """
+    Counts distinct non-negative codes in codes[start_idx[k]:end_idx[k]] for every window k.
+    Position j is counted in window k iff it lies in the window and the previous occurrence of its
+    code does not. Since window bounds are non-decreasing, the windows counting j form a contiguous
+    range, so all counts come from one difference array.
+    """
+    num_windows = len(start_idx)
+    if len(codes) == 0 or num_windows == 0:
+        return np.zeros(num_windows, dtype=np.int64)
+
+    order = np.argsort(codes, kind="stable")
+    sorted_codes = codes[order]
+    previous = np.full(len(codes), -1, dtype=np.int64)
+    same_as_before = sorted_codes[1:] == sorted_codes[:-1]
+    previous[order[1:][same_as_before]] = order[:-1][same_as_before]
+
+    positions = np.arange(len(codes))
+    valid = codes >= 0 # Negative codes mark missing values, which nunique() ignores
+    first_window = np.maximum(np.searchsorted(start_idx, previous, side="right"), np.searchsorted(end_idx, positions, side="right"))
+    past_window = np.searchsorted(start_idx, positions, side="right")
+    counted = valid & (first_window < past_window)
+
+    deltas = np.bincount(first_window[counted], minlength=num_windows + 1) - np.bincount(past_window[counted], minlength=num_windows + 1)
+    return np.cumsum(deltas)[:num_windows].astype(np.int64)
+
+def compute_window_features(df_address_related: pd.DataFrame, target_address: str, window_duration: timedelta, step_duration: timedelta, window_starts_ns: Optional[np.ndarray] = None) -> pd.DataFrame:
+    """
+    Computes all rolling window aggregates over time-sorted arrays in a few vectorized passes.
+    Window boundaries come from searchsorted, and counts and sums from index arithmetic and prefix sums, so
+    those cost O(transactions + windows log n). Only the per-window maxima use ufunc.reduceat over the
+    overlapping windows, which is O(sum of window sizes), roughly transactions * window / step.
+    window_starts_ns overrides the default walk from the first transaction (used by incremental mode).
+    """
+    df = df_address_related.sort_values(by="datetime", kind="stable")
+    times_ns = df["datetime"].to_numpy(dtype="datetime64[ns]").astype(np.int64)
+    window_ns = int(window_duration.total_seconds() * 1_000_000_000)
+    step_ns = int(step_duration.total_seconds() * 1_000_000_000)
+
+    if window_starts_ns is None:
+        starts_ns = window_start_times(int(times_ns[0]), int(times_ns[-1]), window_ns, step_ns)
+    else:
+        starts_ns = np.asarray(window_starts_ns, dtype=np.int64)
+    ends_ns = starts_ns + window_ns
+    num_windows = len(starts_ns)
+
+    # All address-related transactions
+    start_idx = np.searchsorted(times_ns, starts_ns, side="left")
+    end_idx = np.searchsorted(times_ns, ends_ns, side="left")
+    tx_counts = end_idx - start_idx
+
+    # Incoming and outgoing subsets, each still time-sorted
+    is_incoming = (df["transaction_type"] == "incoming").to_numpy()
+    is_outgoing = (df["transaction_type"] == "outgoing").to_numpy()
+    incoming_times = times_ns[is_incoming]
+    outgoing_times = times_ns[is_outgoing]
+    in_start = np.searchsorted(incoming_times, starts_ns, side="left")
+    in_end = np.searchsorted(incoming_times, ends_ns, side="left")
+    out_start = np.searchsorted(outgoing_times, starts_ns, side="left")
+    out_end = np.searchsorted(outgoing_times, ends_ns, side="left")
+    in_counts = in_end - in_start
+    out_counts = out_end - out_start
+
+    value_eth = df["value_eth"].to_numpy(dtype=float)
+    gas_fee_eth = df["gas_fee_eth"].to_numpy(dtype=float)
+    volume_in = _window_sum(value_eth[is_incoming], in_start, in_end)
+    volume_out = _window_sum(value_eth[is_outgoing], out_start, out_end)
+    max_in = _window_reduce(np.maximum, value_eth[is_incoming], in_start, in_end)
+    max_out = _window_reduce(np.maximum, value_eth[is_outgoing], out_start, out_end)
+    gas_out = _window_sum(gas_fee_eth[is_outgoing], out_start, out_end)
+
+    from_codes = pd.factorize(df["from"])[0]
+    to_codes = pd.factorize(df["to"])[0]
+    unique_in = _window_distinct_counts(from_codes[is_incoming], in_start, in_end)
+    unique_out = _window_distinct_counts(to_codes[is_outgoing], out_start, out_end)
+
+    # Inter-arrival times: the diffs inside window k are diffs[start_idx[k] + 1 : end_idx[k]]
+    diffs_sec = np.diff(times_ns, prepend=times_ns[0]) / 1e9
+    num_diffs = np.maximum(tx_counts - 1, 0)
+    has_diffs = num_diffs > 0
+    last_idx = np.maximum(end_idx - 1, 0)
+    diff_sums = np.where(has_diffs, (times_ns[last_idx] - times_ns[np.minimum(start_idx, len(times_ns) - 1)]) / 1e9, 0.0)
+    diff_sq_sums = _window_sum(diffs_sec ** 2, np.minimum(start_idx + 1, end_idx), end_idx)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        avg_time = np.where(has_diffs, diff_sums / num_diffs, 0.0)
+        variance = np.where(num_diffs > 1, (diff_sq_sums - diff_sums * avg_time) / (num_diffs - 1), np.nan)
+        std_time = np.where(has_diffs, np.sqrt(np.maximum(variance, 0.0)), 0.0)
+        std_time[num_diffs == 1] = np.nan # Sample std of a single diff is undefined
+        avg_in = np.where(in_counts > 0, volume_in / in_counts, 0.0)
+        avg_out = np.where(out_counts > 0, volume_out / out_counts, 0.0)
+        avg_gas = np.where(out_counts > 0, gas_out / out_counts, 0.0)
+
+    non_empty = tx_counts > 0
+    features = {
+        "window_start": pd.to_datetime(starts_ns),
+        "window_end": pd.to_datetime(ends_ns),
+        "address": target_address,
+        "total_transactions_in_window": tx_counts.astype(np.int64),
+        "incoming_tx_count": in_counts.astype(np.int64),
+        "outgoing_tx_count": out_counts.astype(np.int64),
+        "total_eth_volume_in": volume_in,
+        "total_eth_volume_out": volume_out,
+        "avg_eth_tx_value_in": avg_in,
+        "avg_eth_tx_value_out": avg_out,
+        "max_eth_tx_value_in": max_in,
+        "max_eth_tx_value_out": max_out,
+        "unique_counterparties_in": unique_in,
+        "unique_counterparties_out": unique_out,
+        "total_gas_fee_eth_spent_by_address": gas_out,
+        "avg_gas_fee_eth_spent_by_address": avg_gas,
+        "avg_time_between_tx_sec": avg_time,
+        "std_time_between_tx_sec": std_time,
+        "incoming_to_outgoing_volume_ratio": np.where(non_empty, volume_in / (volume_out + 1e-9), 0.0),
+        "incoming_to_outgoing_count_ratio": np.where(non_empty, in_counts / (out_counts + 1e-9), 0.0)
+    }
+    windowed_features_df = pd.DataFrame(features, index=range(num_windows))
+
+    # Features that only become floats when some window has the relevant transactions stay integer
+    # zeros otherwise, matching the dtypes of the per-window dict construction they replace.
+    integer_unless = {
+        "avg_eth_tx_value_in": in_counts > 0, "max_eth_tx_value_in": in_counts > 0,
+        "avg_eth_tx_value_out": out_counts > 0, "max_eth_tx_value_out": out_counts > 0,
+        "avg_gas_fee_eth_spent_by_address": out_counts > 0,
+        "avg_time_between_tx_sec": has_diffs, "std_time_between_tx_sec": has_diffs
+    }
+    for column, float_windows in integer_unless.items():
+        if not float_windows.any():
+            windowed_features_df[column] = np.zeros(num_windows, dtype=np.int64)
+    return windowed_features_df
+
+ANOMALY_FEATURES_TO_CHECK = [
+    "total_transactions_in_window", "incoming_tx_count", "outgoing_tx_count",
+    "total_eth_volume_in", "total_eth_volume_out", "max_eth_tx_value_in", "max_eth_tx_value_out",
+    "total_gas_fee_eth_spent_by_address"
+]
+# Maxima have no meaningful lower bound
+NO_LOW_ANOMALY_FEATURES = {"max_eth_tx_value_in", "max_eth_tx_value_out"}
+# Simple thresholds used when no baseline exists for a feature
+FALLBACK_THRESHOLDS = {"total_transactions_in_window": 50, "max_eth_tx_value_out": 50}
+NO_ANOMALY_MESSAGE = "No specific anomalies detected in this window based on historical baselines."
+
+def detect_anomaly_records(windowed_features_df: pd.DataFrame, historical_baselines: Dict[str, float], std_dev_multiplier: float = 3.0, feature_records: Optional[List[Dict[str, Any]]] = None) -> List[List[Dict[str, Any]]]:
+    """
+    Compares every window against the baselines with one array comparison per feature and returns,
+    per window, structured anomaly records (feature, value, mean, std, bound, direction, rule).
+    Python-level work is proportional to the number of anomalies, not windows x features.
+    """
+    num_windows = len(windowed_features_df)
+    if feature_records is None:
+        feature_records = windowed_features_df.to_dict(orient="records")
+    window_anomalies: List[List[Dict[str, Any]]] = [[] for _ in range(num_windows)]
+
+    for feature_name in ANOMALY_FEATURES_TO_CHECK:
+        if feature_name in windowed_features_df.columns:
+            values = windowed_features_df[feature_name].to_numpy(dtype=float, na_value=np.nan)
         else:
-            current_window_start_time += step_duration
-        
-    return pd.DataFrame(windowed_features_list)
+            values = np.zeros(num_windows)
+        mean_val = historical_baselines.get(f"{feature_name}_mean")
+        std_val = historical_baselines.get(f"{feature_name}_std")
+
+        checks = [] # (hit mask, direction, rule, bound) in message order
+        with np.errstate(invalid="ignore"):
+            if mean_val is not None and std_val is not None:
+                if std_val > 1e-9: # Avoid issues with zero std deviation if activity was constant
+                    upper_bound = mean_val + std_dev_multiplier * std_val
+                    lower_bound = mean_val - std_dev_multiplier * std_val
+                    checks.append((values > upper_bound, "high", "baseline", upper_bound))
+                    # For counts/volumes, a significant drop from a non-zero mean is also an anomaly
+                    if feature_name not in NO_LOW_ANOMALY_FEATURES and mean_val > 1e-9:
+                        checks.append(((values < lower_bound) & (values < mean_val), "low", "baseline", lower_bound))
+                else: # If std is zero, any deviation from mean is an anomaly
+                    checks.append((values > mean_val, "deviation_from_constant", "baseline", mean_val))
+            elif feature_name in FALLBACK_THRESHOLDS:
+                threshold = FALLBACK_THRESHOLDS[feature_name]
+                checks.append((values > threshold, "high", "fallback", threshold))
+
+        for hits, direction, rule, bound in checks:
+            for i in np.flatnonzero(hits):
+                window_anomalies[i].append({
+                    "feature": feature_name,
+                    "value": feature_records[i].get(feature_name, 0),
+                    "mean": mean_val if rule == "baseline" else None,
+                    "std": std_val if rule == "baseline" else None,
+                    "bound": bound,
+                    "direction": direction,
+                    "rule": rule
+                })
+    return window_anomalies
+
+def render_anomaly_message(record: Dict[str, Any]) -> str:
+    """Renders a structured anomaly record as the human-readable report line."""
+    feature_name, current_value = record["feature"], record["value"]
+    if record["rule"] == "fallback":
+        if feature_name == "total_transactions_in_window":
+            return f"High Transaction Count (fallback rule): {current_value} transactions."
+        return f"Large Outgoing Transaction (fallback rule): Max {current_value:.2f} ETH sent."
+    if record["direction"] == "high":
+        return f"High Anomaly for {feature_name}: {current_value:.2f} (Historical Mean: {record['mean']:.2f}, Std: {record['std']:.2f}, Upper Bound: {record['bound']:.2f})"
+    if record["direction"] == "low":
+        return f"Low Anomaly for {feature_name}: {current_value:.2f} (Historical Mean: {record['mean']:.2f}, Std: {record['std']:.2f}, Lower Bound: {record['bound']:.2f})"
+    return f"Deviation from Constant for {feature_name}: {current_value:.2f} (Historical Value: {record['mean']:.2f})"
 
-def detect_anomalies_with_historical_baseline(current_windowed_features_df: pd.DataFrame, historical_baselines: Dict[str, float], std_dev_multiplier: float = 3.0) -> List[Dict[str, Any]]:
+def detect_anomalies_with_historical_baseline(current_windowed_features_df: pd.DataFrame, historical_baselines: Dict[str, float], std_dev_multiplier: float = 3.0, render_messages: bool = True) -> List[Dict[str, Any]]:
     """
     Detects anomalies by comparing current window features to historical baselines.
+    With render_messages=False, windows carry structured "anomaly_records" instead of message strings.
     """
-    anomalies_report = []    
     if current_windowed_features_df.empty:
         return [{"window_start": "N/A", "window_end": "N/A", "anomalies": ["No current windowed features to analyze."]}]
     if not historical_baselines:
         return [{"window_start": "N/A", "window_end": "N/A", "anomalies": ["No historical baselines provided."]}]
 
-    features_to_check = [
-        "total_transactions_in_window", "incoming_tx_count", "outgoing_tx_count",
-        "total_eth_volume_in", "total_eth_volume_out", "max_eth_tx_value_in", "max_eth_tx_value_out",
-        "total_gas_fee_eth_spent_by_address"
-    ]
+    feature_records = current_windowed_features_df.to_dict(orient="records")
+    window_anomalies = detect_anomaly_records(current_windowed_features_df, historical_baselines, std_dev_multiplier, feature_records)
 
-    for i, window_row in current_windowed_features_df.iterrows():
-        current_anomalies = []
-        window_label = f"Window: {window_row['window_start']} to {window_row['window_end']}"
-
-        for feature_name in features_to_check:
-            mean_key = f"{feature_name}_mean"
-            std_key = f"{feature_name}_std"
-            
-            current_value = window_row.get(feature_name, 0)
-            mean_val = historical_baselines.get(mean_key)
-            std_val = historical_baselines.get(std_key)
-
-            if mean_val is not None and std_val is not None:
-                if std_val > 1e-9: # Avoid issues with zero std deviation if activity was constant
-                    upper_bound = mean_val + std_dev_multiplier * std_val
-                    lower_bound = mean_val - std_dev_multiplier * std_val # Though for counts/volumes, lower bound might be just > 0
-
-                    if current_value > upper_bound:
-                        current_anomalies.append(f"High Anomaly for {feature_name}: {current_value:.2f} (Historical Mean: {mean_val:.2f}, Std: {std_val:.2f}, Upper Bound: {upper_bound:.2f})")
-                    # Add lower bound check if meaningful for the feature
-                    # For counts/volumes, a significant drop from a non-zero mean could also be an anomaly
-                    if feature_name not in ["max_eth_tx_value_in", "max_eth_tx_value_out"] and current_value < lower_bound and current_value < mean_val : # e.g. drop in activity
-                         if mean_val > 1e-9 : # only if mean was not zero
-                            current_anomalies.append(f"Low Anomaly for {feature_name}: {current_value:.2f} (Historical Mean: {mean_val:.2f}, Std: {std_val:.2f}, Lower Bound: {lower_bound:.2f})")
-                elif current_value > mean_val: # If std is zero, any deviation from mean is an anomaly
-                     current_anomalies.append(f"Deviation from Constant for {feature_name}: {current_value:.2f} (Historical Value: {mean_val:.2f})")
-            else:
-                # Fallback to simple rules if baseline for this specific feature is missing
-                if feature_name == "total_transactions_in_window" and current_value > 50:
-                    current_anomalies.append(f"High Transaction Count (fallback rule): {current_value} transactions.")
-                if feature_name == "max_eth_tx_value_out" and current_value > 50:
-                    current_anomalies.append(f"Large Outgoing Transaction (fallback rule): Max {current_value:.2f} ETH sent.")
-
-        if not current_anomalies:
-            current_anomalies.append("No specific anomalies detected in this window based on historical baselines.")
-        
-        anomalies_report.append({
-            "window_start": str(window_row["window_start"]),
-            "window_end": str(window_row["window_end"]),
-            "features": window_row.to_dict(),
-            "anomalies_detected_in_window": current_anomalies
-        })
-        
+    anomalies_report = []
+    for features, anomaly_records in zip(feature_records, window_anomalies):
+        window_report = {
+            "window_start": str(features["window_start"]),
+            "window_end": str(features["window_end"]),
+            "features": features
+        }
+        if render_messages:
+            window_report["anomalies_detected_in_window"] = [render_anomaly_message(record) for record in anomaly_records] or [NO_ANOMALY_MESSAGE]
+        else:
+            window_report["anomaly_records"] = anomaly_records
+        anomalies_report.append(window_report)
     return anomalies_report
 
-def main():
-    parser = argparse.ArgumentParser(description="Analyze Etherscan transaction data for anomalies using historical baselining.")
-    parser.add_argument("-i", "--input_file", type=str, required=True, help="Path to the input JSON file (cleaned Etherscan transactions for the target address)." )
-    parser.add_argument("-o", "--output_file", type=str, required=True, help="Path to the output JSON file with analysis results.")
-    parser.add_argument("-a", "--address", type=str, required=True, help="The Ethereum address for which the transactions were fetched (case-insensitive)." )
-    parser.add_argument("--window_hours", type=int, default=24, help="Duration of each rolling window in hours for feature calculation.")
-    parser.add_argument("--step_hours", type=int, default=6, help="Step size for the rolling window in hours.")
-    parser.add_argument("--baseline_days", type=int, default=30, help="Number of initial days of data to use for establishing historical baselines.")
-    parser.add_argument("--std_dev_multiplier", type=float, default=3.0, help="Number of standard deviations from the mean to consider an anomaly.")
+def count_anomalous_windows(analysis_windows_report: List[Dict[str, Any]]) -> int:
+    """Counts report windows that carry at least one detected anomaly (rendered or structured)."""
+    no_anomaly_messages = {NO_ANOMALY_MESSAGE, "No current data to analyze after baseline period."}
+    return sum(1 for window in analysis_windows_report
+               if window.get("anomaly_records")
+               or any(message not in no_anomaly_messages for message in window.get("anomalies_detected_in_window", [])))
 
-    args = parser.parse_args()
+def analyze_transactions_file(input_file: str, output_file: str, address: str, window_hours: int = 24, step_hours: int = 6, baseline_days: int = 30, std_dev_multiplier: float = 3.0, features_file: Optional[str] = None, render_messages: bool = True) -> Dict[str, Any]:
+    """
+    Runs the full baseline + anomaly analysis for one address and writes its report to output_file.
+    Returns a short summary (status, counts and elapsed time) for batch reporting.
+    """
+    started = time.perf_counter()
+    summary = {"address": address, "input_file": input_file, "output_file": output_file, "status": "error"}
 
     try:
-        with open(args.input_file, "r", encoding="utf-8") as f:
-            transactions = json.load(f)
+        transactions = load_transaction_columns(input_file)
+    except NotARecordStreamError:
+        transactions = {}
     except FileNotFoundError:
-        print(f"Error: Input file not found: {args.input_file}")
-        return
+        print(f"Error: Input file not found: {input_file}")
+        summary["error"] = "Input file not found"
+        summary["elapsed_sec"] = time.perf_counter() - started
+        return summary
     except json.JSONDecodeError:
-        print(f"Error: Could not decode JSON from input file: {args.input_file}")
-        return
+        print(f"Error: Could not decode JSON from input file: {input_file}")
+        summary["error"] = "Could not decode JSON"
+        summary["elapsed_sec"] = time.perf_counter() - started
+        return summary
 
-    if not isinstance(transactions, list) or not transactions:
-        print(f"No valid transaction data found in {args.input_file}. Nothing to analyze.")
+    if not transactions or len(transactions["timeStamp"]) == 0:
+        print(f"No valid transaction data found in {input_file}. Nothing to analyze.")
         # Write empty/error result
-        results = {"address": args.address, "error": "No transaction data"}
-        with open(args.output_file, "w", encoding="utf-8") as f: json.dump(results, f, indent=4)
-        return
+        results = {"address": address, "error": "No transaction data"}
+        save_json(output_file, results)
+        summary["error"] = "No transaction data"
+        summary["elapsed_sec"] = time.perf_counter() - started
+        return summary
 
-    df_full_history = pd.DataFrame(transactions)
-    df_full_history["datetime"] = pd.to_datetime(df_full_history["timeStamp"], unit="s")
-    df_full_history.sort_values(by="datetime", inplace=True)
+    # Parse, normalize and classify once; both the baseline and current periods reuse this frame
+    df_full_history = prepare_transactions_frame(transactions, address)
 
     if df_full_history.empty:
-        print(f"Transaction data for address {args.address} is empty after initial load.")
-        results = {"address": args.address, "error": "Empty transaction data after load"}
-        with open(args.output_file, "w", encoding="utf-8") as f: json.dump(results, f, indent=4)
-        return
+        print(f"Transaction data for address {address} is empty after initial load.")
+        results = {"address": address, "error": "Empty transaction data after load"}
+        save_json(output_file, results)
+        summary["error"] = "Empty transaction data after load"
+        summary["elapsed_sec"] = time.perf_counter() - started
+        return summary
         
     first_tx_time = df_full_history["datetime"].min()
-    baseline_period_end_time = first_tx_time + timedelta(days=args.baseline_days)
+    baseline_period_end_time = first_tx_time + timedelta(days=baseline_days)
     
     print(f"Establishing historical baseline using data up to: {baseline_period_end_time}")
     historical_windowed_features_df = calculate_windowed_features(
-        transactions, args.address, args.window_hours, args.step_hours, 
+        df_full_history, address, window_hours, step_hours, 
         period_start_time=None, period_end_time=baseline_period_end_time
     )
 
@@ -237,14 +453,28 @@ def main():
 
     print(f"Analyzing current period data after: {baseline_period_end_time}")
     current_windowed_features_df = calculate_windowed_features(
-        transactions, args.address, args.window_hours, args.step_hours,
+        df_full_history, address, window_hours, step_hours,
         period_start_time=baseline_period_end_time, period_end_time=None
     )
 
+    if features_file:
+        features_frames = []
+        if not historical_windowed_features_df.empty:
+            features_frames.append(historical_windowed_features_df.assign(period="baseline"))
+        if not current_windowed_features_df.empty:
+            features_frames.append(current_windowed_features_df.assign(period="current"))
+        if features_frames:
+            try:
+                from columnar_store import write_features # Pulls in pyarrow; only needed when features are saved
+                write_features(pd.concat(features_frames, ignore_index=True), features_file)
+                print(f"Windowed features saved to {features_file}")
+            except Exception as e:
+                print(f"Error writing windowed features to {features_file}: {e}")
+
     analysis_windows_report = []
     if not current_windowed_features_df.empty:
         print(f"Detecting anomalies across {len(current_windowed_features_df)} current windows...")
-        analysis_windows_report = detect_anomalies_with_historical_baseline(current_windowed_features_df, historical_baselines, args.std_dev_multiplier)
+        analysis_windows_report = detect_anomalies_with_historical_baseline(current_windowed_features_df, historical_baselines, std_dev_multiplier, render_messages)
     else:
         print("No data available for current period analysis or no features generated.")
         analysis_windows_report.append({
@@ -253,24 +483,347 @@ def main():
         })
             
     results = {
-        "address": args.address,
+        "address": address,
         "parameters": {
-            "window_hours": args.window_hours, 
-            "step_hours": args.step_hours,
-            "baseline_days": args.baseline_days,
-            "std_dev_multiplier": args.std_dev_multiplier
+            "window_hours": window_hours, 
+            "step_hours": step_hours,
+            "baseline_days": baseline_days,
+            "std_dev_multiplier": std_dev_multiplier
         },
         "historical_baseline_stats_summary": {k: v for k, v in historical_baselines.items() if pd.notna(v)}, # Store non-NaN baselines
         "analysis_windows": analysis_windows_report
     }
 
+    summary.update({
+        "num_transactions": len(df_full_history),
+        "num_baseline_windows": len(historical_windowed_features_df),
+        "num_current_windows": len(current_windowed_features_df),
+        "num_anomalous_windows": count_anomalous_windows(analysis_windows_report)
+    })
     try:
-        with open(args.output_file, "w", encoding="utf-8") as f:
-            json.dump(results, f, ensure_ascii=False, indent=4, default=str) 
-        print(f"On-chain analysis results with historical baselining saved to {args.output_file}")
+        save_json(output_file, results, default=str) 
+        print(f"On-chain analysis results with historical baselining saved to {output_file}")
+        summary["status"] = "ok"
     except Exception as e:
-        print(f"Error writing analysis results to {args.output_file}: {e}")
+        print(f"Error writing analysis results to {output_file}: {e}")
+        summary["error"] = str(e)
+    summary["elapsed_sec"] = time.perf_counter() - started
+    return summary
+
+BASELINE_EXCLUDED_COLUMNS = ["window_start", "window_end", "address"]
+
+def running_stats_from_features(windowed_features_df: pd.DataFrame) -> Dict[str, Dict[str, float]]:
+    """Summarizes each numeric feature column as running mean/variance state (count, mean, M2)."""
+    stats = {}
+    for col in windowed_features_df.columns:
+        if col in BASELINE_EXCLUDED_COLUMNS or not pd.api.types.is_numeric_dtype(windowed_features_df[col]):
+            continue
+        values = windowed_features_df[col].dropna()
+        count = len(values)
+        stats[col] = {
+            "count": count,
+            "mean": float(values.mean()) if count else 0.0,
+            "m2": float(values.var() * (count - 1)) if count > 1 else 0.0
+        }
+    return stats
+
+def merge_running_stats(stats: Dict[str, Dict[str, float]], windowed_features_df: pd.DataFrame) -> Dict[str, Dict[str, float]]:
+    """Folds a batch of windows into existing running stats (Chan et al. parallel update)."""
+    for col, batch in running_stats_from_features(windowed_features_df).items():
+        current = stats.get(col, {"count": 0, "mean": 0.0, "m2": 0.0})
+        total = current["count"] + batch["count"]
+        if total == 0:
+            continue
+        delta = batch["mean"] - current["mean"]
+        stats[col] = {
+            "count": total,
+            "mean": current["mean"] + delta * batch["count"] / total,
+            "m2": current["m2"] + batch["m2"] + delta ** 2 * current["count"] * batch["count"] / total
+        }
+    return stats
+
+def baselines_from_running_stats(stats: Dict[str, Dict[str, float]]) -> Dict[str, float]:
+    """Converts running stats into the {feature}_mean / {feature}_std dict used by anomaly detection."""
+    historical_baselines = {}
+    for col, col_stats in stats.items():
+        count = col_stats["count"]
+        historical_baselines[f"{col}_mean"] = col_stats["mean"] if count else np.nan
+        historical_baselines[f"{col}_std"] = math.sqrt(max(col_stats["m2"], 0.0) / (count - 1)) if count > 1 else np.nan
+    return historical_baselines
+
+def bootstrap_incremental_state(transactions: List[Dict[str, Any]], address: str, window_hours: int, step_hours: int, baseline_days: int) -> Dict[str, Any]:
+    """
+    Builds the initial incremental state from a full history: baseline running stats from the first
+    baseline_days, and every later transaction held as pending for the first incremental step.
+    """
+    df_full_history = prepare_transactions_frame(transactions, address)
+    baseline_period_end_time = df_full_history["datetime"].min() + timedelta(days=baseline_days)
+    print(f"Establishing historical baseline using data up to: {baseline_period_end_time}")
+    historical_windowed_features_df = calculate_windowed_features(
+        df_full_history, address, window_hours, step_hours,
+        period_start_time=None, period_end_time=baseline_period_end_time
+    )
+    print(f"Calculated {len(historical_windowed_features_df)} windows for historical baseline.")
+
+    current_period = df_full_history[df_full_history["datetime"] >= baseline_period_end_time]
+    return {
+        "address": address,
+        "parameters": {"window_hours": window_hours, "step_hours": step_hours, "baseline_days": baseline_days},
+        "baseline_period_end_time": str(baseline_period_end_time),
+        "baseline_running_stats": running_stats_from_features(historical_windowed_features_df),
+        # Current-period windows start at the first transaction after the baseline, as in full mode
+        "next_window_start": str(current_period["datetime"].min()) if not current_period.empty else None,
+        "last_seen_time": None,
+        "pending_transactions": []
+    }
+
+def incremental_cutoff_ns(state: Dict[str, Any]) -> int:
+    """Transactions before this time (the next unscored window, or the baseline end) cannot affect later runs."""
+    return pd.Timestamp(state["next_window_start"] or state["baseline_period_end_time"]).value
+
+def iter_transactions_since(input_file: str, cutoff_ns: int) -> Iterator[Dict[str, Any]]:
+    """Streams the transaction records of input_file at or after cutoff_ns, so a full history is never held in memory."""
+    for tx in iter_json_records(input_file):
+        if isinstance(tx, dict) and "timeStamp" in tx and int(float(tx["timeStamp"])) * 1_000_000_000 >= cutoff_ns:
+            yield tx
+
+def run_incremental_step(state: Dict[str, Any], transactions: List[Dict[str, Any]], std_dev_multiplier: float, fold_into_baseline: bool = False, render_messages: bool = True) -> List[Dict[str, Any]]:
+    """
+    Folds new transactions into the persisted state and scores only the windows that became complete
+    (window end <= latest transaction time seen). Work is proportional to the new transactions plus the
+    pending tail of at most one window, not to the full history. Updates state in place.
+    """
+    address = state["address"]
+    window_ns = state["parameters"]["window_hours"] * 3600 * 1_000_000_000
+    step_ns = state["parameters"]["step_hours"] * 3600 * 1_000_000_000
+    baseline_end_ns = pd.Timestamp(state["baseline_period_end_time"]).value
+    next_start_ns = pd.Timestamp(state["next_window_start"]).value if state["next_window_start"] else None
+
+    # Transactions already windowed (or inside the baseline) are ignored; the rest are deduped by hash
+    cutoff_ns = incremental_cutoff_ns(state)
+    pending = {}
+    for tx in state["pending_transactions"] + transactions:
+        if not isinstance(tx, dict) or "timeStamp" not in tx:
+            continue
+        if int(float(tx["timeStamp"])) * 1_000_000_000 < cutoff_ns:
+            continue
+        pending.setdefault(tx.get("hash") or id(tx), tx)
+    pending_transactions = list(pending.values())
+
+    windows_report = []
+    if pending_transactions:
+        df_pending = prepare_transactions_frame(pending_transactions, address)
+        df_pending = df_pending[df_pending["transaction_type"] != "internal_or_unrelated"]
+        if not df_pending.empty:
+            times_ns = df_pending["datetime"].to_numpy(dtype="datetime64[ns]").astype(np.int64)
+            last_seen_ns = max(int(times_ns.max()), pd.Timestamp(state["last_seen_time"]).value if state["last_seen_time"] else 0)
+            state["last_seen_time"] = str(pd.Timestamp(last_seen_ns))
+            if next_start_ns is None:
+                next_start_ns = int(times_ns.min())
+            num_complete = (last_seen_ns - window_ns - next_start_ns) // step_ns + 1 if last_seen_ns >= next_start_ns + window_ns else 0
+
+            if num_complete > 0:
+                starts_ns = next_start_ns + step_ns * np.arange(num_complete, dtype=np.int64)
+                new_windows_df = compute_window_features(df_pending, address, timedelta(hours=state["parameters"]["window_hours"]), timedelta(hours=state["parameters"]["step_hours"]), window_starts_ns=starts_ns)
+                historical_baselines = baselines_from_running_stats(state["baseline_running_stats"])
+                print(f"Detecting anomalies across {len(new_windows_df)} new windows...")
+                windows_report = detect_anomalies_with_historical_baseline(new_windows_df, historical_baselines, std_dev_multiplier, render_messages)
+                if fold_into_baseline:
+                    merge_running_stats(state["baseline_running_stats"], new_windows_df)
+                next_start_ns += int(num_complete) * step_ns
+
+    state["next_window_start"] = str(pd.Timestamp(next_start_ns)) if next_start_ns is not None else None
+    # Only transactions that can still fall into an unscored window are carried over
+    keep_from_ns = next_start_ns if next_start_ns is not None else baseline_end_ns
+    state["pending_transactions"] = [tx for tx in pending_transactions if int(float(tx["timeStamp"])) * 1_000_000_000 >= keep_from_ns]
+    return windows_report
+
+def analyze_transactions_incrementally(input_file: str, output_file: str, address: str, state_file: str, window_hours: int = 24, step_hours: int = 6, baseline_days: int = 30, std_dev_multiplier: float = 3.0, fold_into_baseline: bool = False, render_messages: bool = True) -> None:
+    """
+    Incremental monitoring entry point: loads (or bootstraps) the persisted state, scores only new
+    complete windows from input_file and saves the updated state. Once state exists, only records at or
+    after the next unscored window are kept while the input is streamed, though every record is still
+    parsed; passing just the new transactions (e.g. the collector's sync --delta_file) avoids that too.
+    """
+    parameters = {"window_hours": window_hours, "step_hours": step_hours, "baseline_days": baseline_days}
+    state = None
+    if os.path.exists(state_file):
+        with open(state_file, "r", encoding="utf-8") as f:
+            state = json.load(f)
+        if state.get("address", "").lower() != address.lower() or state.get("parameters") != parameters:
+            print(f"Error: State file {state_file} was created for a different address or window parameters. Use a new state file.")
+            return
+        print(f"Loaded incremental state from {state_file}; next window starts at {state['next_window_start']}.")
+
+    try:
+        transactions = list(iter_transactions_since(input_file, incremental_cutoff_ns(state)) if state is not None else iter_json_records(input_file))
+    except NotARecordStreamError:
+        transactions = []
+    except FileNotFoundError:
+        print(f"Error: Input file not found: {input_file}")
+        return
+    except json.JSONDecodeError:
+        print(f"Error: Could not decode JSON from input file: {input_file}")
+        return
+
+    if state is None:
+        if not transactions:
+            print(f"No valid transaction data found in {input_file} to bootstrap a baseline. Nothing to analyze.")
+            return
+        state = bootstrap_incremental_state(transactions, address, window_hours, step_hours, baseline_days)
+
+    windows_report = run_incremental_step(state, transactions, std_dev_multiplier, fold_into_baseline, render_messages)
+    if not windows_report:
+        print("No new complete windows to analyze.")
+
+    results = {
+        "address": address,
+        "parameters": dict(parameters, std_dev_multiplier=std_dev_multiplier),
+        "historical_baseline_stats_summary": {k: v for k, v in baselines_from_running_stats(state["baseline_running_stats"]).items() if pd.notna(v)},
+        "incremental": {
+            "new_windows": len(windows_report),
+            "next_window_start": state["next_window_start"],
+            "pending_transactions": len(state["pending_transactions"])
+        },
+        "analysis_windows": windows_report
+    }
+    try:
+        save_json(output_file, results, default=str)
+        print(f"Incremental analysis results saved to {output_file}")
+        with open(state_file, "w", encoding="utf-8") as f:
+            json.dump(state, f, ensure_ascii=False, indent=4)
+        print(f"Incremental state saved to {state_file}")
+    except Exception as e:
+        print(f"Error writing incremental results or state: {e}")
+
+def discover_batch_jobs(input_dir: str) -> List[Dict[str, str]]:
+    """
+    Builds (address, input_file) jobs from a directory of transaction files named like
+    coin_XX_<address>.json (or .ndjson / .jsonl), as in collected_data/etherscan_final_output.
+    """
+    jobs = []
+    for file_name in sorted(os.listdir(input_dir)):
+        stem, extension = os.path.splitext(file_name)
+        address = stem.split("_")[-1]
+        if extension in (".json", ".ndjson", ".jsonl") and address.lower().startswith("0x"):
+            jobs.append({"address": address, "input_file": os.path.join(input_dir, file_name)})
+        else:
+            print(f"Skipping {file_name}: could not infer an address from the file name.")
+    return jobs
+
+def load_batch_manifest(manifest_file: str) -> List[Dict[str, str]]:
+    """Loads a JSON list of {"address": ..., "input_file": ...} jobs. Relative paths are resolved against the manifest."""
+    with open(manifest_file, "r", encoding="utf-8") as f:
+        entries = json.load(f)
+    manifest_dir = os.path.dirname(os.path.abspath(manifest_file))
+    jobs = []
+    for i, entry in enumerate(entries):
+        if not isinstance(entry, dict) or not entry.get("address") or not entry.get("input_file"):
+            print(f"Skipping manifest entry {i+1}: 'address' and 'input_file' are required.")
+            continue
+        jobs.append({"address": entry["address"], "input_file": os.path.join(manifest_dir, entry["input_file"])})
+    return jobs
+
+def default_worker_count() -> int:
+    """Number of cores this process may run on."""
+    if hasattr(os, "sched_getaffinity"):
+        return max(1, len(os.sched_getaffinity(0)))
+    return max(1, os.cpu_count() or 1)
+
+def run_batch_analysis(jobs: List[Dict[str, str]], output_dir: str, workers: Optional[int] = None, **analysis_params) -> Dict[str, Any]:
+    """
+    Fans the per-address analyses out over a process pool, so pandas is imported once per worker
+    rather than once per address. Writes one report per address plus batch_summary.json.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    workers = min(workers or default_worker_count(), max(1, len(jobs)))
+    print(f"Analyzing {len(jobs)} addresses with {workers} worker processes...")
+
+    started = time.perf_counter()
+    summaries = []
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {}
+        for job in jobs:
+            stem = os.path.splitext(os.path.basename(job["input_file"]))[0]
+            output_file = os.path.join(output_dir, f"{stem}_anomalies.json")
+            features_file = os.path.join(output_dir, f"{stem}_features.parquet") if analysis_params.get("features_file") else None
+            params = dict(analysis_params, features_file=features_file)
+            futures[executor.submit(analyze_transactions_file, job["input_file"], output_file, job["address"], **params)] = job
+        for future in as_completed(futures):
+            job = futures[future]
+            try:
+                summary = future.result()
+            except Exception as e:
+                summary = {"address": job["address"], "input_file": job["input_file"], "status": "error", "error": str(e)}
+            print(f"[{summary['status']}] {summary['address']}: {summary.get('elapsed_sec', 0.0):.2f}s, "
+                  f"{summary.get('num_anomalous_windows', 0)}/{summary.get('num_current_windows', 0)} anomalous windows")
+            summaries.append(summary)
+
+    summaries.sort(key=lambda summary: summary["input_file"])
+    batch_summary = {
+        "parameters": {k: v for k, v in analysis_params.items() if k != "features_file"},
+        "workers": workers,
+        "total_elapsed_sec": time.perf_counter() - started,
+        "num_addresses": len(jobs),
+        "num_failed": sum(1 for summary in summaries if summary["status"] != "ok"),
+        "addresses": summaries
+    }
+    summary_file = os.path.join(output_dir, "batch_summary.json")
+    with open(summary_file, "w", encoding="utf-8") as f:
+        json.dump(batch_summary, f, ensure_ascii=False, indent=4, default=str)
+    print(f"Batch summary saved to {summary_file} ({batch_summary['total_elapsed_sec']:.2f}s total)")
+    return batch_summary
+
+def main():
+    parser = argparse.ArgumentParser(description="Analyze Etherscan transaction data for anomalies using historical baselining.")
+    parser.add_argument("-i", "--input_file", type=str, help="Path to the input JSON or NDJSON file (cleaned Etherscan transactions for the target address); '-' reads stdin." )
+    parser.add_argument("-o", "--output_file", type=str, help="Path to the output JSON file with analysis results; *.ndjson / *.jsonl or '-' (stdout) writes one compact line.")
+    parser.add_argument("-a", "--address", type=str, help="The Ethereum address for which the transactions were fetched (case-insensitive)." )
+    parser.add_argument("--batch_dir", type=str, help="Batch mode: directory of coin_XX_<address>.json transaction files to analyze.")
+    parser.add_argument("--manifest", type=str, help="Batch mode: JSON list of {\"address\", \"input_file\"} entries to analyze.")
+    parser.add_argument("--output_dir", type=str, help="Batch mode: directory for per-address reports and batch_summary.json.")
+    parser.add_argument("--workers", type=int, default=None, help="Batch mode: number of worker processes (default: available cores).")
+    parser.add_argument("--window_hours", type=int, default=24, help="Duration of each rolling window in hours for feature calculation.")
+    parser.add_argument("--step_hours", type=int, default=6, help="Step size for the rolling window in hours.")
+    parser.add_argument("--baseline_days", type=int, default=30, help="Number of initial days of data to use for establishing historical baselines.")
+    parser.add_argument("--std_dev_multiplier", type=float, default=3.0, help="Number of standard deviations from the mean to consider an anomaly.")
+    parser.add_argument("--features_file", type=str, default=None, help="Optional path to a Parquet file where the windowed features (baseline and current periods) are stored. In batch mode, any value enables per-address feature files in --output_dir.")
+    parser.add_argument("--anomaly_format", type=str, default="text", choices=["text", "structured"], help="Report anomalies as rendered messages (text) or as structured records (feature, value, mean, std, bound, direction).")
+    parser.add_argument("--state_file", type=str, default=None, help="Incremental mode: JSON file holding the baseline running stats and last processed window. Created on first run; later runs score only new windows. After the first run, pass only new transactions as --input_file (e.g. etherscan_data_collector.py sync_transactions --delta_file); a full history works but is parsed in full on every run.")
+    parser.add_argument("--fold_into_baseline", action="store_true", help="Incremental mode: fold newly scored windows into the baseline running stats.")
+
+    args = parser.parse_args()
+    reserve_stdout_for_records(args.output_file)
+    analysis_params = {
+        "window_hours": args.window_hours,
+        "step_hours": args.step_hours,
+        "baseline_days": args.baseline_days,
+        "std_dev_multiplier": args.std_dev_multiplier,
+        "features_file": args.features_file,
+        "render_messages": args.anomaly_format == "text"
+    }
+
+    if args.batch_dir or args.manifest:
+        if not args.output_dir:
+            parser.error("--output_dir is required in batch mode.")
+        try:
+            jobs = load_batch_manifest(args.manifest) if args.manifest else discover_batch_jobs(args.batch_dir)
+        except (FileNotFoundError, json.JSONDecodeError) as e:
+            print(f"Error: Could not load batch jobs: {e}")
+            return
+        if not jobs:
+            print("No (address, transactions file) pairs found. Nothing to analyze.")
+            return
+        run_batch_analysis(jobs, args.output_dir, args.workers, **analysis_params)
+        return
+
+    if not (args.input_file and args.output_file and args.address):
+        parser.error("-i/--input_file, -o/--output_file and -a/--address are required unless --batch_dir or --manifest is given.")
+    if args.state_file:
+        analysis_params.pop("features_file")
+        analyze_transactions_incrementally(args.input_file, args.output_file, args.address, args.state_file, fold_into_baseline=args.fold_into_baseline, **analysis_params)
+        return
+    analyze_transactions_file(args.input_file, args.output_file, args.address, **analysis_params)
 
 if __name__ == "__main__":
     main()
-
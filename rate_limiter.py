@@ -0,0 +1,56 @@
+#!/usr/bin/env python3.11
+import time
+import random
+import threading
+from typing import Optional
+
+class TokenBucket:
+    """
+    Thread-safe token-bucket rate limiter shared by concurrent API workers. Tokens refill at `rate` per
+    second up to `burst`; acquire() blocks until a token is available. With the default burst of 1,
+    calls are spaced evenly, so no one-second window ever sees more than `rate` calls.
+    """
+    def __init__(self, rate: float, burst: Optional[float] = None):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+        self.burst = max(1.0, burst if burst is not None else 1.0)
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+        self.acquired = 0
+        self.waited_sec = 0.0
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, tokens: float = 1.0) -> None:
+        """Blocks until `tokens` are available (and any pause has ended), then takes them."""
+        started = time.monotonic()
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                wait = self._paused_until - now
+                if wait <= 0:
+                    if self._tokens >= tokens:
+                        self._tokens -= tokens
+                        self.acquired += 1
+                        self.waited_sec += now - started
+                        return
+                    wait = (tokens - self._tokens) / self.rate
+            time.sleep(wait)
+
+    def pause(self, seconds: float) -> None:
+        """Stops all callers for `seconds`, e.g. after the server reports its rate limit was exceeded."""
+        with self._lock:
+            now = time.monotonic()
+            self._paused_until = max(self._paused_until, now + seconds)
+            self._tokens = 0.0
+            self._updated = now
+
+def backoff_delay(attempt: int, base: float = 1.0, cap: float = 30.0) -> float:
+    """Exponential backoff with full jitter for the given 0-based retry attempt."""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
@@ -0,0 +1,222 @@
+#!/usr/bin/env python3.11
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import argparse
+import threading
+from typing import List, Dict, Any, Optional, Callable, Tuple
+
+from json_stream import COMPACT_SEPARATORS
+
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+# Seconds a cached response is served without contacting the API, per data type
+DATA_TYPE_TTLS = {
+    "etherscan_transactions": 10 * 60,
+    "token_holders": 60 * 60,
+    "yahoo_chart": 15 * 60,
+    "yahoo_holders": 60 * 60,
+    "yahoo_insights": 6 * 60 * 60,
+    "sec_filings": 24 * 60 * 60,
+    "website": 24 * 60 * 60
+}
+DEFAULT_TTL = 60 * 60
+# Credentials never become part of a cache key, so rotating a key keeps the cache valid
+SECRET_PARAMS = {"apikey", "api_key", "key", "token", "access_token"}
+
+def normalize_params(params: Optional[Dict[str, Any]]) -> Dict[str, str]:
+    """Drops credentials and unset values and stringifies the rest, so equivalent requests share a key."""
+    return {str(name): str(value).strip() for name, value in sorted((params or {}).items()) if value is not None and str(name).lower() not in SECRET_PARAMS}
+
+def request_cache_key(endpoint: str, params: Optional[Dict[str, Any]] = None) -> str:
+    return hashlib.sha256(json.dumps([endpoint, normalize_params(params)], separators=COMPACT_SEPARATORS).encode("utf-8")).hexdigest()
+
+class ResponseCache:
+    """
+    On-disk cache of API responses keyed by endpoint and normalized params, stored in SQLite. Entries are fresh
+    for their data type's TTL; stale entries that carry an ETag or Last-Modified are revalidated with a
+    conditional request instead of being downloaded again. Once the stored bodies exceed max_bytes, the least
+    recently used entries are evicted. Safe to share between threads.
+    """
+    def __init__(self, path: str, max_bytes: int = DEFAULT_MAX_BYTES, ttls: Optional[Dict[str, float]] = None):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttls = dict(DATA_TYPE_TTLS, **(ttls or {}))
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY, data_type TEXT NOT NULL, endpoint TEXT NOT NULL, body BLOB NOT NULL, headers TEXT NOT NULL,"
+            " etag TEXT, last_modified TEXT, fetched_at REAL NOT NULL, expires_at REAL NOT NULL, last_used REAL NOT NULL, size INTEGER NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used)")
+        self._conn.commit()
+        self._bytes = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+    def ttl(self, data_type: str) -> float:
+        return self.ttls.get(data_type, DEFAULT_TTL)
+
+    def lookup(self, key: str) -> Optional[Dict[str, Any]]:
+        """Returns the entry (body, headers, etag, last_modified, fresh) for a key, or None."""
+        with self._lock:
+            row = self._conn.execute("SELECT body, headers, etag, last_modified, expires_at FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            now = time.time()
+            self._conn.execute("UPDATE responses SET last_used = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+        body, headers, etag, last_modified, expires_at = row
+        return {"body": bytes(body), "headers": json.loads(headers), "etag": etag, "last_modified": last_modified, "fresh": now < expires_at}
+
+    def store(self, key: str, data_type: str, endpoint: str, body: bytes, headers: Optional[Dict[str, str]] = None, etag: Optional[str] = None, last_modified: Optional[str] = None) -> None:
+        """Stores (or replaces) a response, then evicts least recently used entries beyond max_bytes."""
+        now = time.time()
+        with self._lock:
+            previous = self._conn.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, data_type, endpoint, body, headers, etag, last_modified, fetched_at, expires_at, last_used, size)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, data_type, endpoint, body, json.dumps(headers or {}), etag, last_modified, now, now + self.ttl(data_type), now, len(body))
+            )
+            self._bytes += len(body) - (previous[0] if previous else 0)
+            while self._bytes > self.max_bytes:
+                oldest = self._conn.execute("SELECT key, size FROM responses ORDER BY last_used LIMIT 64").fetchall()
+                if not oldest:
+                    break
+                for old_key, size in oldest:
+                    if self._bytes <= self.max_bytes:
+                        break
+                    self._conn.execute("DELETE FROM responses WHERE key = ?", (old_key,))
+                    self._bytes -= size
+                    self.evictions += 1
+            self._conn.commit()
+
+    def refresh(self, key: str, data_type: str) -> None:
+        """Marks an entry fresh again after the server confirmed it unchanged (304 Not Modified)."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute("UPDATE responses SET expires_at = ?, last_used = ? WHERE key = ?", (now + self.ttl(data_type), now, key))
+            self._conn.commit()
+
+    def record(self, outcome: str) -> None:
+        with self._lock:
+            setattr(self, outcome, getattr(self, outcome) + 1)
+
+    def call(self, data_type: str, endpoint: str, params: Optional[Dict[str, Any]], fetch: Callable[[], Any]) -> Any:
+        """
+        Returns the cached JSON result of a non-HTTP API call (e.g. the data_api client) while it is fresh,
+        otherwise calls fetch() and caches its result if it is not empty.
+        """
+        key = request_cache_key(endpoint, params)
+        entry = self.lookup(key)
+        if entry is not None and entry["fresh"]:
+            self.record("hits")
+            return json.loads(entry["body"])
+        self.record("misses")
+        result = fetch()
+        if result:
+            self.store(key, data_type, endpoint, json.dumps(result, ensure_ascii=False, separators=COMPACT_SEPARATORS).encode("utf-8"))
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        lookups = self.hits + self.revalidated + self.misses
+        return {
+            "hits": self.hits,
+            "revalidated": self.revalidated,
+            "misses": self.misses,
+            "hit_rate": (self.hits + self.revalidated) / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "entries": entries,
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes
+        }
+
+    def data_type_counts(self) -> List[Tuple[str, int, int]]:
+        with self._lock:
+            return self._conn.execute("SELECT data_type, COUNT(*), SUM(size) FROM responses GROUP BY data_type ORDER BY data_type").fetchall()
+
+    def purge_expired(self) -> int:
+        """Deletes stale entries that cannot be revalidated (no ETag or Last-Modified) and returns how many were removed."""
+        with self._lock:
+            cursor = self._conn.execute("DELETE FROM responses WHERE expires_at < ? AND etag IS NULL AND last_modified IS NULL", (time.time(),))
+            self._conn.commit()
+            self._bytes = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+            return cursor.rowcount
+
+    def clear(self) -> int:
+        with self._lock:
+            cursor = self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+            self._bytes = 0
+            return cursor.rowcount
+
+    def close(self) -> None:
+        self._conn.close()
+
+# Process-wide cache used by the collectors; enabled by configure_response_cache or $RESPONSE_CACHE_FILE
+_default_cache: Optional[ResponseCache] = None
+_default_cache_configured = False
+_default_cache_lock = threading.Lock()
+
+def configure_response_cache(path: Optional[str], max_bytes: int = DEFAULT_MAX_BYTES) -> Optional[ResponseCache]:
+    """Opens the shared response cache at path (None disables caching)."""
+    global _default_cache, _default_cache_configured
+    with _default_cache_lock:
+        if _default_cache is not None:
+            _default_cache.close()
+        _default_cache = ResponseCache(path, max_bytes) if path else None
+        _default_cache_configured = True
+    return _default_cache
+
+def get_response_cache() -> Optional[ResponseCache]:
+    if not _default_cache_configured:
+        configure_response_cache(os.getenv("RESPONSE_CACHE_FILE"))
+    return _default_cache
+
+def cached_call(data_type: str, endpoint: str, params: Optional[Dict[str, Any]], fetch: Callable[[], Any]) -> Any:
+    """ResponseCache.call on the shared cache, or a plain fetch() when caching is disabled."""
+    cache = get_response_cache()
+    return cache.call(data_type, endpoint, params, fetch) if cache is not None else fetch()
+
+def print_cache_stats() -> None:
+    cache = _default_cache
+    if cache is None:
+        return
+    cache_stats = cache.stats()
+    print(f"Response cache {cache.path}: {cache_stats['hits']} hits, {cache_stats['revalidated']} revalidated, {cache_stats['misses']} misses "
+          f"({cache_stats['hit_rate']:.1%} served from cache), {cache_stats['evictions']} evictions, {cache_stats['entries']} entries, {cache_stats['bytes'] / 1e6:.1f} MB.")
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect, purge or clear the collectors' on-disk API response cache.")
+    parser.add_argument("cache_file", type=str, help="Path to the SQLite response cache.")
+    parser.add_argument("--purge_expired", action="store_true", help="Delete expired entries that cannot be revalidated.")
+    parser.add_argument("--clear", action="store_true", help="Delete every cached response.")
+
+    args = parser.parse_args()
+
+    if not os.path.exists(args.cache_file):
+        print(f"Error: Cache file not found: {args.cache_file}")
+        return
+    cache = ResponseCache(args.cache_file)
+    if args.clear:
+        print(f"Cleared {cache.clear()} cached responses from {args.cache_file}")
+    elif args.purge_expired:
+        print(f"Purged {cache.purge_expired()} expired responses from {args.cache_file}")
+    else:
+        for data_type, count, size in cache.data_type_counts():
+            print(f"{data_type}: {count} responses, {size / 1e6:.1f} MB")
+        print(f"Total: {cache.stats()['entries']} entries, {cache.stats()['bytes'] / 1e6:.1f} MB")
+    cache.close()
+
+if __name__ == "__main__":
+    main()
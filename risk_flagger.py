@@ -1,10 +1,14 @@
 #!/usr/bin/env python3.11
+import os
 import json
+import heapq
 import argparse
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Iterable, Iterator
 import re
 from decimal import Decimal, InvalidOperation
 
+from json_stream import iter_json_records, iter_nested_array_items, open_record_stream, load_json, is_ndjson_path, write_records, save_json, reserve_stdout_for_records, NotARecordStreamError
+
 def check_team_anonymity(text_content: Optional[str]) -> bool:
     """Checks for indicators of an anonymous team in the text."""
     if not text_content:
@@ -36,22 +40,27 @@ def check_roadmap_clarity(text_content: Optional[str]) -> bool:
         return True
     return False
 
-def check_token_holder_concentration(token_holder_data: Optional[List[Dict[str, str]]], token_decimals: int = 18, top_n: int = 10, threshold_percentage: float = 50.0) -> Optional[str]:
+def check_token_holder_concentration(token_holder_data: Optional[Iterable[Dict[str, str]]], token_decimals: int = 18, top_n: int = 10, threshold_percentage: float = 50.0) -> Optional[str]:
     """Analyzes token holder data for concentration.
+    Holders are consumed in a single pass, keeping only the top_n balances and a running total,
+    so token_holder_data may be a streamed iterator of any length.
     Args:
-        token_holder_data: A list of dictionaries, where each dict has at least "TokenHolderAddress" and "TokenHolderQuantity".
+        token_holder_data: An iterable of dictionaries, where each dict has at least "TokenHolderAddress" and "TokenHolderQuantity".
         token_decimals: The number of decimals the token uses.
         top_n: The number of top holders to consider for concentration.
         threshold_percentage: The concentration percentage that triggers a warning.
     """
-    if not token_holder_data:
+    if token_holder_data is None:
         return "Token holder data not available or empty."
 
-    # Convert quantities to Decimal and sort by quantity
-    holders_with_balances = []
+    # Min-heap of the top_n balances seen so far, plus the running total over all holders
+    top_balances: List[Decimal] = []
     total_supply_from_holders = Decimal("0")
+    seen_holders = False
+    valid_holders = False
 
     for holder in token_holder_data:
+        seen_holders = True
         try:
             quantity_str = holder.get("TokenHolderQuantity")
             if quantity_str is None:
@@ -59,26 +68,31 @@ def check_token_holder_concentration(token_holder_data: Optional[List[Dict[str,
                 continue
             # Etherscan API returns quantity as a string representing the raw amount (needs division by 10**decimals)
             balance = Decimal(quantity_str) / (Decimal("10") ** token_decimals)
-            holders_with_balances.append({"address": holder.get("TokenHolderAddress"), "balance": balance})
+            if top_n > 0:
+                if len(top_balances) < top_n:
+                    heapq.heappush(top_balances, balance)
+                else:
+                    heapq.heappushpop(top_balances, balance)
             total_supply_from_holders += balance
+            valid_holders = True
         except InvalidOperation:
             print(f"Warning: Could not convert TokenHolderQuantity 	'{holder.get('TokenHolderQuantity')}	' to Decimal for holder: {holder.get('TokenHolderAddress')}")
             continue
         except Exception as e:
             print(f"Warning: Error processing holder {holder.get('TokenHolderAddress')}: {e}")
             continue
-            
-    if not holders_with_balances:
+
+    if not seen_holders:
+        return "Token holder data not available or empty."
+
+    if not valid_holders:
         return "No valid token holder balances could be processed."
 
     if total_supply_from_holders == Decimal("0"):
         return "Total supply calculated from holder data is zero, cannot assess concentration."
 
-    # Sort by balance in descending order
-    sorted_holders = sorted(holders_with_balances, key=lambda x: x["balance"], reverse=True)
-
-    # Calculate concentration for top N holders
-    top_n_sum = sum(h["balance"] for h in sorted_holders[:top_n])
+    # Sum the top N holders largest first, matching the previous sorted-list summation
+    top_n_sum = sum(sorted(top_balances, reverse=True))
     
     if total_supply_from_holders > 0:
         concentration_percentage = (top_n_sum / total_supply_from_holders) * Decimal("100")
@@ -90,6 +104,16 @@ def check_token_holder_concentration(token_holder_data: Optional[List[Dict[str,
     else:
         return f"Concentration check: Top {top_n} holders own {concentration_percentage:.2f}% of the analyzed supply."
 
+def iter_token_holders(path: str) -> Iterator[Dict[str, Any]]:
+    """
+    Streams token holders from a tokenholderlist output file: a top-level array (or NDJSON),
+    or a saved raw API response whose holders are under "result".
+    """
+    try:
+        yield from iter_json_records(path)
+    except NotARecordStreamError:
+        yield from iter_nested_array_items(path, "result")
+
 def identify_risk_flags(project_data: Dict[str, Any]) -> Dict[str, Any]:
     """Identifies risk flags based on various data points for a project."""
     flags = {}
@@ -105,7 +129,7 @@ def identify_risk_flags(project_data: Dict[str, Any]) -> Dict[str, Any]:
     flags["whitepaper_missing_flag"] = not check_whitepaper_availability(website_text, website_url)
     flags["roadmap_unclear_flag"] = not check_roadmap_clarity(website_text)
 
-    token_holders_raw = project_data.get("token_holder_data") # Expects list of dicts from Etherscan collector
+    token_holders_raw = project_data.get("token_holder_data") # Expects list (or iterator) of dicts from Etherscan collector
     # Assuming token_decimals is either passed in project_data or we use a default
     token_decimals_val = project_data.get("token_decimals", 18) 
     flags["token_concentration_analysis"] = check_token_holder_concentration(token_holders_raw, token_decimals_val)
@@ -127,44 +151,83 @@ def identify_risk_flags(project_data: Dict[str, Any]) -> Dict[str, Any]:
         "active_flags_summary": active_flags_summary
     }
 
+def iter_project_risk_flags(projects: Iterable[Dict[str, Any]], default_project_id: str, token_decimals: int) -> Iterator[Dict[str, Any]]:
+    """Flags one aggregated project per input record (NDJSON input), yielding each result as it is ready."""
+    for line_number, input_data_content in enumerate(projects, start=1):
+        if not isinstance(input_data_content, dict):
+            yield {"project_identifier": f"{default_project_id}_{line_number}", "error": "Malformed project record"}
+            continue
+        project_id = input_data_content.get("project_id") or input_data_content.get("identifier") or f"{default_project_id}_{line_number}"
+        yield identify_risk_flags({
+            "identifier": project_id,
+            "scraped_website_content": input_data_content.get("scraped_website_content"),
+            "token_holder_data": input_data_content.get("token_holder_data"),
+            "token_decimals": input_data_content.get("token_decimals", token_decimals)
+        })
+
 def main():
     parser = argparse.ArgumentParser(description="Identify risk flags for a project based on aggregated data.")
-    parser.add_argument("-i", "--input_file", type=str, required=True, help="Path to the input JSON file containing aggregated project data (e.g., website scrape, token holders)." )
-    parser.add_argument("-o", "--output_file", type=str, required=True, help="Path to the output JSON file with identified risk flags.")
+    parser.add_argument("-i", "--input_file", type=str, required=True, help="Path to the input JSON file containing aggregated project data (e.g., website scrape, token holders). NDJSON input ('-' for stdin) holds one project per line." )
+    parser.add_argument("-o", "--output_file", type=str, required=True, help="Path to the output JSON file with identified risk flags; *.ndjson / *.jsonl or '-' (stdout) writes compact NDJSON.")
     parser.add_argument("--project_id", type=str, default="unknown_project", help="An identifier for the project being analyzed.")
+    parser.add_argument("--token_holders_file", type=str, default=None, help="Optional tokenholderlist JSON/NDJSON file; holders are streamed from it instead of read from the input file's 'token_holder_data'.")
     parser.add_argument("--token_decimals", type=int, default=18, help="The number of decimals for the token being analyzed (used for holder concentration).")
 
     args = parser.parse_args()
+    reserve_stdout_for_records(args.output_file)
 
     try:
-        with open(args.input_file, "r", encoding="utf-8") as f:
-            input_data_content = json.load(f)
+        if is_ndjson_path(args.input_file):
+            input_data_content = open_record_stream(args.input_file)
+        else:
+            input_data_content = load_json(args.input_file)
     except FileNotFoundError:
         print(f"Error: Input file not found: {args.input_file}")
         return
-    except json.JSONDecodeError:
+    except (json.JSONDecodeError, NotARecordStreamError):
         print(f"Error: Could not decode JSON from input file: {args.input_file}")
         return
 
+    if not isinstance(input_data_content, dict):
+        # Multi-project input: one aggregated project per record
+        print(f"Identifying risk flags for each project in file: {args.input_file}")
+        try:
+            count = write_records(args.output_file, iter_project_risk_flags(input_data_content, args.project_id, args.token_decimals))
+            print(f"Risk flag analysis results for {count} projects saved to {args.output_file}")
+        except json.JSONDecodeError:
+            print(f"Error: Could not decode JSON from input file: {args.input_file}")
+        except Exception as e:
+            print(f"Error writing risk flag results to {args.output_file}: {e}")
+        return
+
+    token_holder_data = input_data_content.get("token_holder_data")
+    if args.token_holders_file:
+        if not os.path.exists(args.token_holders_file):
+            print(f"Error: Token holders file not found: {args.token_holders_file}")
+            return
+        token_holder_data = iter_token_holders(args.token_holders_file)
+
     # The input_file is now expected to be a dictionary that might contain
     # 'scraped_website_content' and/or 'token_holder_data' keys.
     project_data_for_flagger = {
         "identifier": args.project_id,
         "scraped_website_content": input_data_content.get("scraped_website_content"),
-        "token_holder_data": input_data_content.get("token_holder_data"),
+        "token_holder_data": token_holder_data,
         "token_decimals": args.token_decimals # Pass token decimals from CLI or use default
     }
 
     print(f"Identifying risk flags for project: {args.project_id} from file: {args.input_file}")
-    risk_analysis_results = identify_risk_flags(project_data_for_flagger)
+    try:
+        risk_analysis_results = identify_risk_flags(project_data_for_flagger)
+    except json.JSONDecodeError:
+        print(f"Error: Could not decode JSON from token holders file: {args.token_holders_file}")
+        return
 
     try:
-        with open(args.output_file, "w", encoding="utf-8") as f:
-            json.dump(risk_analysis_results, f, ensure_ascii=False, indent=4)
+        save_json(args.output_file, risk_analysis_results)
         print(f"Risk flag analysis results saved to {args.output_file}")
     except Exception as e:
         print(f"Error writing risk flag results to {args.output_file}: {e}")
 
 if __name__ == "__main__":
     main()
-
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3.11
+import os
+import json
+import hashlib
+import threading
+from typing import List, Dict, Any, Optional, Tuple
+
+import pandas as pd
+import numpy as np
+
+from columnar_store import read_scores, parse_tweet_id
+
+class ScoreSnapshot:
+    """
+    An immutable, fully indexed view of one version of the integrated scores file.
+    Requests hold a reference to a snapshot, so a concurrent reload never mixes two versions.
+    """
+    def __init__(self, df: pd.DataFrame, signature: Optional[Tuple[int, int]], source_path: Optional[str] = None):
+        self.signature = signature
+        self.source_path = source_path
+        self.df = df.reset_index(drop=True) # Typed frame, used for server-side filtering and sorting
+        self.columns: List[str] = list(df.columns)
+        self.score_columns: List[str] = [col for col in self.columns if col.endswith("_0_10") and pd.api.types.is_numeric_dtype(df[col])]
+        self._sort_orders: Dict[Tuple[str, bool], np.ndarray] = {}
+        self._sort_lock = threading.Lock()
+
+        records_df = df.replace({pd.NA: None, np.nan: None}) if not df.empty else df
+        self.records: List[Dict[str, Any]] = records_df.to_dict(orient="records") if not df.empty else []
+        self.by_screen_name: Dict[str, Dict[str, Any]] = {}
+        self.by_tweet_id: Dict[int, Dict[str, Any]] = {}
+
+        for record in self.records:
+            # Keep the first match, mirroring the previous `iloc[0]` lookup semantics
+            screen_name = record.get("user_screen_name")
+            if screen_name is not None:
+                self.by_screen_name.setdefault(str(screen_name), record)
+            tweet_id = parse_tweet_id(record.get("tweet_id"))
+            if tweet_id is not None:
+                self.by_tweet_id.setdefault(tweet_id, record)
+
+        self.scores_json: bytes = json.dumps({"scores": self.records}, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        # Data version used for HTTP validators; changes whenever the served content changes
+        self.version: str = hashlib.sha1(self.scores_json).hexdigest()
+        self.last_modified: Optional[float] = signature[0] / 1e9 if signature else None
+        # Compressed variants of scores_json, keyed by content-coding and filled on first use
+        self.encoded_scores_json: Dict[str, bytes] = {}
+
+    def find(self, identifier: str) -> Optional[Dict[str, Any]]:
+        """Finds a record by user_screen_name first, then by tweet_id."""
+        record = self.by_screen_name.get(identifier)
+        if record is not None:
+            return record
+        # Accepts both plain integer IDs and legacy float-formatted IDs such as '1.92e+18'
+        tweet_id_identifier = parse_tweet_id(identifier)
+        if tweet_id_identifier is None:
+            return None # Not a valid tweet_id format we expect
+        return self.by_tweet_id.get(tweet_id_identifier)
+
+    def _sort_order(self, sort_column: str, descending: bool) -> np.ndarray:
+        """Returns (and caches) the row order for a sort column. Missing values always sort last."""
+        key = (sort_column, descending)
+        order = self._sort_orders.get(key)
+        if order is None:
+            with self._sort_lock:
+                order = self._sort_orders.get(key)
+                if order is None:
+                    order = self.df[sort_column].sort_values(ascending=not descending, kind="mergesort", na_position="last").index.to_numpy()
+                    self._sort_orders[key] = order
+        return order
+
+    def query(self, offset: int = 0, limit: Optional[int] = None, sort_column: Optional[str] = None, descending: bool = False, ranges: Optional[Dict[str, Tuple[Optional[float], Optional[float]]]] = None, fields: Optional[List[str]] = None) -> Dict[str, Any]:
+        """
+        Returns one page of records, filtered by inclusive score ranges, sorted and projected server-side.
+        Raises ValueError for unknown columns or invalid paging parameters.
+        """
+        if offset < 0:
+            raise ValueError("offset must be non-negative")
+        if limit is not None and limit < 1:
+            raise ValueError("limit must be positive")
+        if sort_column is not None and sort_column not in self.columns:
+            raise ValueError(f"Unknown sort column: {sort_column}")
+        if fields:
+            unknown_fields = [field for field in fields if field not in self.columns]
+            if unknown_fields:
+                raise ValueError(f"Unknown fields: {', '.join(unknown_fields)}")
+
+        if sort_column is not None:
+            row_positions = self._sort_order(sort_column, descending)
+        else:
+            row_positions = np.arange(len(self.records))
+
+        if ranges:
+            mask = np.ones(len(self.records), dtype=bool)
+            for column, (lower, upper) in ranges.items():
+                if column not in self.score_columns:
+                    raise ValueError(f"Range filters are only supported on score columns: {column}")
+                values = self.df[column].to_numpy(dtype=float, na_value=np.nan)
+                if lower is not None:
+                    mask &= values >= lower
+                if upper is not None:
+                    mask &= values <= upper
+            row_positions = row_positions[mask[row_positions]]
+
+        total = len(row_positions)
+        end = total if limit is None else min(offset + limit, total)
+        page_positions = row_positions[offset:end]
+
+        if fields:
+            page = [{field: self.records[i][field] for field in fields} for i in page_positions]
+        else:
+            page = [self.records[i] for i in page_positions]
+
+        return {
+            "scores": page,
+            "total": total,
+            "offset": offset,
+            "limit": limit,
+            "next_offset": end if end < total else None
+        }
+
+class ScoreStore:
+    """
+    Process-wide cache of the integrated scores file (Parquet, or a legacy CSV).
+    The file is parsed once and only reloaded when its mtime or size changes. If source_path does not
+    exist, fallback_path (e.g. the CSV a deployment still ships) is served instead until it does.
+    """
+    def __init__(self, source_path: str, fallback_path: Optional[str] = None):
+        self.source_path = source_path
+        self.fallback_path = fallback_path
+        self._lock = threading.Lock()
+        self._snapshot: Optional[ScoreSnapshot] = None
+
+    def _current_source(self) -> Optional[Tuple[str, Tuple[int, int]]]:
+        """The first existing file of source_path and fallback_path, with its (mtime, size) signature."""
+        for path in (self.source_path, self.fallback_path):
+            if path is None:
+                continue
+            try:
+                stat_result = os.stat(path)
+            except FileNotFoundError:
+                continue
+            return path, (stat_result.st_mtime_ns, stat_result.st_size)
+        return None
+
+    def _load(self, path: str, signature: Tuple[int, int]) -> ScoreSnapshot:
+        try:
+            df = read_scores(path)
+        except pd.errors.EmptyDataError:
+            df = pd.DataFrame()
+        if path == self.source_path:
+            print(f"Loaded {len(df)} score records from {path}")
+        else:
+            print(f"Loaded {len(df)} score records from fallback {path} ({self.source_path} not found; "
+                  f"convert with `python columnar_store.py -i {path} -o {self.source_path}`)")
+        return ScoreSnapshot(df, signature, path)
+
+    def get_snapshot(self) -> Optional[ScoreSnapshot]:
+        """
+        Returns the current snapshot, reloading the source file first if it has changed (or the primary
+        file has appeared in place of the fallback). Returns None if neither file exists.
+        """
+        current = self._current_source()
+        if current is None:
+            return None
+        path, signature = current
+        snapshot = self._snapshot
+        if snapshot is not None and (snapshot.source_path, snapshot.signature) == current:
+            return snapshot
+        with self._lock:
+            # Another thread may have reloaded while we waited for the lock
+            if self._snapshot is None or (self._snapshot.source_path, self._snapshot.signature) != current:
+                self._snapshot = self._load(path, signature)
+            return self._snapshot
@@ -1,19 +1,41 @@
 #!/usr/bin/env python3.11
+import os
+import sys
 import json
+import time
 import argparse
-import pandas as pd
-from transformers import pipeline
-from nltk.sentiment.vader import SentimentIntensityAnalyzer
-import nltk # NLTK is required for VADER
-from typing import List, Dict, Any, Optional
+import functools
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Any, Optional, Iterable, Iterator, Tuple, Callable
+
+from json_stream import open_record_stream, load_json, write_records, reserve_stdout_for_records, NotARecordStreamError
+from sentiment_cache import SentimentCache, DEFAULT_MAX_ENTRIES
 
 # Global variable for the initialized pipeline or VADER analyzer
 ANALYSIS_TOOL = None
 CURRENT_MODEL_NAME = None
+CURRENT_BACKEND = None
+
+# Inference backends for the transformer models: full-precision PyTorch, PyTorch with dynamic int8
+# quantization of the Linear layers, or ONNX Runtime (exported on load; requires optimum[onnxruntime])
+BACKENDS = ["pytorch", "quantized", "onnx"]
+
+TRANSFORMER_MODELS = ["distilbert", "twitter-roberta"]
+DEFAULT_BATCH_SIZE = 32
+# Records are read this many batches at a time and sorted by text length within that window,
+# so each batch pads to a similar length while the output keeps the input order
+LENGTH_BUCKET_WINDOW_BATCHES = 8
+
+# How transformer inputs longer than the model's token limit are handled: "chunk" scores every
+# token window (up to MAX_CHUNKS_PER_TEXT) and aggregates them; "truncate" keeps the first window only
+LONG_TEXT_MODES = ["chunk", "truncate"]
+LONG_TEXT_MODE = "chunk"
+MAX_CHUNKS_PER_TEXT = 16
 
 def download_nltk_resources_if_needed():
     """Downloads NLTK resources required for VADER if not already present."""
     try:
+        import nltk # NLTK is required for VADER only
         nltk.data.find("sentiment/vader_lexicon.zip")
         print("VADER lexicon found.")
     except LookupError: # Corrected exception type
@@ -23,20 +45,36 @@ def download_nltk_resources_if_needed():
     except Exception as e:
         print(f"Error checking/downloading VADER lexicon: {e}")
 
-def initialize_analysis_tool(model_name_or_type: str = "distilbert"):
+def build_transformer_pipeline(hf_model_name: str, backend: str = "pytorch"):
+    """Builds a sentiment-analysis pipeline for a Hugging Face checkpoint on the selected CPU backend."""
+    from transformers import pipeline # Imported here so VADER runs and --help never load transformers/torch
+    if backend == "onnx":
+        from optimum.onnxruntime import ORTModelForSequenceClassification
+        from transformers import AutoTokenizer
+        ort_model = ORTModelForSequenceClassification.from_pretrained(hf_model_name, export=True)
+        return pipeline("sentiment-analysis", model=ort_model, tokenizer=AutoTokenizer.from_pretrained(hf_model_name))
+    hf_pipeline = pipeline("sentiment-analysis", model=hf_model_name)
+    if backend == "quantized":
+        import torch
+        hf_pipeline.model = torch.quantization.quantize_dynamic(hf_pipeline.model, {torch.nn.Linear}, dtype=torch.qint8)
+    return hf_pipeline
+
+def initialize_analysis_tool(model_name_or_type: str = "distilbert", backend: str = "pytorch"):
     """Initializes the selected sentiment analysis tool (Hugging Face pipeline or VADER)."""
-    global ANALYSIS_TOOL, CURRENT_MODEL_NAME
+    global ANALYSIS_TOOL, CURRENT_MODEL_NAME, CURRENT_BACKEND
     
-    if ANALYSIS_TOOL is not None and CURRENT_MODEL_NAME == model_name_or_type:
+    if ANALYSIS_TOOL is not None and CURRENT_MODEL_NAME == model_name_or_type and (CURRENT_BACKEND == backend or model_name_or_type == "vader"):
         print(f"Analysis tool ({model_name_or_type}) already initialized.")
         return
 
-    print(f"Initializing sentiment analysis tool: {model_name_or_type}...")
+    print(f"Initializing sentiment analysis tool: {model_name_or_type} ({backend} backend)...")
     CURRENT_MODEL_NAME = model_name_or_type
+    CURRENT_BACKEND = backend
     
     if model_name_or_type.lower() == "vader":
         download_nltk_resources_if_needed()
         try:
+            from nltk.sentiment.vader import SentimentIntensityAnalyzer
             ANALYSIS_TOOL = SentimentIntensityAnalyzer()
             print("VADER sentiment analyzer initialized successfully.")
         except Exception as e:
@@ -46,8 +84,8 @@ def initialize_analysis_tool(model_name_or_type: str = "distilbert"):
     elif model_name_or_type.lower() == "distilbert":
         hf_model_name = "distilbert-base-uncased-finetuned-sst-2-english"
         try:
-            ANALYSIS_TOOL = pipeline("sentiment-analysis", model=hf_model_name)
-            print(f"Hugging Face pipeline ({hf_model_name}) initialized successfully.")
+            ANALYSIS_TOOL = build_transformer_pipeline(hf_model_name, backend)
+            print(f"Hugging Face pipeline ({hf_model_name}, {backend}) initialized successfully.")
         except Exception as e:
             print(f"Error initializing Hugging Face pipeline ({hf_model_name}): {e}")
             ANALYSIS_TOOL = None
@@ -55,8 +93,8 @@ def initialize_analysis_tool(model_name_or_type: str = "distilbert"):
     elif model_name_or_type.lower() == "twitter-roberta":
         hf_model_name = "cardiffnlp/twitter-roberta-base-sentiment-latest"
         try:
-            ANALYSIS_TOOL = pipeline("sentiment-analysis", model=hf_model_name)
-            print(f"Hugging Face pipeline ({hf_model_name}) initialized successfully.")
+            ANALYSIS_TOOL = build_transformer_pipeline(hf_model_name, backend)
+            print(f"Hugging Face pipeline ({hf_model_name}, {backend}) initialized successfully.")
         except Exception as e:
             print(f"Error initializing Hugging Face pipeline ({hf_model_name}): {e}")
             ANALYSIS_TOOL = None
@@ -65,7 +103,7 @@ def initialize_analysis_tool(model_name_or_type: str = "distilbert"):
         print(f"Error: Unknown model name or type 	'{model_name_or_type}'. Defaulting to DistilBERT if possible or None.")
         # Attempt to default or handle error
         try:
-            ANALYSIS_TOOL = pipeline("sentiment-analysis", model="distilbert-base-uncased-finetuned-sst-2-english")
+            ANALYSIS_TOOL = build_transformer_pipeline("distilbert-base-uncased-finetuned-sst-2-english", backend)
             CURRENT_MODEL_NAME = "distilbert"
             print("Defaulted to DistilBERT pipeline.")
         except Exception as e:
@@ -73,6 +111,123 @@ def initialize_analysis_tool(model_name_or_type: str = "distilbert"):
             ANALYSIS_TOOL = None
             CURRENT_MODEL_NAME = None
 
+def configure_inference_threads(num_threads: Optional[int]) -> None:
+    """Sets the intra-op thread count PyTorch uses for CPU inference (None keeps the library default)."""
+    if not num_threads:
+        return
+    try:
+        import torch
+    except ImportError:
+        print("Warning: PyTorch is not available; the inference thread count was not changed.")
+        return
+    torch.set_num_threads(num_threads)
+    print(f"Using {num_threads} intra-op threads for CPU inference.")
+
+def configure_long_text_handling(mode: str = "chunk", max_chunks: int = 16) -> None:
+    """Selects how transformer inputs longer than the model's token limit are handled (see LONG_TEXT_MODES)."""
+    global LONG_TEXT_MODE, MAX_CHUNKS_PER_TEXT
+    if mode not in LONG_TEXT_MODES:
+        raise ValueError(f"Unknown long text mode: {mode}")
+    LONG_TEXT_MODE = mode
+    MAX_CHUNKS_PER_TEXT = max(1, max_chunks)
+
+def result_cache_key(model_name: str, backend: Optional[str] = None) -> str:
+    """
+    Cache key for a model's results; transformer keys include the backend (default: the current one)
+    and the long-text handling, which change scores.
+    """
+    if model_name not in TRANSFORMER_MODELS:
+        return model_name
+    backend = backend or CURRENT_BACKEND
+    # Quantized and ONNX scores differ slightly from full precision, so each backend has its own entries
+    if backend and backend != "pytorch":
+        model_name = f"{model_name}[{backend}]"
+    if LONG_TEXT_MODE == "truncate":
+        return f"{model_name}:truncate"
+    return f"{model_name}:chunk{MAX_CHUNKS_PER_TEXT}"
+
+def max_content_tokens(tokenizer) -> int:
+    """Tokens of text per model input: the model's maximum length minus the special tokens added around it."""
+    max_length = tokenizer.model_max_length
+    if not max_length or max_length > 4096: # Tokenizers without a configured limit report a huge sentinel
+        max_length = 512
+    return max_length - tokenizer.num_special_tokens_to_add(pair=False)
+
+def pretokenize_texts(tokenizer, texts: List[str]) -> List[Tuple[List[List[int]], bool]]:
+    """
+    Tokenizes all texts in one call to the fast tokenizer, then splits each into token windows that fit
+    the model. Returns (chunks, truncated) per text; truncated is set when tokens beyond the kept chunks were dropped.
+    """
+    max_tokens = max_content_tokens(tokenizer)
+    max_chunks = 1 if LONG_TEXT_MODE == "truncate" else MAX_CHUNKS_PER_TEXT
+    encoded = tokenizer(texts, add_special_tokens=False, truncation=False, verbose=False)["input_ids"]
+    pretokenized = []
+    for token_ids in encoded:
+        chunks = [token_ids[start:start + max_tokens] for start in range(0, len(token_ids), max_tokens)] or [[]]
+        pretokenized.append((chunks[:max_chunks], len(chunks) > max_chunks))
+    return pretokenized
+
+def score_pretokenized_texts(texts: List[str], batch_size: int = DEFAULT_BATCH_SIZE, bucket_by_length: bool = True) -> List[Dict[str, Any]]:
+    """
+    Scores texts with the initialized transformer pipeline's tokenizer and model directly: token windows
+    from all texts are batched together (sorted by token length to minimize padding), and each text's
+    label probabilities are averaged over its windows, weighted by token count.
+    """
+    import numpy as np
+    import torch
+
+    tokenizer, model = ANALYSIS_TOOL.tokenizer, ANALYSIS_TOOL.model
+    pretokenized = pretokenize_texts(tokenizer, texts)
+    windows = [(text_index, chunk) for text_index, (chunks, _) in enumerate(pretokenized) for chunk in chunks]
+    order = list(range(len(windows)))
+    if bucket_by_length:
+        order.sort(key=lambda k: len(windows[k][1]))
+
+    window_probabilities: List[Optional[np.ndarray]] = [None] * len(windows)
+    with torch.inference_mode():
+        for batch_start in range(0, len(order), batch_size):
+            batch_keys = order[batch_start:batch_start + batch_size]
+            features = tokenizer.pad(
+                {"input_ids": [tokenizer.build_inputs_with_special_tokens(windows[k][1]) for k in batch_keys]},
+                return_tensors="pt"
+            )
+            features = {name: tensor.to(model.device) for name, tensor in features.items()}
+            probabilities = torch.softmax(model(**features).logits.float(), dim=-1).cpu().numpy()
+            for k, window_probs in zip(batch_keys, probabilities):
+                window_probabilities[k] = window_probs
+
+    weighted_sums = [None] * len(texts)
+    weights = [0] * len(texts)
+    for (text_index, chunk), window_probs in zip(windows, window_probabilities):
+        weight = max(len(chunk), 1)
+        weighted = window_probs * weight
+        weighted_sums[text_index] = weighted if weighted_sums[text_index] is None else weighted_sums[text_index] + weighted
+        weights[text_index] += weight
+
+    id2label = model.config.id2label
+    results = []
+    for text_index, (chunks, truncated) in enumerate(pretokenized):
+        mean_probs = weighted_sums[text_index] / weights[text_index]
+        label_id = int(mean_probs.argmax())
+        result = normalize_hf_result({"label": id2label[label_id], "score": float(mean_probs[label_id])})
+        if len(chunks) > 1:
+            result["num_chunks"] = len(chunks)
+        if truncated:
+            result["truncated"] = True
+        results.append(result)
+    return results
+
+def normalize_hf_result(hf_result: Dict[str, Any]) -> Dict[str, Any]:
+    """Normalizes RoBERTa labels (LABEL_0, LABEL_1, LABEL_2 to Negative, Neutral, Positive)."""
+    if CURRENT_MODEL_NAME == "twitter-roberta":
+        if hf_result["label"] == "LABEL_0":
+            hf_result["label"] = "NEGATIVE"
+        elif hf_result["label"] == "LABEL_1":
+            hf_result["label"] = "NEUTRAL"
+        elif hf_result["label"] == "LABEL_2":
+            hf_result["label"] = "POSITIVE"
+    return hf_result
+
 def analyze_sentiment_with_tool(text: str) -> Dict[str, Any]:
     """Analyzes the sentiment of a given text string using the initialized tool."""
     if ANALYSIS_TOOL is None:
@@ -93,26 +248,9 @@ def analyze_sentiment_with_tool(text: str) -> Dict[str, Any]:
                 label = "NEUTRAL"
             return {"label": label, "score": compound_score, "vader_scores": vader_scores} # score is compound
         
-        elif CURRENT_MODEL_NAME in ["distilbert", "twitter-roberta"]:
-            # Hugging Face pipelines return a list of dictionaries, e.g., [{'label': 'POSITIVE', 'score': 0.9998}]
-            # Truncate text to avoid issues with model max length. Common models have 512 token limit.
-            max_length = 510 # A bit less than 512 to be safe with tokenization
-            truncated_text = text[:max_length] if len(text) > max_length else text
-            
-            result = ANALYSIS_TOOL(truncated_text)
-            if result and isinstance(result, list) and len(result) > 0:
-                # Normalize RoBERTa labels (LABEL_0, LABEL_1, LABEL_2 to Negative, Neutral, Positive)
-                hf_result = result[0]
-                if CURRENT_MODEL_NAME == "twitter-roberta":
-                    if hf_result["label"] == "LABEL_0":
-                        hf_result["label"] = "NEGATIVE"
-                    elif hf_result["label"] == "LABEL_1":
-                        hf_result["label"] = "NEUTRAL"
-                    elif hf_result["label"] == "LABEL_2":
-                        hf_result["label"] = "POSITIVE"
-                return hf_result
-            else:
-                return {"label": "NEUTRAL", "score": 0.0, "error": "Sentiment analysis returned no result"}
+        elif CURRENT_MODEL_NAME in TRANSFORMER_MODELS:
+            # Token-aware: long texts are chunked by tokens (or truncated by tokens), never cut by characters
+            return score_pretokenized_texts([text], batch_size=1)[0]
         else:
             return {"error": f"Analysis logic not implemented for model: {CURRENT_MODEL_NAME}"}
             
@@ -120,39 +258,256 @@ def analyze_sentiment_with_tool(text: str) -> Dict[str, Any]:
         print(f"Error during sentiment analysis for text 	'{text[:50]}...	' with {CURRENT_MODEL_NAME}: {e}")
         return {"label": "ERROR", "score": 0.0, "error": str(e)}
 
-def process_data_for_sentiment(data: List[Dict[str, Any]], text_key: str, id_key: str, model_name_or_type: str) -> List[Dict[str, Any]]:
+def analyze_sentiment_batch(texts: List[Any], batch_size: int = DEFAULT_BATCH_SIZE, bucket_by_length: bool = True) -> List[Dict[str, Any]]:
+    """
+    Analyzes a batch of texts with the initialized tool. For transformers, all valid texts are
+    pre-tokenized in bulk and their token windows scored in padded batches of batch_size;
+    VADER (which has no batched form) scores them one by one.
+    """
+    if ANALYSIS_TOOL is None or CURRENT_MODEL_NAME not in TRANSFORMER_MODELS:
+        return [analyze_sentiment_with_tool(text) for text in texts]
+
+    results: List[Optional[Dict[str, Any]]] = [None] * len(texts)
+    valid_positions = []
+    for position, text in enumerate(texts):
+        if isinstance(text, str) and text.strip():
+            valid_positions.append(position)
+        else:
+            results[position] = analyze_sentiment_with_tool(text)
+    if not valid_positions:
+        return results
+
+    try:
+        outputs = score_pretokenized_texts([texts[position] for position in valid_positions], batch_size, bucket_by_length)
+    except Exception as e:
+        print(f"Error during batched sentiment analysis with {CURRENT_MODEL_NAME}: {e}. Retrying the batch one record at a time.")
+        outputs = [analyze_sentiment_with_tool(texts[position]) for position in valid_positions]
+
+    for position, output in zip(valid_positions, outputs):
+        results[position] = output
+    return results
+
+def _score_window(records: List[Any], text_key: str, result_key: str, batch_size: int, bucket_by_length: bool, stats: Dict[str, float], cache: Optional[SentimentCache] = None, model_key: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Scores one window of records and yields them in input order. Each distinct text is scored once,
+    texts already in the cache are not scored at all, and the rest run in (length-sorted) batches.
+    """
+    positions = [i for i, record in enumerate(records) if isinstance(record, dict)]
+    texts = {i: records[i].get(text_key) for i in positions}
+    valid_texts = [texts[i] for i in positions if isinstance(texts[i], str) and texts[i].strip()]
+
+    started = time.perf_counter()
+    results_by_text: Dict[str, Dict[str, Any]] = cache.get_many(model_key, valid_texts) if cache is not None else {}
+    pending_texts = list(dict.fromkeys(text for text in valid_texts if text not in results_by_text))
+
+    new_results = list(zip(pending_texts, analyze_sentiment_batch(pending_texts, batch_size, bucket_by_length)))
+    results_by_text.update(new_results)
+    if cache is not None:
+        # Failed analyses are not cached, so they are retried on the next run
+        cache.put_many(model_key, [(text, result) for text, result in new_results if "error" not in result])
+
+    for i in positions:
+        text = texts[i]
+        if text in results_by_text:
+            records[i][result_key] = dict(results_by_text[text])
+        else:
+            records[i][result_key] = analyze_sentiment_with_tool(text) # Empty or invalid text
+    stats["inference_sec"] += time.perf_counter() - started
+    stats["records"] += len(positions)
+    stats["scored_texts"] += len(pending_texts)
+
+    for record in records:
+        if not isinstance(record, dict):
+            yield {"original_record_error": "Malformed record", "data": record}
+        else:
+            yield record
+
+def process_data_for_sentiment(data: List[Dict[str, Any]], text_key: str, id_key: str, model_name_or_type: str, batch_size: int = DEFAULT_BATCH_SIZE, bucket_by_length: bool = True, cache: Optional[SentimentCache] = None, backend: str = "pytorch") -> List[Dict[str, Any]]:
     """Processes a list of records, adding sentiment analysis results using the specified model."""
-    initialize_analysis_tool(model_name_or_type)
+    return list(iter_process_data_for_sentiment(data, text_key, id_key, model_name_or_type, total=len(data), batch_size=batch_size, bucket_by_length=bucket_by_length, cache=cache, backend=backend))
+
+def iter_process_data_for_sentiment(data: Iterable[Dict[str, Any]], text_key: str, id_key: str, model_name_or_type: str, total: Optional[int] = None, batch_size: int = DEFAULT_BATCH_SIZE, bucket_by_length: bool = True, stats: Optional[Dict[str, float]] = None, cache: Optional[SentimentCache] = None, backend: str = "pytorch") -> Iterator[Dict[str, Any]]:
+    """
+    Adds sentiment analysis results to records as they arrive, scoring them in batches of batch_size.
+    With bucket_by_length, records are length-sorted within a window of a few batches to reduce padding.
+    With a cache, texts already scored by this model (in any run) skip inference.
+    If given, stats receives the number of processed records, texts actually scored and the time spent.
+    """
+    initialize_analysis_tool(model_name_or_type, backend)
+    result_key = f"sentiment_analysis_{model_name_or_type.replace('-', '_')}"
     if ANALYSIS_TOOL is None:
         print(f"Skipping sentiment analysis as tool ({model_name_or_type}) failed to initialize.")
         for record in data:
-            record[f"sentiment_analysis_{model_name_or_type.replace('-', '_')}"] = {"error": f"Sentiment tool {model_name_or_type} not initialized"}
-        return data
+            record[result_key] = {"error": f"Sentiment tool {model_name_or_type} not initialized"}
+            yield record
+        return
+
+    if stats is None:
+        stats = {}
+    stats.update({"records": 0, "scored_texts": 0, "inference_sec": 0.0})
+    batch_size = max(1, batch_size)
+    window_size = batch_size * LENGTH_BUCKET_WINDOW_BATCHES if bucket_by_length else batch_size
+
+    window = []
+    for record in data:
+        window.append(record)
+        if len(window) >= window_size:
+            yield from _score_window(window, text_key, result_key, batch_size, bucket_by_length, stats, cache, result_cache_key(CURRENT_MODEL_NAME))
+            window = []
+            print(f"Processed {stats['records']}{f'/{total}' if total is not None else ''} records with {model_name_or_type}...")
+    if window:
+        yield from _score_window(window, text_key, result_key, batch_size, bucket_by_length, stats, cache, result_cache_key(CURRENT_MODEL_NAME))
+
+def _init_model_worker(model_name: str, backend: str, long_text: str, max_chunks: int, num_threads: Optional[int]) -> None:
+    """Worker process initializer: loads one transformer model, which stays resident for the whole run."""
+    sys.stdout = sys.stderr # Worker diagnostics must never interleave with records written to stdout
+    configure_inference_threads(num_threads)
+    configure_long_text_handling(long_text, max_chunks)
+    initialize_analysis_tool(model_name, backend)
+
+def _score_texts_in_worker(texts: List[str], batch_size: int, bucket_by_length: bool) -> List[Dict[str, Any]]:
+    return analyze_sentiment_batch(texts, batch_size, bucket_by_length)
+
+def _score_pending_locally(pending_by_model: Dict[str, List[str]], executors: Dict[str, ProcessPoolExecutor], batch_size: int, bucket_by_length: bool) -> Dict[str, List[Dict[str, Any]]]:
+    """Scores each model's texts: transformers in their worker processes, VADER meanwhile in this process."""
+    futures = {
+        model_name: executors[model_name].submit(_score_texts_in_worker, texts, batch_size, bucket_by_length)
+        for model_name, texts in pending_by_model.items() if model_name in executors
+    }
+    results_by_model = {}
+    if "vader" in pending_by_model:
+        # Overlaps with the transformer workers; VADER is cheap and its analyzer lives in this process
+        results_by_model["vader"] = analyze_sentiment_batch(pending_by_model["vader"])
+    for model_name, future in futures.items():
+        results_by_model[model_name] = future.result()
+    return results_by_model
+
+def _score_window_multi_model(records: List[Any], text_key: str, models: List[str], score_pending: Callable[[Dict[str, List[str]]], Dict[str, List[Dict[str, Any]]]], stats: Dict[str, float], cache: Optional[SentimentCache], cache_keys: Dict[str, str]) -> Iterator[Dict[str, Any]]:
+    """
+    Scores one window with every model at once: the uncached texts of all models are handed to
+    score_pending together (local workers or the scoring service), then all results are attached to the records.
+    """
+    positions = [i for i, record in enumerate(records) if isinstance(record, dict)]
+    texts = {i: records[i].get(text_key) for i in positions}
+    valid_texts = [texts[i] for i in positions if isinstance(texts[i], str) and texts[i].strip()]
+
+    started = time.perf_counter()
+    results_by_model: Dict[str, Dict[str, Dict[str, Any]]] = {}
+    pending_by_model: Dict[str, List[str]] = {}
+    for model_name in models:
+        results_by_model[model_name] = cache.get_many(cache_keys[model_name], valid_texts) if cache is not None else {}
+        pending_texts = list(dict.fromkeys(text for text in valid_texts if text not in results_by_model[model_name]))
+        if pending_texts:
+            pending_by_model[model_name] = pending_texts
+
+    scored_by_model = score_pending(pending_by_model) if pending_by_model else {}
+    for model_name, pending_texts in pending_by_model.items():
+        new_results = list(zip(pending_texts, scored_by_model[model_name]))
+        results_by_model[model_name].update(new_results)
+        if cache is not None:
+            cache.put_many(cache_keys[model_name], [(text, result) for text, result in new_results if "error" not in result])
+        stats["scored_texts"] += len(new_results)
 
-    processed_records = []
-    for record_idx, record in enumerate(data):
+    for i in positions:
+        text = texts[i]
+        for model_name in models:
+            result_key = f"sentiment_analysis_{model_name.replace('-', '_')}"
+            if text in results_by_model[model_name]:
+                records[i][result_key] = dict(results_by_model[model_name][text])
+            else:
+                records[i][result_key] = {"label": "NEUTRAL", "score": 0.0, "error": "Empty or invalid text"}
+    stats["inference_sec"] += time.perf_counter() - started
+    stats["records"] += len(positions)
+
+    for record in records:
         if not isinstance(record, dict):
-            processed_records.append({"original_record_error": "Malformed record", "data": record})
-            continue
-        
-        print(f"Processing record {record_idx + 1}/{len(data)} with {model_name_or_type}...")
-        text_to_analyze = record.get(text_key)
-        sentiment_result = analyze_sentiment_with_tool(text_to_analyze)
-        record[f"sentiment_analysis_{model_name_or_type.replace('-', '_')}"] = sentiment_result
-        processed_records.append(record)
-    return processed_records
+            yield {"original_record_error": "Malformed record", "data": record}
+        else:
+            yield record
+
+def iter_process_data_multi_model(data: Iterable[Dict[str, Any]], text_key: str, models: List[str], total: Optional[int] = None, batch_size: int = DEFAULT_BATCH_SIZE, bucket_by_length: bool = True, stats: Optional[Dict[str, float]] = None, cache: Optional[SentimentCache] = None, backend: str = "pytorch", num_threads: Optional[int] = None, service: Optional["SentimentServiceClient"] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Adds a sentiment_analysis_<model> field for every model in a single pass over the records.
+    Each transformer model is loaded once in its own worker process and VADER runs in this process,
+    so the models score each window concurrently and the total time approaches that of the slowest model.
+    With a service client, texts are scored by a running sentiment_service daemon instead and no model is loaded here.
+    """
+    if stats is None:
+        stats = {}
+    stats.update({"records": 0, "scored_texts": 0, "inference_sec": 0.0})
+    batch_size = max(1, batch_size)
+    window_size = batch_size * LENGTH_BUCKET_WINDOW_BATCHES if bucket_by_length else batch_size
+
+    if service is not None:
+        # The daemon's backend and long-text settings determine the scores, so its cache keys are used
+        cache_keys = service.cache_keys(models)
+        window = []
+        for record in data:
+            window.append(record)
+            if len(window) >= window_size:
+                yield from _score_window_multi_model(window, text_key, models, service.score_by_model, stats, cache, cache_keys)
+                window = []
+                print(f"Processed {stats['records']}{f'/{total}' if total is not None else ''} records with {', '.join(models)} via {service.address}...")
+        if window:
+            yield from _score_window_multi_model(window, text_key, models, service.score_by_model, stats, cache, cache_keys)
+        return
+
+    transformer_models = [model_name for model_name in models if model_name in TRANSFORMER_MODELS]
+    if "vader" in models:
+        initialize_analysis_tool("vader")
+    if num_threads is None and transformer_models:
+        # Share the cores between the transformer workers instead of oversubscribing them
+        num_threads = max(1, (os.cpu_count() or 1) // len(transformer_models))
+
+    executors = {
+        model_name: ProcessPoolExecutor(max_workers=1, initializer=_init_model_worker, initargs=(model_name, backend, LONG_TEXT_MODE, MAX_CHUNKS_PER_TEXT, num_threads))
+        for model_name in transformer_models
+    }
+    score_pending = functools.partial(_score_pending_locally, executors=executors, batch_size=batch_size, bucket_by_length=bucket_by_length)
+    cache_keys = {model_name: result_cache_key(model_name, backend) for model_name in models}
+    try:
+        window = []
+        for record in data:
+            window.append(record)
+            if len(window) >= window_size:
+                yield from _score_window_multi_model(window, text_key, models, score_pending, stats, cache, cache_keys)
+                window = []
+                print(f"Processed {stats['records']}{f'/{total}' if total is not None else ''} records with {', '.join(models)}...")
+        if window:
+            yield from _score_window_multi_model(window, text_key, models, score_pending, stats, cache, cache_keys)
+    finally:
+        for executor in executors.values():
+            executor.shutdown(cancel_futures=True)
 
 def main():
     parser = argparse.ArgumentParser(description="Perform sentiment analysis on text data from JSON files.")
-    parser.add_argument("-i", "--input_file", type=str, required=True, help="Path to the input JSON file (cleaned data)." )
-    parser.add_argument("-o", "--output_file", type=str, required=True, help="Path to the output JSON file with sentiment scores.")
+    parser.add_argument("-i", "--input_file", type=str, required=True, help="Path to the input JSON or NDJSON file (cleaned data); '-' reads stdin." )
+    parser.add_argument("-o", "--output_file", type=str, required=True, help="Path to the output file with sentiment scores; *.ndjson / *.jsonl or '-' (stdout) writes compact NDJSON.")
     parser.add_argument("-t", "--data_type", type=str, required=True, choices=["twitter", "scraped_website"], help="Type of data to process.")
     parser.add_argument("-m", "--model", type=str, default="distilbert", choices=["distilbert", "twitter-roberta", "vader"], help="Sentiment analysis model to use.")
+    parser.add_argument("--models", type=str, default=None, help="Comma-separated models to run in one pass (e.g. vader,distilbert,twitter-roberta); overrides --model. Transformers run in worker processes, VADER in the main process.")
+    parser.add_argument("--backend", type=str, default="pytorch", choices=BACKENDS, help="CPU inference backend for transformer models: full-precision PyTorch, dynamic int8 quantization, or ONNX Runtime.")
     parser.add_argument("--text_key", type=str, help="The key in the JSON objects that contains the text to analyze. Inferred if not provided.")
     parser.add_argument("--id_key", type=str, help="The key in the JSON objects that serves as a unique identifier. Inferred if not provided.")
+    parser.add_argument("--batch_size", type=int, default=DEFAULT_BATCH_SIZE, help="Number of texts per transformer forward pass (1 disables batching).")
+    parser.add_argument("--no_length_bucketing", action="store_true", help="Batch records in input order instead of grouping similar-length texts to reduce padding.")
+    parser.add_argument("--long_text", type=str, default="chunk", choices=LONG_TEXT_MODES, help="Transformer inputs over the model's token limit: split into token windows and aggregate (chunk), or keep the first window (truncate).")
+    parser.add_argument("--max_chunks", type=int, default=MAX_CHUNKS_PER_TEXT, help="With --long_text chunk, the maximum token windows scored per text; later tokens are dropped and the result marked truncated.")
+    parser.add_argument("--cache_file", type=str, default=os.getenv("SENTIMENT_CACHE_FILE"), help="SQLite cache of results keyed by model and text hash, shared across runs (default: $SENTIMENT_CACHE_FILE; unset disables caching).")
+    parser.add_argument("--cache_max_entries", type=int, default=DEFAULT_MAX_ENTRIES, help="Maximum cached results; least recently used entries are evicted beyond this.")
+    parser.add_argument("--num_threads", type=int, default=None, help="Intra-op CPU threads for transformer inference (default: PyTorch's choice).")
+    parser.add_argument("--service", type=str, default=None, help="Score through a running sentiment_service.py daemon (host:port or unix:/path/to.sock) instead of loading the models here; its backend and long-text settings apply.")
 
     args = parser.parse_args()
 
+    models = [args.model]
+    if args.models:
+        models = list(dict.fromkeys(model_name.strip() for model_name in args.models.split(",") if model_name.strip()))
+        unknown_models = [model_name for model_name in models if model_name not in TRANSFORMER_MODELS + ["vader"]]
+        if unknown_models or not models:
+            parser.error(f"--models must be a comma-separated subset of vader,{','.join(TRANSFORMER_MODELS)}; got: {args.models}")
+    model_label = ", ".join(models)
+
     text_key = args.text_key
     id_key = args.id_key
     if not text_key:
@@ -164,9 +519,17 @@ def main():
         print(f"Error: Could not infer text_key or id_key for data_type 	'{args.data_type}'. Provide via --text_key and --id_key.")
         return
 
+    reserve_stdout_for_records(args.output_file)
     try:
-        with open(args.input_file, "r", encoding="utf-8") as f:
-            input_data = json.load(f)
+        # Records are streamed, so NDJSON input is scored (and written) as it is read
+        input_records = open_record_stream(args.input_file)
+    except NotARecordStreamError:
+        input_data = load_json(args.input_file)
+        if args.data_type == "scraped_website" and isinstance(input_data, dict):
+            input_records = iter([input_data])
+        else:
+            print(f"Error: Input data is not a list of records. Found type: {type(input_data)}")
+            return
     except FileNotFoundError:
         print(f"Error: Input file not found: {args.input_file}")
         return
@@ -174,23 +537,49 @@ def main():
         print(f"Error: Could not decode JSON from input file: {args.input_file}")
         return
 
-    if not isinstance(input_data, list):
-        if args.data_type == "scraped_website" and isinstance(input_data, dict):
-            input_data = [input_data]
-        else:
-            print(f"Error: Input data is not a list of records. Found type: {type(input_data)}")
+    service = None
+    if args.service:
+        from sentiment_service import SentimentServiceClient
+        service = SentimentServiceClient(args.service)
+        try:
+            service.cache_keys(models)
+        except (OSError, ValueError, RuntimeError) as e:
+            print(f"Error: Sentiment service unavailable at {args.service}: {e}")
             return
-
-    print(f"Processing {len(input_data)} records from {args.input_file} for sentiment analysis using {args.model} model...")
-    output_data = process_data_for_sentiment(input_data, text_key, id_key, args.model)
+    elif len(models) == 1:
+        configure_inference_threads(args.num_threads) # Multi-model runs set threads per worker process
+    configure_long_text_handling(args.long_text, args.max_chunks)
+    if service is not None:
+        print(f"Processing records from {args.input_file} for sentiment analysis using {model_label} via the service at {args.service}...")
+    else:
+        print(f"Processing records from {args.input_file} for sentiment analysis using {model_label} ({args.backend} backend, batch size {args.batch_size})...")
+    stats: Dict[str, float] = {}
+    cache = SentimentCache(args.cache_file, args.cache_max_entries) if args.cache_file else None
+    if service is not None:
+        output_records = iter_process_data_multi_model(input_records, text_key, models, batch_size=args.batch_size, bucket_by_length=not args.no_length_bucketing, stats=stats, cache=cache, service=service)
+    elif len(models) > 1:
+        output_records = iter_process_data_multi_model(input_records, text_key, models, batch_size=args.batch_size, bucket_by_length=not args.no_length_bucketing, stats=stats, cache=cache, backend=args.backend, num_threads=args.num_threads)
+    else:
+        output_records = iter_process_data_for_sentiment(input_records, text_key, id_key, models[0], batch_size=args.batch_size, bucket_by_length=not args.no_length_bucketing, stats=stats, cache=cache, backend=args.backend)
 
     try:
-        with open(args.output_file, "w", encoding="utf-8") as f:
-            json.dump(output_data, f, ensure_ascii=False, indent=4)
-        print(f"Sentiment analysis results using {args.model} saved to {args.output_file}")
+        started = time.perf_counter()
+        count = write_records(args.output_file, output_records)
+        elapsed = time.perf_counter() - started
+        print(f"Sentiment analysis results for {count} records using {model_label} saved to {args.output_file}")
+        if stats.get("inference_sec"):
+            print(f"Throughput: {stats['records'] / stats['inference_sec']:.1f} records/sec in scoring ({stats['scored_texts']} texts run through the model), {count / elapsed:.1f} records/sec end-to-end ({elapsed:.2f}s including model load and I/O).")
+    except json.JSONDecodeError:
+        print(f"Error: Could not decode JSON from input file: {args.input_file}")
     except Exception as e:
         print(f"Error writing sentiment analysis results to {args.output_file}: {e}")
+    finally:
+        if cache is not None:
+            cache_stats = cache.stats()
+            print(f"Sentiment cache {args.cache_file}: {cache_stats['hits']} hits, {cache_stats['misses']} misses ({cache_stats['hit_rate']:.1%} hit rate), {cache_stats['evictions']} evictions, {cache_stats['entries']} entries.")
+            cache.close()
+        if service is not None:
+            service.close()
 
 if __name__ == "__main__":
     main()
-
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3.11
+import sys
+import json
+import time
+import argparse
+import statistics
+from typing import List, Dict, Any
+
+import sentiment_analyzer
+from sentiment_analyzer import initialize_analysis_tool, analyze_sentiment_batch, configure_inference_threads, BACKENDS, TRANSFORMER_MODELS
+
+# Reference outputs produced by the full-precision PyTorch pipeline
+REFERENCE_FILES = {
+    "distilbert": "sample_twitter_sentiment_distilbert.json",
+    "twitter-roberta": "sample_twitter_sentiment_twitter_roberta.json"
+}
+
+def load_reference(model_name: str, text_key: str) -> List[Dict[str, Any]]:
+    """Returns [{"text", "label", "score"}] from a model's reference sample output."""
+    result_key = f"sentiment_analysis_{model_name.replace('-', '_')}"
+    with open(REFERENCE_FILES[model_name], "r", encoding="utf-8") as f:
+        records = json.load(f)
+    return [
+        {"text": record[text_key], "label": record[result_key]["label"], "score": record[result_key]["score"]}
+        for record in records
+        if isinstance(record.get(text_key), str) and isinstance(record.get(result_key), dict) and "label" in record[result_key]
+    ]
+
+def parity_check(reference: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Scores the reference texts with the initialized tool and compares labels and scores."""
+    results = analyze_sentiment_batch([item["text"] for item in reference])
+    # Older outputs use upper-case labels, newer checkpoints lower-case ones
+    label_matches = sum(1 for item, result in zip(reference, results) if str(result.get("label")).lower() == str(item["label"]).lower())
+    score_deltas = [abs(float(result.get("score", 0.0)) - float(item["score"])) for item, result in zip(reference, results)]
+    return {
+        "label_agreement": label_matches / len(reference) if reference else 1.0,
+        "max_score_delta": max(score_deltas) if score_deltas else 0.0
+    }
+
+def benchmark_latency(texts: List[str], repeat: int) -> Dict[str, float]:
+    """Single-text latency (batch size 1), in milliseconds."""
+    timings = []
+    for _ in range(repeat):
+        for text in texts:
+            started = time.perf_counter()
+            analyze_sentiment_batch([text], batch_size=1)
+            timings.append((time.perf_counter() - started) * 1000)
+    timings.sort()
+    return {"p50_ms": statistics.median(timings), "p95_ms": timings[min(len(timings) - 1, int(len(timings) * 0.95))]}
+
+def benchmark_throughput(texts: List[str], batch_size: int, repeat: int) -> float:
+    """Best records/sec over `repeat` batched runs."""
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        analyze_sentiment_batch(texts, batch_size=batch_size)
+        best = min(best, time.perf_counter() - started)
+    return len(texts) / best
+
+def main():
+    parser = argparse.ArgumentParser(description="Check accuracy parity and benchmark latency/throughput of the sentiment inference backends.")
+    parser.add_argument("--models", type=str, default=",".join(TRANSFORMER_MODELS), help="Comma-separated transformer models to check.")
+    parser.add_argument("--backends", type=str, default=",".join(BACKENDS), help="Comma-separated backends to compare.")
+    parser.add_argument("--text_key", type=str, default="cleaned_full_text", help="Text field in the reference and input files.")
+    parser.add_argument("--input_file", type=str, default=None, help="Optional JSON/NDJSON records to benchmark on (default: the reference texts).")
+    parser.add_argument("--num_texts", type=int, default=512, help="Texts per throughput run; the benchmark texts are repeated to reach this count.")
+    parser.add_argument("--batch_size", type=int, default=sentiment_analyzer.DEFAULT_BATCH_SIZE, help="Batch size for the throughput runs.")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per measurement.")
+    parser.add_argument("--num_threads", type=int, default=None, help="Intra-op CPU threads for inference.")
+    parser.add_argument("--min_label_agreement", type=float, default=1.0, help="Parity fails if fewer reference labels than this fraction match.")
+    parser.add_argument("--max_score_delta", type=float, default=0.05, help="Parity fails if any reference score differs by more than this.")
+
+    args = parser.parse_args()
+    configure_inference_threads(args.num_threads)
+    models = [model for model in args.models.split(",") if model]
+    backends = [backend for backend in args.backends.split(",") if backend]
+
+    benchmark_texts = None
+    if args.input_file:
+        from json_stream import iter_json_records
+        benchmark_texts = [record[args.text_key] for record in iter_json_records(args.input_file) if isinstance(record, dict) and isinstance(record.get(args.text_key), str) and record[args.text_key].strip()]
+
+    parity_failures = []
+    for model_name in models:
+        reference = load_reference(model_name, args.text_key)
+        texts = benchmark_texts or [item["text"] for item in reference]
+        throughput_texts = (texts * (args.num_texts // max(len(texts), 1) + 1))[:args.num_texts]
+        for backend in backends:
+            initialize_analysis_tool(model_name, backend)
+            if sentiment_analyzer.ANALYSIS_TOOL is None:
+                print(f"{model_name:<16} {backend:<10} unavailable (failed to initialize)")
+                continue
+            parity = parity_check(reference)
+            latency = benchmark_latency(texts[:64], args.repeat)
+            records_per_sec = benchmark_throughput(throughput_texts, args.batch_size, args.repeat)
+            passed = parity["label_agreement"] >= args.min_label_agreement and parity["max_score_delta"] <= args.max_score_delta
+            if not passed:
+                parity_failures.append(f"{model_name}/{backend}")
+            print(f"{model_name:<16} {backend:<10} labels={parity['label_agreement']:6.1%}  max_score_delta={parity['max_score_delta']:.4f}  "
+                  f"p50={latency['p50_ms']:7.2f}ms  p95={latency['p95_ms']:7.2f}ms  throughput={records_per_sec:8.1f} rec/s  parity={'ok' if passed else 'FAIL'}")
+
+    if parity_failures:
+        print(f"Parity check failed for: {', '.join(parity_failures)}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3.11
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import argparse
+import unicodedata
+from typing import List, Dict, Any, Iterable, Tuple
+
+DEFAULT_MAX_ENTRIES = 1_000_000
+# SQLite's default limit on bound parameters is 999 in older builds
+_QUERY_CHUNK = 500
+
+def normalize_text_for_cache(text: str) -> str:
+    """Normalization applied before hashing: Unicode NFC and outer whitespace, which do not change a model's input meaning."""
+    return unicodedata.normalize("NFC", text).strip()
+
+def text_hash(text: str) -> str:
+    return hashlib.sha256(normalize_text_for_cache(text).encode("utf-8")).hexdigest()
+
+class SentimentCache:
+    """
+    Persistent sentiment results keyed by (model key, SHA-256 of the normalized text), stored in SQLite.
+    Entries are evicted least-recently-used first once the cache holds more than max_entries.
+    """
+    def __init__(self, path: str, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS sentiment_cache ("
+            " model TEXT NOT NULL, text_hash TEXT NOT NULL, result TEXT NOT NULL, last_used REAL NOT NULL,"
+            " PRIMARY KEY (model, text_hash))"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS sentiment_cache_last_used ON sentiment_cache (last_used)")
+        self._conn.commit()
+        self._entries = self._conn.execute("SELECT COUNT(*) FROM sentiment_cache").fetchone()[0]
+
+    def get_many(self, model_key: str, texts: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """Returns cached results keyed by text for the texts found, counting a hit or miss per text."""
+        texts = list(texts)
+        hashes = [text_hash(text) for text in texts]
+        unique_hashes = list(dict.fromkeys(hashes))
+        found: Dict[str, Dict[str, Any]] = {}
+        for start in range(0, len(unique_hashes), _QUERY_CHUNK):
+            chunk = unique_hashes[start:start + _QUERY_CHUNK]
+            placeholders = ",".join("?" * len(chunk))
+            rows = self._conn.execute(
+                f"SELECT text_hash, result FROM sentiment_cache WHERE model = ? AND text_hash IN ({placeholders})",
+                [model_key, *chunk]
+            ).fetchall()
+            found.update((row_hash, json.loads(result)) for row_hash, result in rows)
+        if found:
+            # Refresh recency so frequently repeated texts survive eviction
+            now = time.time()
+            self._conn.executemany(
+                "UPDATE sentiment_cache SET last_used = ? WHERE model = ? AND text_hash = ?",
+                [(now, model_key, found_hash) for found_hash in found]
+            )
+            self._conn.commit()
+        results = {text: found[h] for text, h in zip(texts, hashes) if h in found}
+        hit_count = sum(1 for h in hashes if h in found)
+        self.hits += hit_count
+        self.misses += len(hashes) - hit_count
+        return results
+
+    def put_many(self, model_key: str, items: Iterable[Tuple[str, Dict[str, Any]]]) -> None:
+        """Stores (text, result) pairs, then evicts the least recently used entries beyond max_entries."""
+        now = time.time()
+        rows = [(model_key, text_hash(text), json.dumps(result, ensure_ascii=False, separators=(",", ":")), now) for text, result in items]
+        if not rows:
+            return
+        # The write lock is taken up front, so the count and eviction stay exact when other processes share the file
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO sentiment_cache (model, text_hash, result, last_used) VALUES (?, ?, ?, ?)", rows
+            )
+            self._entries = self._conn.execute("SELECT COUNT(*) FROM sentiment_cache").fetchone()[0]
+            if self._entries > self.max_entries:
+                cursor = self._conn.execute(
+                    "DELETE FROM sentiment_cache WHERE rowid IN (SELECT rowid FROM sentiment_cache ORDER BY last_used LIMIT ?)",
+                    (self._entries - self.max_entries,)
+                )
+                self.evictions += cursor.rowcount
+                self._entries -= cursor.rowcount
+            self._conn.commit()
+        except BaseException:
+            self._conn.rollback()
+            raise
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "entries": self._entries,
+            "max_entries": self.max_entries
+        }
+
+    def model_counts(self) -> List[Tuple[str, int]]:
+        return self._conn.execute("SELECT model, COUNT(*) FROM sentiment_cache GROUP BY model ORDER BY model").fetchall()
+
+    def clear(self) -> int:
+        """Deletes every cached result and returns how many were removed."""
+        cursor = self._conn.execute("DELETE FROM sentiment_cache")
+        self._conn.commit()
+        self._entries = 0
+        return cursor.rowcount
+
+    def close(self) -> None:
+        self._conn.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect or clear a persistent sentiment cache.")
+    parser.add_argument("cache_file", type=str, help="Path to the SQLite sentiment cache.")
+    parser.add_argument("--clear", action="store_true", help="Delete every cached result.")
+
+    args = parser.parse_args()
+
+    if not os.path.exists(args.cache_file):
+        print(f"Error: Cache file not found: {args.cache_file}")
+        return
+    cache = SentimentCache(args.cache_file)
+    if args.clear:
+        print(f"Cleared {cache.clear()} cached results from {args.cache_file}")
+    else:
+        for model_key, count in cache.model_counts():
+            print(f"{model_key}: {count} cached results")
+        print(f"Total: {cache.stats()['entries']} entries")
+    cache.close()
+
+if __name__ == "__main__":
+    main()
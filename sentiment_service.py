@@ -0,0 +1,477 @@
+#!/usr/bin/env python3.11
+import os
+import sys
+import json
+import time
+import queue
+import signal
+import socket
+import argparse
+import threading
+import statistics
+import http.client
+import socketserver
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Dict, Any, Optional, Tuple, Callable
+
+import sentiment_analyzer
+from sentiment_analyzer import (
+    initialize_analysis_tool, analyze_sentiment_batch, configure_long_text_handling, result_cache_key,
+    _init_model_worker, _score_texts_in_worker, BACKENDS, TRANSFORMER_MODELS, LONG_TEXT_MODES, DEFAULT_BATCH_SIZE, MAX_CHUNKS_PER_TEXT
+)
+from sentiment_cache import SentimentCache, DEFAULT_MAX_ENTRIES
+
+DEFAULT_ADDRESS = "127.0.0.1:8765"
+DEFAULT_MAX_BATCH_TEXTS = 256
+DEFAULT_MAX_WAIT_MS = 10.0
+MAX_REQUEST_BYTES = 32 * 1024 * 1024
+# Latency percentiles are computed over this many most recent requests / batches
+LATENCY_WINDOW = 2048
+
+def parse_service_address(address: str) -> Tuple[str, Any]:
+    """'unix:/path/to.sock' -> ("unix", path); '[http://]host:port' -> ("tcp", (host, port))."""
+    if address.startswith("unix:"):
+        return "unix", address[len("unix:"):]
+    if address.startswith("http://"):
+        address = address[len("http://"):]
+    host, _, port = address.rstrip("/").rpartition(":")
+    if not host or not port.isdigit():
+        raise ValueError(f"Invalid service address (expected host:port or unix:/path): {address}")
+    return "tcp", (host, int(port))
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+class ScoreRequest:
+    """One client's texts for one model, waiting in a model's queue until its micro-batch is scored."""
+    def __init__(self, texts: List[str]):
+        self.texts = texts
+        self.enqueued_at = time.perf_counter()
+        self.results: Optional[List[Dict[str, Any]]] = None
+        self.error: Optional[str] = None
+        self._done = threading.Event()
+
+    def finish(self, results: Optional[List[Dict[str, Any]]] = None, error: Optional[str] = None) -> None:
+        self.results = results
+        self.error = error
+        self._done.set()
+
+    def wait(self) -> List[Dict[str, Any]]:
+        self._done.wait()
+        if self.error is not None:
+            raise RuntimeError(self.error)
+        return self.results
+
+class ModelBatcher(threading.Thread):
+    """
+    Coalesces concurrent requests for one model into micro-batches. A batch is scored as soon as it holds
+    max_batch_texts texts, or once its oldest request has waited max_wait_ms (the latency budget), whichever comes first.
+    """
+    def __init__(self, model_name: str, score_batch: Callable[[List[str]], List[Dict[str, Any]]], max_batch_texts: int, max_wait_ms: float, cache_key: str, cache_file: Optional[str] = None, cache_max_entries: int = DEFAULT_MAX_ENTRIES):
+        super().__init__(name=f"batcher-{model_name}", daemon=True)
+        self.model_name = model_name
+        self.score_batch = score_batch
+        self.max_batch_texts = max(1, max_batch_texts)
+        self.max_wait_sec = max(0.0, max_wait_ms) / 1000
+        self.cache_key = cache_key
+        self.cache_file = cache_file
+        self.cache_max_entries = cache_max_entries
+        self._queue: "queue.Queue[Optional[ScoreRequest]]" = queue.Queue()
+        self._stats_lock = threading.Lock()
+        self.queued_texts = 0
+        self.requests = 0
+        self.batches = 0
+        self.scored_texts = 0
+        self.cache_hits = 0
+        self.errors = 0
+        self.request_latencies_ms = deque(maxlen=LATENCY_WINDOW)
+        self.batch_latencies_ms = deque(maxlen=LATENCY_WINDOW)
+        self.batch_sizes = deque(maxlen=LATENCY_WINDOW)
+
+    def submit(self, texts: List[str]) -> ScoreRequest:
+        request = ScoreRequest(texts)
+        with self._stats_lock:
+            self.queued_texts += len(texts)
+            self.requests += 1
+        self._queue.put(request)
+        return request
+
+    def stop(self) -> None:
+        self._queue.put(None)
+
+    def _next_batch(self) -> Optional[List[ScoreRequest]]:
+        """Blocks for the first request, then gathers more until the batch is full or its latency budget is spent."""
+        first = self._queue.get()
+        if first is None:
+            return None
+        batch = [first]
+        batch_texts = len(first.texts)
+        deadline = first.enqueued_at + self.max_wait_sec
+        while batch_texts < self.max_batch_texts:
+            remaining = deadline - time.perf_counter()
+            try:
+                request = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if request is None:
+                self._queue.put(None) # Stop after scoring what is already batched
+                break
+            batch.append(request)
+            batch_texts += len(request.texts)
+        return batch
+
+    def run(self) -> None:
+        # SQLite connections belong to the thread that opened them
+        cache = SentimentCache(self.cache_file, self.cache_max_entries) if self.cache_file else None
+        try:
+            while True:
+                batch = self._next_batch()
+                if batch is None:
+                    return
+                self._score(batch, cache)
+        finally:
+            if cache is not None:
+                cache.close()
+
+    def _score(self, batch: List[ScoreRequest], cache: Optional[SentimentCache]) -> None:
+        started = time.perf_counter()
+        unique_texts = list(dict.fromkeys(text for request in batch for text in request.texts))
+        error = None
+        try:
+            results_by_text = cache.get_many(self.cache_key, unique_texts) if cache is not None else {}
+            pending_texts = [text for text in unique_texts if text not in results_by_text]
+            scores = self.score_batch(pending_texts) if pending_texts else []
+            if len(scores) != len(pending_texts):
+                raise ValueError(f"model returned {len(scores)} results for {len(pending_texts)} texts")
+            new_results = list(zip(pending_texts, scores))
+            results_by_text.update(new_results)
+            if cache is not None:
+                cache.put_many(self.cache_key, [(text, result) for text, result in new_results if "error" not in result])
+            # Inside the try, so a missing result fails this batch's requests rather than the batcher thread
+            batch_results = [[dict(results_by_text[text]) for text in request.texts] for request in batch]
+        except Exception as e:
+            print(f"Error scoring a batch of {len(unique_texts)} texts with {self.model_name}: {e!r}")
+            error = f"Scoring with {self.model_name} failed: {e!r}"
+            pending_texts = []
+        finished = time.perf_counter()
+
+        for i, request in enumerate(batch):
+            if error is None:
+                request.finish(batch_results[i])
+            else:
+                request.finish(error=error)
+        with self._stats_lock:
+            self.queued_texts -= sum(len(request.texts) for request in batch)
+            self.batches += 1
+            self.batch_sizes.append(len(unique_texts))
+            self.batch_latencies_ms.append((finished - started) * 1000)
+            self.request_latencies_ms.extend((finished - request.enqueued_at) * 1000 for request in batch)
+            if error is None:
+                self.scored_texts += len(pending_texts)
+                self.cache_hits += len(unique_texts) - len(pending_texts)
+            else:
+                self.errors += len(batch)
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            request_latencies = sorted(self.request_latencies_ms)
+            batch_latencies = sorted(self.batch_latencies_ms)
+            return {
+                "queue_depth_requests": self._queue.qsize(),
+                "queued_texts": self.queued_texts,
+                "requests": self.requests,
+                "batches": self.batches,
+                "scored_texts": self.scored_texts,
+                "cache_hits": self.cache_hits,
+                "errors": self.errors,
+                "mean_batch_texts": statistics.fmean(self.batch_sizes) if self.batch_sizes else 0.0,
+                "request_latency_ms": {"p50": percentile(request_latencies, 0.5), "p95": percentile(request_latencies, 0.95), "p99": percentile(request_latencies, 0.99)},
+                "batch_latency_ms": {"p50": percentile(batch_latencies, 0.5), "p95": percentile(batch_latencies, 0.95), "p99": percentile(batch_latencies, 0.99)}
+            }
+
+def _worker_model_ready() -> bool:
+    return sentiment_analyzer.ANALYSIS_TOOL is not None
+
+class SentimentModelPool:
+    """
+    Keeps the configured models loaded for the lifetime of the service: each transformer model in its own
+    worker process (loaded and warmed up at startup) and VADER in this process, each fed by a ModelBatcher.
+    """
+    def __init__(self, models: List[str], backend: str = "pytorch", batch_size: int = DEFAULT_BATCH_SIZE, max_batch_texts: int = DEFAULT_MAX_BATCH_TEXTS, max_wait_ms: float = DEFAULT_MAX_WAIT_MS, num_threads: Optional[int] = None, cache_file: Optional[str] = None, cache_max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.models = models
+        self.backend = backend
+        self.started_at = time.time()
+        self.executors: Dict[str, ProcessPoolExecutor] = {}
+        self.batchers: Dict[str, ModelBatcher] = {}
+
+        transformer_models = [model_name for model_name in models if model_name in TRANSFORMER_MODELS]
+        if num_threads is None and transformer_models:
+            num_threads = max(1, (os.cpu_count() or 1) // len(transformer_models))
+        for model_name in models:
+            if model_name in TRANSFORMER_MODELS:
+                executor = ProcessPoolExecutor(max_workers=1, initializer=_init_model_worker, initargs=(model_name, backend, sentiment_analyzer.LONG_TEXT_MODE, sentiment_analyzer.MAX_CHUNKS_PER_TEXT, num_threads))
+                self.executors[model_name] = executor
+                score_batch = lambda texts, executor=executor: executor.submit(_score_texts_in_worker, texts, batch_size, True).result()
+            else:
+                initialize_analysis_tool("vader")
+                score_batch = analyze_sentiment_batch
+            self.batchers[model_name] = ModelBatcher(model_name, score_batch, max_batch_texts, max_wait_ms, result_cache_key(model_name, backend), cache_file, cache_max_entries)
+
+    def start(self) -> None:
+        """Loads every model before the service accepts requests; raises if one fails to initialize."""
+        failed_models = [model_name for model_name, executor in self.executors.items() if not executor.submit(_worker_model_ready).result()]
+        if "vader" in self.models and sentiment_analyzer.ANALYSIS_TOOL is None:
+            failed_models.append("vader")
+        if failed_models:
+            raise RuntimeError(f"Failed to initialize: {', '.join(failed_models)}")
+        for executor in self.executors.values():
+            executor.submit(_score_texts_in_worker, ["warm up"], 1, False).result() # First forward pass allocates buffers
+        for batcher in self.batchers.values():
+            batcher.start()
+
+    def score(self, texts_by_model: Dict[str, List[str]]) -> Dict[str, List[Dict[str, Any]]]:
+        """Queues every model's texts at once so the models score them concurrently, then waits for all."""
+        requests = {model_name: self.batchers[model_name].submit(texts) for model_name, texts in texts_by_model.items()}
+        return {model_name: request.wait() for model_name, request in requests.items()}
+
+    def info(self) -> Dict[str, Any]:
+        return {
+            "status": "ok",
+            "backend": self.backend,
+            "long_text": sentiment_analyzer.LONG_TEXT_MODE,
+            "max_chunks": sentiment_analyzer.MAX_CHUNKS_PER_TEXT,
+            "models": {model_name: {"cache_key": batcher.cache_key} for model_name, batcher in self.batchers.items()}
+        }
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "uptime_sec": time.time() - self.started_at,
+            "models": {model_name: batcher.metrics() for model_name, batcher in self.batchers.items()}
+        }
+
+    def close(self) -> None:
+        for batcher in self.batchers.values():
+            batcher.stop()
+        for batcher in self.batchers.values():
+            if batcher.is_alive():
+                batcher.join()
+        for executor in self.executors.values():
+            executor.shutdown(cancel_futures=True)
+
+class SentimentRequestHandler(BaseHTTPRequestHandler):
+    """
+    GET /health   -> service configuration and the cache key of each loaded model
+    GET /metrics  -> per-model queue depth, batch sizes and latency percentiles
+    POST /score   -> {"texts": [...], "models": [...]} or {"texts_by_model": {model: [...]}};
+                     responds {"results": {model: [result per text]}}
+    """
+    protocol_version = "HTTP/1.1" # Keep-alive, so a client reuses one connection for all its batches
+    pool: SentimentModelPool = None
+    verbose = False
+
+    def _send_json(self, status: int, payload: Dict[str, Any]) -> None:
+        body = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == "/health":
+            self._send_json(200, self.pool.info())
+        elif self.path == "/metrics":
+            self._send_json(200, self.pool.metrics())
+        else:
+            self._send_json(404, {"error": f"Unknown path: {self.path}"})
+
+    def do_POST(self):
+        if self.path != "/score":
+            self._send_json(404, {"error": f"Unknown path: {self.path}"})
+            return
+        length = int(self.headers.get("Content-Length") or 0)
+        if length > MAX_REQUEST_BYTES:
+            self.close_connection = True # The unread body cannot be skipped on a kept-alive connection
+            self._send_json(413, {"error": f"Request body exceeds {MAX_REQUEST_BYTES} bytes"})
+            return
+        try:
+            payload = json.loads(self.rfile.read(length) or b"{}")
+            texts_by_model = self._texts_by_model(payload)
+        except (json.JSONDecodeError, ValueError) as e:
+            self._send_json(400, {"error": str(e)})
+            return
+        try:
+            results = self.pool.score(texts_by_model)
+        except RuntimeError as e:
+            self._send_json(500, {"error": str(e)})
+            return
+        self._send_json(200, {"results": results})
+
+    def _texts_by_model(self, payload: Any) -> Dict[str, List[str]]:
+        """Validates a /score body. Raises ValueError with a client-facing message."""
+        if not isinstance(payload, dict):
+            raise ValueError("Request body must be a JSON object")
+        if "texts_by_model" in payload:
+            texts_by_model = payload["texts_by_model"]
+            if not isinstance(texts_by_model, dict):
+                raise ValueError("texts_by_model must be an object mapping model names to lists of texts")
+        else:
+            models = payload.get("models") or list(self.pool.models)
+            if not isinstance(models, list):
+                raise ValueError("models must be a list of model names")
+            texts_by_model = {model_name: payload.get("texts") for model_name in models}
+        for model_name, texts in texts_by_model.items():
+            if model_name not in self.pool.batchers:
+                raise ValueError(f"Model not loaded by this service: {model_name} (loaded: {', '.join(self.pool.models)})")
+            if not isinstance(texts, list) or not all(isinstance(text, str) for text in texts):
+                raise ValueError("texts must be a list of strings")
+        return texts_by_model
+
+    def address_string(self) -> str:
+        # Unix socket peers have no (host, port) address
+        return self.client_address[0] if isinstance(self.client_address, tuple) and self.client_address else "unix-socket"
+
+    def log_message(self, format, *args):
+        if self.verbose:
+            super().log_message(format, *args)
+
+# Many clients may connect at once while their requests are being coalesced
+LISTEN_BACKLOG = 128
+
+class ThreadingUnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+    request_queue_size = LISTEN_BACKLOG
+
+class ThreadingTCPHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = LISTEN_BACKLOG
+
+def create_server(address: str, handler_class: type) -> socketserver.BaseServer:
+    kind, target = parse_service_address(address)
+    if kind == "unix":
+        if os.path.exists(target):
+            os.remove(target) # Stale socket left by a previous run
+        return ThreadingUnixHTTPServer(target, handler_class)
+    return ThreadingTCPHTTPServer(target, handler_class)
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    """HTTPConnection over a Unix domain socket."""
+    def __init__(self, socket_path: str, timeout: Optional[float] = None):
+        super().__init__("localhost", timeout=timeout)
+        self.socket_path = socket_path
+
+    def connect(self) -> None:
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        if self.timeout is not None:
+            self.sock.settimeout(self.timeout)
+        self.sock.connect(self.socket_path)
+
+class SentimentServiceClient:
+    """Client for a running sentiment_service daemon, reusing one kept-alive connection."""
+    def __init__(self, address: str, timeout: float = 300.0):
+        self.address = address
+        kind, target = parse_service_address(address)
+        if kind == "unix":
+            self._connection = UnixHTTPConnection(target, timeout=timeout)
+        else:
+            self._connection = http.client.HTTPConnection(target[0], target[1], timeout=timeout)
+        self._info: Optional[Dict[str, Any]] = None
+
+    def _request(self, method: str, path: str, payload: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8") if payload is not None else None
+        headers = {"Content-Type": "application/json"} if body is not None else {}
+        for attempt in range(2):
+            try:
+                self._connection.request(method, path, body=body, headers=headers)
+                response = self._connection.getresponse()
+                data = json.loads(response.read() or b"{}")
+                break
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                # The server closed an idle kept-alive connection; reconnect once
+                self._connection.close()
+                if attempt == 1:
+                    raise
+        if response.status != 200:
+            raise RuntimeError(f"Sentiment service {self.address} returned {response.status}: {data.get('error')}")
+        return data
+
+    def health(self) -> Dict[str, Any]:
+        self._info = self._request("GET", "/health")
+        return self._info
+
+    def metrics(self) -> Dict[str, Any]:
+        return self._request("GET", "/metrics")
+
+    def cache_keys(self, models: List[str]) -> Dict[str, str]:
+        """The service's cache key per model; raises ValueError if a model is not loaded by the service."""
+        info = self._info or self.health()
+        missing_models = [model_name for model_name in models if model_name not in info["models"]]
+        if missing_models:
+            raise ValueError(f"Sentiment service {self.address} does not serve: {', '.join(missing_models)} (loaded: {', '.join(info['models'])})")
+        return {model_name: info["models"][model_name]["cache_key"] for model_name in models}
+
+    def score_by_model(self, texts_by_model: Dict[str, List[str]]) -> Dict[str, List[Dict[str, Any]]]:
+        return self._request("POST", "/score", {"texts_by_model": texts_by_model})["results"]
+
+    def close(self) -> None:
+        self._connection.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Sentiment scoring daemon: keeps models loaded and scores batched requests over HTTP or a Unix socket.")
+    parser.add_argument("--listen", type=str, default=os.getenv("SENTIMENT_SERVICE", DEFAULT_ADDRESS), help="host:port, or unix:/path/to.sock (default: $SENTIMENT_SERVICE or 127.0.0.1:8765).")
+    parser.add_argument("--models", type=str, default="distilbert", help=f"Comma-separated models to keep loaded (vader,{','.join(TRANSFORMER_MODELS)}).")
+    parser.add_argument("--backend", type=str, default="pytorch", choices=BACKENDS, help="CPU inference backend for transformer models.")
+    parser.add_argument("--batch_size", type=int, default=DEFAULT_BATCH_SIZE, help="Number of texts per transformer forward pass.")
+    parser.add_argument("--max_batch_texts", type=int, default=DEFAULT_MAX_BATCH_TEXTS, help="Micro-batches are scored once they hold this many texts...")
+    parser.add_argument("--max_wait_ms", type=float, default=DEFAULT_MAX_WAIT_MS, help="...or once their oldest request has waited this long (the batching latency budget).")
+    parser.add_argument("--long_text", type=str, default="chunk", choices=LONG_TEXT_MODES, help="Transformer inputs over the model's token limit: chunk and aggregate, or truncate.")
+    parser.add_argument("--max_chunks", type=int, default=MAX_CHUNKS_PER_TEXT, help="With --long_text chunk, the maximum token windows scored per text.")
+    parser.add_argument("--num_threads", type=int, default=None, help="Intra-op CPU threads per transformer worker (default: the cores split across the models).")
+    parser.add_argument("--cache_file", type=str, default=os.getenv("SENTIMENT_CACHE_FILE"), help="SQLite result cache shared with sentiment_analyzer.py (default: $SENTIMENT_CACHE_FILE; unset disables caching).")
+    parser.add_argument("--cache_max_entries", type=int, default=DEFAULT_MAX_ENTRIES, help="Maximum cached results; least recently used entries are evicted beyond this.")
+    parser.add_argument("--verbose", action="store_true", help="Log every request.")
+
+    args = parser.parse_args()
+
+    models = list(dict.fromkeys(model_name.strip() for model_name in args.models.split(",") if model_name.strip()))
+    unknown_models = [model_name for model_name in models if model_name not in TRANSFORMER_MODELS + ["vader"]]
+    if unknown_models or not models:
+        parser.error(f"--models must be a comma-separated subset of vader,{','.join(TRANSFORMER_MODELS)}; got: {args.models}")
+    try:
+        parse_service_address(args.listen)
+    except ValueError as e:
+        parser.error(str(e))
+
+    configure_long_text_handling(args.long_text, args.max_chunks)
+    print(f"Loading {', '.join(models)} ({args.backend} backend)...")
+    pool = SentimentModelPool(models, args.backend, args.batch_size, args.max_batch_texts, args.max_wait_ms, args.num_threads, args.cache_file, args.cache_max_entries)
+    try:
+        pool.start()
+    except Exception as e:
+        print(f"Error: {e}")
+        pool.close()
+        sys.exit(1)
+
+    SentimentRequestHandler.pool = pool
+    SentimentRequestHandler.verbose = args.verbose
+    server = create_server(args.listen, SentimentRequestHandler)
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    print(f"Sentiment service listening on {args.listen} with {', '.join(models)} (micro-batches of up to {args.max_batch_texts} texts, {args.max_wait_ms:g}ms budget).")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        pool.close()
+        kind, target = parse_service_address(args.listen)
+        if kind == "unix" and os.path.exists(target):
+            os.remove(target)
+        print("Sentiment service stopped.")
+
+if __name__ == "__main__":
+    main()
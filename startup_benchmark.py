@@ -0,0 +1,112 @@
+#!/usr/bin/env python3.11
+import os
+import sys
+import json
+import glob
+import time
+import argparse
+import statistics
+import subprocess
+from datetime import datetime, timezone
+from typing import List, Dict, Any, Optional
+
+from json_stream import COMPACT_SEPARATORS
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+def discover_entry_points(script_dir: str = SCRIPT_DIR) -> List[str]:
+    """Every script in the directory with a __main__ block, excluding this benchmark."""
+    entry_points = []
+    for path in sorted(glob.glob(os.path.join(script_dir, "*.py"))):
+        if os.path.abspath(path) == os.path.abspath(__file__):
+            continue
+        with open(path, "r", encoding="utf-8") as f:
+            if '__name__ == "__main__"' in f.read():
+                entry_points.append(path)
+    return entry_points
+
+def startup_command(script_path: str) -> List[str]:
+    """
+    argparse CLIs are timed with --help, which exits right after the imports and argument parsing.
+    Scripts without a CLI (e.g. the Flask app, whose main block starts the server) are timed by importing them.
+    """
+    with open(script_path, "r", encoding="utf-8") as f:
+        has_cli = "argparse" in f.read()
+    if has_cli:
+        return [sys.executable, script_path, "--help"]
+    module_name = os.path.splitext(os.path.basename(script_path))[0]
+    return [sys.executable, "-c", f"import {module_name}"]
+
+def time_startup(script_path: str, repeat: int) -> Dict[str, Any]:
+    """Wall time in milliseconds of `repeat` fresh interpreter starts."""
+    command = startup_command(script_path)
+    timings = []
+    returncode = 0
+    for _ in range(repeat):
+        started = time.perf_counter()
+        completed = subprocess.run(command, cwd=os.path.dirname(script_path), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        timings.append((time.perf_counter() - started) * 1000)
+        returncode = returncode or completed.returncode
+    return {"median_ms": statistics.median(timings), "min_ms": min(timings), "returncode": returncode}
+
+def slowest_imports(script_path: str, top: int) -> List[Dict[str, Any]]:
+    """Top-level imports with the largest cumulative import time, from `python -X importtime`."""
+    command = startup_command(script_path)
+    command.insert(1, "-X")
+    command.insert(2, "importtime")
+    completed = subprocess.run(command, cwd=os.path.dirname(script_path), stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    imports = []
+    for line in completed.stderr.splitlines():
+        # Format: "import time: self [us] | cumulative | imported package", nested imports are indented
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|", 2)
+        if name.startswith("  "): # Only top-level imports; nested ones are included in their parent's time
+            continue
+        imports.append({"module": name.strip(), "cumulative_ms": int(cumulative) / 1000})
+    imports.sort(key=lambda item: item["cumulative_ms"], reverse=True)
+    return imports[:top]
+
+def current_commit() -> Optional[str]:
+    try:
+        completed = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=SCRIPT_DIR, capture_output=True, text=True)
+    except OSError:
+        return None
+    return completed.stdout.strip() or None
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure the startup time of each CLI entry point (fresh interpreter, --help) so regressions in import cost can be tracked.")
+    parser.add_argument("scripts", nargs="*", help="Scripts to time (default: every script with a __main__ block in this directory).")
+    parser.add_argument("--repeat", type=int, default=5, help="Interpreter starts per script; the median and minimum are reported.")
+    parser.add_argument("--top_imports", type=int, default=3, help="Also list this many slowest top-level imports per script (0 to skip).")
+    parser.add_argument("--history_file", type=str, default=None, help="Append one NDJSON record per script (timestamp, commit, timings) to this file.")
+    parser.add_argument("--max_ms", type=float, default=None, help="Exit with status 1 if any script's median startup exceeds this many milliseconds.")
+
+    args = parser.parse_args()
+
+    scripts = [os.path.abspath(script) for script in args.scripts] or discover_entry_points()
+    timestamp = datetime.now(timezone.utc).isoformat()
+    commit = current_commit()
+    results = []
+    for script_path in scripts:
+        timing = time_startup(script_path, max(1, args.repeat))
+        imports = slowest_imports(script_path, args.top_imports) if args.top_imports > 0 else []
+        import_summary = ", ".join(f"{item['module']} {item['cumulative_ms']:.0f}ms" for item in imports)
+        status = "" if timing["returncode"] == 0 else f"  (exit {timing['returncode']})"
+        print(f"{os.path.basename(script_path):<40} median={timing['median_ms']:8.1f}ms  min={timing['min_ms']:8.1f}ms  {import_summary}{status}")
+        results.append({"timestamp": timestamp, "commit": commit, "script": os.path.basename(script_path), **timing, "slowest_imports": imports})
+
+    if args.history_file:
+        with open(args.history_file, "a", encoding="utf-8") as f:
+            for result in results:
+                f.write(json.dumps(result, separators=COMPACT_SEPARATORS) + "\n")
+        print(f"Appended {len(results)} startup timings to {args.history_file}")
+
+    if args.max_ms is not None:
+        slow_scripts = [result["script"] for result in results if result["median_ms"] > args.max_ms]
+        if slow_scripts:
+            print(f"Startup exceeded {args.max_ms:.0f}ms for: {', '.join(slow_scripts)}")
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
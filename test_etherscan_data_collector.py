@@ -0,0 +1,70 @@
+import json
+import random
+
+import pytest
+
+import etherscan_data_collector as collector
+
+RESULT_WINDOW = 1000
+
+def make_history(seed: int, blocks: int = 120, per_block: int = 33):
+    rng = random.Random(seed)
+    history = []
+    for block in range(1, blocks + 1):
+        for i in range(rng.randint(1, 2 * per_block)):
+            history.append({"blockNumber": str(block), "hash": f"0x{block:06x}{i:04x}"})
+    return history
+
+def stub_etherscan(history, fail_after=None):
+    """Serves txlist like Etherscan: block range filter, sort, page/offset, and an error past the result window."""
+    calls = {"count": 0}
+
+    def etherscan_get(params, rate_limiter=None, max_retries=0, cache_type=None):
+        calls["count"] += 1
+        if fail_after is not None and calls["count"] > fail_after:
+            return {"status": "0", "message": "NOTOK", "result": "Simulated outage"}
+        page, offset = int(params["page"]), int(params["offset"])
+        if page * offset > RESULT_WINDOW:
+            return {"status": "0", "message": "NOTOK", "result": "Result window is too large"}
+        start, end = int(params["startblock"]), int(params["endblock"])
+        records = [record for record in history if start <= int(record["blockNumber"]) <= end]
+        if params.get("sort") == "desc":
+            records = records[::-1]
+        page_records = records[(page - 1) * offset:page * offset]
+        if not page_records:
+            return {"status": "0", "message": "No transactions found", "result": []}
+        return {"status": "1", "message": "OK", "result": page_records}
+
+    return etherscan_get
+
+def read_hashes(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return [record["hash"] for record in json.load(f)]
+
+@pytest.mark.parametrize("sort", ["asc", "desc"])
+@pytest.mark.parametrize("seed", range(5))
+def test_block_spanning_pages_written_once(tmp_path, monkeypatch, sort, seed):
+    history = make_history(seed)
+    monkeypatch.setattr(collector, "MAX_RESULT_WINDOW", RESULT_WINDOW)
+    monkeypatch.setattr(collector, "etherscan_get", stub_etherscan(history))
+    output_file = str(tmp_path / "transactions.json")
+
+    assert collector.fetch_all_address_transactions("0xabc", output_file, "key", sort=sort, page_size=7)
+
+    hashes = read_hashes(output_file)
+    expected = [record["hash"] for record in (history if sort == "asc" else history[::-1])]
+    assert len(hashes) == len(set(hashes))
+    assert hashes == expected
+
+def test_resume_keeps_block_hashes(tmp_path, monkeypatch):
+    history = make_history(0)
+    monkeypatch.setattr(collector, "MAX_RESULT_WINDOW", RESULT_WINDOW)
+    output_file = str(tmp_path / "transactions.json")
+
+    # Interrupted just after the first range boundary, while a block spans the boundary
+    monkeypatch.setattr(collector, "etherscan_get", stub_etherscan(history, fail_after=RESULT_WINDOW // 7 + 2))
+    assert not collector.fetch_all_address_transactions("0xabc", output_file, "key", page_size=7)
+    monkeypatch.setattr(collector, "etherscan_get", stub_etherscan(history))
+    assert collector.fetch_all_address_transactions("0xabc", output_file, "key", page_size=7)
+
+    assert read_hashes(output_file) == [record["hash"] for record in history]
@@ -0,0 +1,66 @@
+import io
+import json
+
+import pytest
+
+from json_stream import NotARecordStreamError, iter_json_array_items, iter_json_records, open_record_stream
+
+RECORDS = [
+    {"hash": "0xabc", "value": "1000000000000000000", "gasUsed": 21000, "ratio": -1.25e-7},
+    12345678901234567890,
+    3.14159,
+    "a string with \"escapes\", commas, ] brackets and unicode é中",
+    [],
+    {},
+    None,
+    True,
+    {"nested": [{"a": [1, 2, {"b": "}]"}]}, 0.5]}
+]
+
+@pytest.mark.parametrize("indent", [None, 4])
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 5, 7, 16])
+def test_array_items_match_json_load_at_any_chunk_size(indent, chunk_size):
+    text = json.dumps(RECORDS, indent=indent, ensure_ascii=False)
+    assert list(iter_json_array_items(io.StringIO(text), chunk_size=chunk_size)) == json.load(io.StringIO(text))
+
+@pytest.mark.parametrize("text", ["[123456789, 987654321]", '["abcdefghij", "klmnopqrst"]', "[  ]", " \n[1.5e10,-0.25]\n ", "[1.5e+10, 2E-3, 7.0]"])
+def test_numbers_and_strings_split_across_chunks(text):
+    for chunk_size in range(1, len(text) + 1):
+        assert list(iter_json_array_items(io.StringIO(text), chunk_size=chunk_size)) == json.loads(text), chunk_size
+
+@pytest.mark.parametrize("text", ["[1, 2", "[1 2]", '["unterminated]', ""])
+def test_malformed_arrays_raise_decode_errors(text):
+    with pytest.raises(json.JSONDecodeError):
+        list(iter_json_array_items(io.StringIO(text), chunk_size=2))
+
+def test_error_objects_are_not_record_streams(tmp_path):
+    error = {"status": "0", "message": "NOTOK", "result": "Invalid API Key"}
+    with pytest.raises(NotARecordStreamError):
+        list(iter_json_array_items(io.StringIO(json.dumps(error)), chunk_size=3))
+
+    path = tmp_path / "error.json"
+    path.write_text(json.dumps(error, indent=4), encoding="utf-8")
+    with pytest.raises(NotARecordStreamError):
+        open_record_stream(str(path))
+
+def test_array_and_ndjson_files(tmp_path):
+    array_path = tmp_path / "records.json"
+    array_path.write_text(json.dumps(RECORDS, indent=4, ensure_ascii=False), encoding="utf-8")
+    assert list(iter_json_records(str(array_path))) == RECORDS
+
+    ndjson = "\n".join(json.dumps(record, ensure_ascii=False) for record in RECORDS) + "\n"
+    for name in ("records.ndjson", "records_without_extension.json"):
+        (tmp_path / name).write_text(ndjson, encoding="utf-8")
+        assert list(iter_json_records(str(tmp_path / name))) == RECORDS
+
+def test_stdin_detects_ndjson_and_arrays(monkeypatch):
+    ndjson = "\n" + "\n".join(json.dumps(record) for record in RECORDS) + "\n"
+    monkeypatch.setattr("sys.stdin", io.StringIO(ndjson))
+    assert list(open_record_stream("-")) == RECORDS
+
+    monkeypatch.setattr("sys.stdin", io.StringIO(json.dumps(RECORDS, indent=2)))
+    assert list(open_record_stream("-")) == RECORDS
+
+    monkeypatch.setattr("sys.stdin", io.StringIO(json.dumps({"status": "0", "result": "error"}, indent=2)))
+    with pytest.raises(NotARecordStreamError):
+        open_record_stream("-")
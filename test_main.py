@@ -0,0 +1,22 @@
+import os
+
+import pytest
+
+import main
+from score_store import ScoreStore
+
+SAMPLE_CSV = os.path.join(os.path.dirname(os.path.abspath(__file__)), "integrated_scores.csv")
+
+@pytest.fixture
+def client(monkeypatch, tmp_path):
+    monkeypatch.setattr(main, "SCORE_STORE", ScoreStore(str(tmp_path / "integrated_scores.parquet"), SAMPLE_CSV))
+    return main.app.test_client()
+
+def test_known_identifier_revalidates(client):
+    response = client.get("/api/v1/scores/AshtonNFTs")
+    assert response.status_code == 200
+    assert client.get("/api/v1/scores/AshtonNFTs", headers={"If-None-Match": response.headers["ETag"]}).status_code == 304
+
+def test_unknown_identifier_is_404_despite_validators(client):
+    assert client.get("/api/v1/scores/no_such_user", headers={"If-None-Match": "*"}).status_code == 404
+    assert client.get("/api/v1/scores/no_such_user", headers={"If-Modified-Since": "Wed, 01 Jan 2031 00:00:00 GMT"}).status_code == 404
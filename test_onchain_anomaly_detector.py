@@ -0,0 +1,73 @@
+import json
+import random
+
+import pandas as pd
+import pytest
+
+import onchain_anomaly_detector as detector
+
+ADDRESS = "0x00000000000000000000000000000000000000aa"
+START_TIME = 1_700_000_000
+
+def make_history(seed: int, days: int = 75):
+    """Synthetic transfers to and from ADDRESS every 10 minutes to 4 hours, with a value burst on day 60."""
+    rng = random.Random(seed)
+    history = []
+    timestamp = START_TIME
+    while timestamp < START_TIME + days * 86400:
+        timestamp += rng.randint(600, 4 * 3600)
+        burst = START_TIME + 60 * 86400 <= timestamp < START_TIME + 61 * 86400
+        counterparty = f"0x{rng.randrange(16 ** 40):040x}"
+        incoming = rng.random() < 0.5
+        history.append({
+            "hash": f"0x{len(history):064x}",
+            "timeStamp": str(timestamp),
+            "from": counterparty if incoming else ADDRESS.upper(),
+            "to": ADDRESS if incoming else counterparty,
+            "value": str(rng.randrange(10 ** 20) * (50 if burst else 1)),
+            "gasPrice": str(rng.randrange(10 ** 9, 10 ** 11)),
+            "gasUsed": str(rng.randrange(21000, 200000))
+        })
+    return history
+
+def write_json(path, records):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(records, f)
+    return str(path)
+
+def read_windows(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)["analysis_windows"]
+
+def assert_same_windows(actual, expected):
+    """Window reports match exactly, except features may differ in the last bits (prefix sums over different spans)."""
+    assert len(actual) == len(expected)
+    for actual_window, expected_window in zip(actual, expected):
+        assert {k: v for k, v in actual_window.items() if k != "features"} == {k: v for k, v in expected_window.items() if k != "features"}
+        assert actual_window["features"].keys() == expected_window["features"].keys()
+        for name, value in expected_window["features"].items():
+            assert actual_window["features"][name] == (pytest.approx(value, rel=1e-12) if isinstance(value, float) else value), name
+
+def test_bootstrap_and_appends_match_full_run(tmp_path):
+    history = make_history(0)
+    state_file = str(tmp_path / "state.json")
+    output_file = str(tmp_path / "incremental.json")
+    first_cut, second_cut = len(history) * 2 // 3, len(history) * 5 // 6
+
+    incremental_windows = []
+    # Bootstrap from a partial history, then feed two deltas that overlap the previous input
+    for records in (history[:first_cut], history[first_cut - 20:second_cut], history[second_cut - 20:]):
+        detector.analyze_transactions_incrementally(write_json(tmp_path / "input.json", records), output_file, ADDRESS, state_file)
+        incremental_windows.extend(read_windows(output_file))
+
+    full_output = str(tmp_path / "full.json")
+    detector.analyze_transactions_file(write_json(tmp_path / "history.json", history), full_output, ADDRESS)
+    # Full mode also scores the trailing windows that are still open; incremental mode waits for them
+    last_seen = pd.to_datetime(int(history[-1]["timeStamp"]), unit="s")
+    full_windows = [window for window in read_windows(full_output) if pd.Timestamp(window["window_end"]) <= last_seen]
+
+    starts = [window["window_start"] for window in incremental_windows]
+    assert len(starts) == len(set(starts))
+    assert len(incremental_windows) == len(full_windows) > 100
+    assert_same_windows(incremental_windows, full_windows)
+    assert any(window["anomalies_detected_in_window"] != [detector.NO_ANOMALY_MESSAGE] for window in incremental_windows)
@@ -0,0 +1,139 @@
+import json
+import time
+import threading
+import hashlib
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qs
+
+import pytest
+
+import response_cache
+from http_client import HttpClient
+from response_cache import ResponseCache, configure_response_cache, request_cache_key
+from etherscan_data_collector import is_cacheable_response
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Serves JSON with an ETag; answers If-None-Match with 304. /error returns an Etherscan NOTOK body."""
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        parts = urlsplit(self.path)
+        query = {name: values[0] for name, values in parse_qs(parts.query).items()}
+        self.server.requests.append({"path": parts.path, "query": query, "if_none_match": self.headers.get("If-None-Match")})
+        if parts.path == "/error":
+            body = json.dumps({"status": "0", "message": "NOTOK", "result": "Max rate limit reached"}).encode("utf-8")
+        else:
+            body = json.dumps({"status": "1", "message": "OK", "result": [query.get("address")]}).encode("utf-8")
+        etag = '"' + hashlib.sha256(body).hexdigest()[:16] + '"'
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("ETag", etag)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def stub_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    server.requests = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server, f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = configure_response_cache(str(tmp_path / "responses.db"))
+    yield cache
+    configure_response_cache(None)
+
+def test_fresh_hit_makes_no_request(stub_server, cache):
+    server, base_url = stub_server
+    client = HttpClient(max_retries=0)
+    first = client.get(f"{base_url}/api", params={"address": "0x1"}, cache_type="token_holders")
+    second = client.get(f"{base_url}/api", params={"address": "0x1"}, cache_type="token_holders")
+
+    assert len(server.requests) == 1
+    assert second.json() == first.json() == {"status": "1", "message": "OK", "result": ["0x1"]}
+    assert second.headers["Content-Type"] == "application/json"
+    assert (cache.hits, cache.misses) == (1, 1)
+
+def test_stale_entry_is_revalidated_and_refreshed(stub_server, cache):
+    server, base_url = stub_server
+    client = HttpClient(max_retries=0)
+    url = f"{base_url}/api"
+    client.get(url, params={"address": "0x1"}, cache_type="token_holders")
+    key = request_cache_key(url, {"address": "0x1"})
+    cache._conn.execute("UPDATE responses SET expires_at = 0 WHERE key = ?", (key,))
+    cache._conn.commit()
+
+    revalidated = client.get(url, params={"address": "0x1"}, cache_type="token_holders")
+    assert len(server.requests) == 2
+    assert server.requests[1]["if_none_match"] is not None
+    assert revalidated.status_code == 200
+    assert revalidated.json()["result"] == ["0x1"]
+    assert cache.revalidated == 1
+    assert cache.lookup(key)["fresh"]
+
+    client.get(url, params={"address": "0x1"}, cache_type="token_holders")
+    assert len(server.requests) == 2
+
+def test_secret_params_are_not_part_of_the_key(stub_server, cache):
+    server, base_url = stub_server
+    client = HttpClient(max_retries=0)
+    assert request_cache_key("u", {"a": 1, "apikey": "one"}) == request_cache_key("u", {"a": "1", "apikey": "two"})
+    assert request_cache_key("u", {"a": 1, "api_key": "x", "token": "y"}) == request_cache_key("u", {"a": 1})
+    assert request_cache_key("u", {"a": 1}) != request_cache_key("u", {"a": 2})
+
+    client.get(f"{base_url}/api", params={"address": "0x1", "apikey": "first"}, cache_type="token_holders")
+    client.get(f"{base_url}/api", params={"address": "0x1", "apikey": "rotated"}, cache_type="token_holders")
+    assert len(server.requests) == 1
+
+def test_lru_eviction_beyond_max_bytes(tmp_path):
+    cache = ResponseCache(str(tmp_path / "lru.db"), max_bytes=300)
+    for name in ("a", "b", "c"):
+        cache.store(name, "website", "u", b"x" * 100)
+        time.sleep(0.01)
+    cache.lookup("a") # Now more recently used than b and c
+    time.sleep(0.01)
+
+    cache.store("d", "website", "u", b"x" * 100)
+    assert cache.lookup("b") is None
+    assert all(cache.lookup(name) is not None for name in ("a", "c", "d"))
+
+    cache.store("e", "website", "u", b"x" * 150)
+    assert cache.stats()["bytes"] <= 300
+    assert cache.evictions == 3
+    assert cache.lookup("e") is not None
+    cache.close()
+
+def test_etherscan_error_bodies_are_not_cached(stub_server, cache):
+    server, base_url = stub_server
+    client = HttpClient(max_retries=0)
+    for _ in range(2):
+        response = client.get(f"{base_url}/error", params={"address": "0x1"}, cache_type="token_holders", cacheable=is_cacheable_response)
+        assert response.json()["status"] == "0"
+    assert len(server.requests) == 2
+    assert cache.stats()["entries"] == 0
+
+    client.get(f"{base_url}/api", params={"address": "0x1"}, cache_type="token_holders", cacheable=is_cacheable_response)
+    assert cache.stats()["entries"] == 1
+
+def test_disabled_cache_passes_requests_through(stub_server):
+    server, base_url = stub_server
+    configure_response_cache(None)
+    client = HttpClient(max_retries=0)
+    client.get(f"{base_url}/api", params={"address": "0x1"}, cache_type="token_holders")
+    client.get(f"{base_url}/api", params={"address": "0x1"}, cache_type="token_holders")
+    assert len(server.requests) == 2
+    assert response_cache.get_response_cache() is None
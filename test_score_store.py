@@ -0,0 +1,29 @@
+import os
+import shutil
+
+from columnar_store import read_scores_csv, write_scores
+from score_store import ScoreStore
+
+SAMPLE_CSV = os.path.join(os.path.dirname(os.path.abspath(__file__)), "integrated_scores.csv")
+
+def test_falls_back_to_csv_until_parquet_exists(tmp_path, capsys):
+    parquet_path = str(tmp_path / "integrated_scores.parquet")
+    csv_path = str(tmp_path / "integrated_scores.csv")
+    shutil.copy(SAMPLE_CSV, csv_path)
+    store = ScoreStore(parquet_path, csv_path)
+
+    snapshot = store.get_snapshot()
+    assert snapshot is not None and snapshot.source_path == csv_path
+    assert len(snapshot.records) == len(read_scores_csv(csv_path))
+    assert "fallback" in capsys.readouterr().out
+    assert store.get_snapshot() is snapshot
+
+    write_scores(read_scores_csv(csv_path), parquet_path)
+    reloaded = store.get_snapshot()
+    assert reloaded.source_path == parquet_path
+    assert reloaded.records == snapshot.records
+    assert "fallback" not in capsys.readouterr().out
+
+def test_missing_sources(tmp_path):
+    assert ScoreStore(str(tmp_path / "missing.parquet"), str(tmp_path / "missing.csv")).get_snapshot() is None
+    assert ScoreStore(str(tmp_path / "missing.parquet")).get_snapshot() is None
@@ -0,0 +1,25 @@
+from sentiment_cache import SentimentCache
+
+def results(prefix, count):
+    return [(f"{prefix} {i}", {"label": "neutral", "i": i}) for i in range(count)]
+
+def test_eviction_counts_rows_written_by_other_connections(tmp_path):
+    path = str(tmp_path / "sentiment.db")
+    daemon = SentimentCache(path, max_entries=10)
+    cli = SentimentCache(path, max_entries=10)
+
+    daemon.put_many("model", results("daemon", 6))
+    cli.put_many("model", results("cli", 6)) # Sees the daemon's rows although its own count started at 0
+    assert cli.stats()["entries"] == 10
+    assert cli.evictions == 2
+    assert set(cli.get_many("model", [text for text, _ in results("daemon", 6)])) == {"daemon 2", "daemon 3", "daemon 4", "daemon 5"}
+
+    daemon.put_many("model", results("daemon", 6)[2:]) # Still cached: nothing to insert or evict
+    assert (daemon.stats()["entries"], daemon.evictions) == (10, 0)
+    daemon.put_many("model", results("late", 3))
+    assert (daemon.stats()["entries"], daemon.evictions) == (10, 3)
+    assert daemon.model_counts() == [("model", 10)]
+
+    assert cli.clear() == 10
+    daemon.close()
+    cli.close()
@@ -0,0 +1,35 @@
+import pytest
+
+from sentiment_service import ModelBatcher
+
+def make_batcher(score_batch):
+    batcher = ModelBatcher("fake", score_batch, max_batch_texts=8, max_wait_ms=1.0, cache_key="fake")
+    batcher.start()
+    return batcher
+
+def score_lengths(texts):
+    return [{"label": "neutral", "length": len(text)} for text in texts]
+
+@pytest.mark.parametrize("broken_results", [
+    lambda texts: 1 / 0, # The model itself fails
+    lambda texts: score_lengths(texts)[:-1], # A result is missing
+    lambda texts: [None] * len(texts) # Results that cannot be copied
+])
+def test_failed_batch_fails_its_requests_and_batcher_keeps_running(broken_results):
+    calls = {"count": 0}
+
+    def score_batch(texts):
+        calls["count"] += 1
+        return broken_results(texts) if calls["count"] == 1 else score_lengths(texts)
+
+    batcher = make_batcher(score_batch)
+    try:
+        with pytest.raises(RuntimeError, match="Scoring with fake failed"):
+            batcher.submit(["a", "bb"]).wait()
+        assert batcher.submit(["ccc", "a"]).wait() == [{"label": "neutral", "length": 3}, {"label": "neutral", "length": 1}]
+        metrics = batcher.metrics()
+        assert (metrics["errors"], metrics["batches"], metrics["queued_texts"]) == (1, 2, 0)
+    finally:
+        batcher.stop()
+        batcher.join(5)
+    assert not batcher.is_alive()
@@ -0,0 +1,72 @@
+import threading
+
+import pytest
+
+from tweet_index import TweetIndex
+
+def make_tweets(ids):
+    return [{"id_str": str(tweet_id), "created_at": f"t{tweet_id}"} for tweet_id in ids]
+
+@pytest.fixture
+def index(tmp_path):
+    index = TweetIndex(str(tmp_path / "tweets.db"))
+    yield index
+    index.close()
+
+def test_exception_inside_claim_rolls_back(index):
+    with pytest.raises(RuntimeError):
+        with index.claim("q", make_tweets([1, 2, 3])) as new_tweets:
+            assert len(new_tweets) == 3
+            raise RuntimeError("output write failed")
+    assert index.seen_count() == 0
+    assert index.watermark("q") is None
+
+    with index.claim("q", make_tweets([1, 2, 3])) as new_tweets:
+        assert [tweet["id_str"] for tweet in new_tweets] == ["1", "2", "3"]
+    assert index.seen_count() == 3
+    assert index.watermark("q") == "3"
+
+def test_watermark_never_moves_backwards(index):
+    with index.claim("q", make_tweets([10, 30, 20])):
+        pass
+    assert index.watermark("q") == "30"
+    with index.claim("q", make_tweets([5, 25])) as new_tweets:
+        assert [tweet["id_str"] for tweet in new_tweets] == ["5", "25"]
+    assert index.watermark("q") == "30"
+    with index.claim("q", []):
+        pass
+    assert index.watermark("q") == "30"
+    with index.claim("q", make_tweets([100])):
+        pass
+    assert index.watermark("q") == "100"
+
+def test_overlapping_queries_claim_disjoint_sets(index):
+    inside_first = threading.Event()
+    claimed = {}
+
+    def run(query, ids, hold=None):
+        with index.claim(query, make_tweets(ids)) as new_tweets:
+            claimed[query] = {tweet["id_str"] for tweet in new_tweets}
+            if hold is not None:
+                inside_first.set()
+                hold.wait(5)
+
+    release = threading.Event()
+    first = threading.Thread(target=run, args=("a", range(0, 60), release))
+    first.start()
+    assert inside_first.wait(5)
+
+    # Reads are not blocked by the open claim
+    assert index.watermark("a") is None
+    second = threading.Thread(target=run, args=("b", range(40, 100)))
+    second.start()
+    second.join(0.2)
+    assert second.is_alive() # Waits for the first claim's write lock
+    release.set()
+    first.join(5)
+    second.join(5)
+
+    assert claimed["a"] == {str(i) for i in range(0, 60)}
+    assert claimed["b"] == {str(i) for i in range(60, 100)}
+    assert index.seen_count() == 100
+    assert (index.watermark("a"), index.watermark("b")) == ("59", "99")
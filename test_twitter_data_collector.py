@@ -0,0 +1,75 @@
+import os
+import sys
+import json
+import time
+import types
+import threading
+
+try:
+    import data_api # Only available in the collection sandbox; the tests replace ApiClient anyway
+except ImportError:
+    sys.modules["data_api"] = types.SimpleNamespace(ApiClient=object)
+
+import pytest
+
+import twitter_data_collector as collector
+
+RATE_LIMIT = 20.0
+
+class FakeApiClient:
+    """Answers search_twitter per query: 'slow' waits until every fast query's file exists, 'broken' raises."""
+    instances = []
+    fast_files = []
+
+    def __init__(self):
+        self.calls = []
+        self.lock = threading.Lock()
+        self.fast_files_existed_before_slow_finished = None
+        FakeApiClient.instances.append(self)
+
+    def call_api(self, api_name, query):
+        with self.lock:
+            self.calls.append((time.monotonic(), query["query"]))
+        if query["query"] == "slow":
+            deadline = time.monotonic() + 5
+            while not all(os.path.exists(path) for path in self.fast_files) and time.monotonic() < deadline:
+                time.sleep(0.01)
+            self.fast_files_existed_before_slow_finished = all(os.path.exists(path) for path in self.fast_files)
+        if query["query"] == "broken":
+            raise ConnectionError("simulated outage")
+        return {"result": {"timeline": {"instructions": [{"entries": [{"id_str": f"{len(query['query'])}1", "full_text": query["query"]}]}]}}}
+
+@pytest.fixture
+def fake_client(monkeypatch):
+    monkeypatch.setattr(FakeApiClient, "instances", [])
+    monkeypatch.setattr(FakeApiClient, "fast_files", [])
+    monkeypatch.setattr(collector, "ApiClient", FakeApiClient)
+    return FakeApiClient
+
+def test_batch_fan_out(tmp_path, fake_client):
+    queries = ["slow", "alpha", "broken", "beta", "alpha", "gamma"]
+    fast_queries = ["alpha", "beta", "gamma"]
+    output_dir = str(tmp_path / "tweets")
+    status_file = str(tmp_path / "statuses.json")
+    fake_client.fast_files = [collector.query_output_file(query, output_dir) for query in fast_queries]
+
+    assert not collector.batch_fetch_twitter_data(queries, output_dir, workers=4, rate_limit=RATE_LIMIT, status_file=status_file)
+
+    (client,) = fake_client.instances
+    # The slow query was still in flight when the fast queries' files were written
+    assert client.fast_files_existed_before_slow_finished
+    for query in fast_queries:
+        with open(collector.query_output_file(query, output_dir), "r", encoding="utf-8") as f:
+            assert "error" not in json.load(f)
+    with open(collector.query_output_file("broken", output_dir), "r", encoding="utf-8") as f:
+        assert json.load(f) == {"error": "simulated outage", "query": "broken"}
+
+    with open(status_file, "r", encoding="utf-8") as f:
+        statuses = json.load(f)
+    assert [status["query"] for status in statuses] == ["slow", "alpha", "broken", "beta", "gamma"]
+    assert [status["status"] for status in statuses] == ["ok", "ok", "failed", "ok", "ok"]
+
+    # One shared bucket: calls from all workers are spaced by at least 1 / rate
+    call_times = sorted(called_at for called_at, _ in client.calls)
+    assert len(call_times) == 5
+    assert min(later - earlier for earlier, later in zip(call_times, call_times[1:])) >= 0.9 / RATE_LIMIT
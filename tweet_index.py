@@ -0,0 +1,135 @@
+#!/usr/bin/env python3.11
+import os
+import time
+import sqlite3
+import argparse
+import threading
+from contextlib import contextmanager
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Tuple
+
+class TweetIndex:
+    """
+    Persistent state for incremental tweet collection, stored in SQLite: a global index of every tweet ID
+    already passed downstream (shared by all queries and runs), and a per-query watermark holding the newest
+    tweet ID and its created_at. A claim stays in an open transaction on its own connection until its output
+    is written, so overlapping queries running concurrently (or in separate processes) each get a tweet at
+    most once, and a crash before the output is written leaves the tweets unclaimed for the next run. Only
+    claims wait for each other (on SQLite's write lock); reads such as watermark() never block behind an
+    open claim. Safe to share between threads.
+    """
+    # Seconds a claim waits for another writer's claim to finish
+    CLAIM_TIMEOUT = 60.0
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS seen_tweets (id_str TEXT PRIMARY KEY, query TEXT NOT NULL, first_seen REAL NOT NULL)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS seen_tweets_first_seen ON seen_tweets (first_seen)")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS query_watermarks ("
+            " query TEXT PRIMARY KEY, max_id TEXT NOT NULL, max_created_at TEXT, updated_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def watermark(self, query: str) -> Optional[str]:
+        """The newest tweet ID seen for the query, or None before its first run."""
+        with self._lock:
+            row = self._conn.execute("SELECT max_id FROM query_watermarks WHERE query = ?", (query,)).fetchone()
+        return row[0] if row else None
+
+    @contextmanager
+    def claim(self, query: str, tweets: Iterable[Dict[str, Any]]) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Yields the tweets whose IDs were not seen before. Their IDs and the query's advanced watermark are
+        committed only when the with-block exits normally (i.e. once the caller has written them out);
+        an exception or a crash inside the block leaves the index unchanged.
+        """
+        tweets = list(tweets)
+        now = time.time()
+        # A connection per claim: the shared one stays free for reads while this transaction is open
+        conn = sqlite3.connect(self.path, timeout=self.CLAIM_TIMEOUT, isolation_level=None)
+        try:
+            # IMMEDIATE takes the write lock up front, so no other thread or process can claim the same IDs meanwhile
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                new_tweets = []
+                for tweet in tweets:
+                    cursor = conn.execute("INSERT OR IGNORE INTO seen_tweets (id_str, query, first_seen) VALUES (?, ?, ?)", (tweet["id_str"], query, now))
+                    if cursor.rowcount == 1:
+                        new_tweets.append(tweet)
+                yield new_tweets
+                self._advance_watermark(conn, query, tweets)
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _advance_watermark(conn: sqlite3.Connection, query: str, tweets: List[Dict[str, Any]]) -> None:
+        """Moves the query's watermark to the newest of the tweets, never backwards (inside the claim's transaction)."""
+        newest = max(tweets, key=lambda tweet: int(tweet["id_str"]), default=None)
+        if newest is None:
+            return
+        row = conn.execute("SELECT max_id FROM query_watermarks WHERE query = ?", (query,)).fetchone()
+        if row is not None and int(row[0]) >= int(newest["id_str"]):
+            return
+        conn.execute(
+            "INSERT OR REPLACE INTO query_watermarks (query, max_id, max_created_at, updated_at) VALUES (?, ?, ?, ?)",
+            (query, newest["id_str"], newest.get("created_at"), time.time())
+        )
+
+    def watermarks(self) -> List[Tuple[str, str, Optional[str]]]:
+        with self._lock:
+            return self._conn.execute("SELECT query, max_id, max_created_at FROM query_watermarks ORDER BY query").fetchall()
+
+    def seen_count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM seen_tweets").fetchone()[0]
+
+    def prune(self, older_than_days: float) -> int:
+        """Deletes seen IDs first recorded more than older_than_days ago and returns how many were removed."""
+        with self._lock:
+            cursor = self._conn.execute("DELETE FROM seen_tweets WHERE first_seen < ?", (time.time() - older_than_days * 86400,))
+            self._conn.commit()
+            return cursor.rowcount
+
+    def reset_query(self, query: str) -> bool:
+        """Drops a query's watermark so its next run fetches from the top again (seen IDs are kept)."""
+        with self._lock:
+            cursor = self._conn.execute("DELETE FROM query_watermarks WHERE query = ?", (query,))
+            self._conn.commit()
+            return cursor.rowcount > 0
+
+    def close(self) -> None:
+        self._conn.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect or maintain the tweet index used for incremental Twitter collection.")
+    parser.add_argument("index_file", type=str, help="Path to the SQLite tweet index.")
+    parser.add_argument("--prune_days", type=float, default=None, help="Delete seen tweet IDs first recorded more than this many days ago.")
+    parser.add_argument("--reset_query", type=str, default=None, help="Drop this query's watermark so it is fetched from the top again.")
+
+    args = parser.parse_args()
+
+    if not os.path.exists(args.index_file):
+        print(f"Error: Index file not found: {args.index_file}")
+        return
+    index = TweetIndex(args.index_file)
+    if args.prune_days is not None:
+        print(f"Pruned {index.prune(args.prune_days)} seen tweet IDs from {args.index_file}")
+    elif args.reset_query is not None:
+        print(f"Watermark for '{args.reset_query}' {'reset' if index.reset_query(args.reset_query) else 'not found'}")
+    else:
+        for query, max_id, max_created_at in index.watermarks():
+            print(f"{query}: since_id {max_id} ({max_created_at or 'unknown time'})")
+        print(f"Total: {index.seen_count()} seen tweet IDs")
+    index.close()
+
+if __name__ == "__main__":
+    main()
@@ -2,75 +2,153 @@
 import sys
 sys.path.append("/opt/.manus/.sandbox-runtime")
 from data_api import ApiClient
-import json
 import argparse
 import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Dict, Iterator, Optional
+from json_stream import save_json
+from rate_limiter import TokenBucket
+from tweet_index import TweetIndex
 
-def fetch_twitter_data_for_query(query: str, output_file: str, count: int = 20, search_type: str = "Top"):
+DEFAULT_WORKERS = 8
+
+def iter_tweets(response: Any) -> Iterator[Dict[str, Any]]:
+    """Yields the tweet objects (dicts with an id_str and text) found anywhere in a search response, in order."""
+    stack = [response]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, dict):
+            if node.get("id_str") and ("full_text" in node or "text" in node):
+                yield node
+            else:
+                stack.extend(reversed(list(node.values())))
+        elif isinstance(node, list):
+            stack.extend(reversed(node))
+
+def fetch_twitter_data_for_query(query: str, output_file: str, count: int = 20, search_type: str = "Top", client: Optional[ApiClient] = None, rate_limiter: Optional[TokenBucket] = None, tweet_index: Optional[TweetIndex] = None):
     """
     Fetches tweets matching a single query using the Twitter API and saves them to a JSON file.
+    With a tweet_index, collection is incremental: the search is restricted with since_id to tweets newer than
+    the query's watermark, and only tweets not already in the global seen-ID index (from any query or run)
+    are saved, as a list of tweet objects ready for cleaning. The seen IDs and the watermark are committed
+    only after the file is written, so an interrupted run never loses tweets (at worst it saves them again).
 
     Args:
         query: The search query for Twitter.
         output_file: The path to the JSON file where results will be saved.
         count: The number of tweets to return (default 20).
         search_type: The type of search (Top, Latest, Photos, Videos, People - default Top).
+        client: ApiClient to reuse (a new one is created if not given).
+        rate_limiter: Token bucket shared by concurrent queries; a token is taken before the API call.
+        tweet_index: Seen-ID index and per-query watermarks for incremental collection.
     """
-    client = ApiClient()
-    print(f"Fetching Twitter data for query: '{query}' with count: {count}, type: {search_type}")
+    client = client or ApiClient()
+    since_id = tweet_index.watermark(query) if tweet_index is not None else None
+    search_query = f"{query} since_id:{since_id}" if since_id else query
+    print(f"Fetching Twitter data for query: '{search_query}' with count: {count}, type: {search_type}")
     try:
+        if rate_limiter is not None:
+            rate_limiter.acquire()
         twitter_response = client.call_api(
             "Twitter/search_twitter",
-            query={"query": query, "count": count, "type": search_type} # Count should be integer as per API doc
+            query={"query": search_query, "count": count, "type": search_type} # Count should be integer as per API doc
         )
 
-        if twitter_response:
+        if twitter_response and tweet_index is not None:
+            tweets = list(iter_tweets(twitter_response))
+            with tweet_index.claim(query, tweets) as new_tweets:
+                save_json(output_file, new_tweets)
+            print(f"Saved {len(new_tweets)} new of {len(tweets)} fetched tweets for query '{query}' to {output_file}")
+        elif twitter_response:
             print(f"Successfully fetched data for query: {query}")
-            with open(output_file, "w", encoding="utf-8") as f:
-                json.dump(twitter_response, f, ensure_ascii=False, indent=4)
+            save_json(output_file, twitter_response)
             print(f"Twitter data saved to {output_file}")
         else:
             print(f"No data returned from Twitter API for query: {query}")
-            with open(output_file, "w", encoding="utf-8") as f:
-                json.dump({"error": "No data returned", "query": query}, f, ensure_ascii=False, indent=4)
+            save_json(output_file, {"error": "No data returned", "query": query})
         return True
     except Exception as e:
         print(f"An error occurred while fetching Twitter data for query '{query}': {e}")
-        with open(output_file, "w", encoding="utf-8") as f:
-            json.dump({"error": str(e), "query": query}, f, ensure_ascii=False, indent=4)
+        save_json(output_file, {"error": str(e), "query": query})
         return False
 
-def batch_fetch_twitter_data(queries: list[str], output_dir: str, count_per_query: int = 20, search_type: str = "Top"):
+def query_output_file(query: str, output_dir: str, file_extension: str = ".json") -> str:
+    # Sanitize query to create a valid filename
+    filename_query = "".join(c if c.isalnum() else "_" for c in query)
+    if len(filename_query) > 50: # Truncate if too long
+        filename_query = filename_query[:50]
+    return os.path.join(output_dir, f"twitter_data_{filename_query}{file_extension}")
+
+def run_twitter_query(query: str, output_file: str, count: int, search_type: str, client: ApiClient, rate_limiter: Optional[TokenBucket], tweet_index: Optional[TweetIndex] = None) -> Dict[str, Any]:
+    """Runs one batch query and returns its status (query, output_file, status, elapsed_sec)."""
+    started = time.perf_counter()
+    success = fetch_twitter_data_for_query(query, output_file, count, search_type, client, rate_limiter, tweet_index)
+    return {"query": query, "output_file": output_file, "status": "ok" if success else "failed", "elapsed_sec": round(time.perf_counter() - started, 3)}
+
+def batch_fetch_twitter_data(queries: list[str], output_dir: str, count_per_query: int = 20, search_type: str = "Top", file_extension: str = ".json", workers: int = DEFAULT_WORKERS, rate_limit: Optional[float] = None, status_file: Optional[str] = None, index_file: Optional[str] = None):
     """
     Fetches tweets for a list of queries and saves each to a separate JSON file in the output directory.
+    Queries run concurrently on a bounded thread pool sharing one ApiClient, so a long query list takes
+    about as long as its slowest queries rather than their sum. Each query's file is written as soon as it
+    finishes, and its status is printed.
 
     Args:
         queries: A list of search queries for Twitter.
         output_dir: The directory where JSON files will be saved.
         count_per_query: The number of tweets to return for each query.
         search_type: The type of search for each query.
+        file_extension: ".json" for indented JSON files, ".ndjson" for compact newline-delimited records.
+        workers: Maximum number of queries in flight.
+        rate_limit: API calls per second shared by all workers (None for no limit).
+        status_file: If given, every query's status is saved to this JSON file.
+        index_file: SQLite tweet index; if given, only tweets newer than each query's watermark and not seen
+            by any query before are saved (see fetch_twitter_data_for_query).
     """
     os.makedirs(output_dir, exist_ok=True)
-    all_successful = True
-    for query in queries:
-        # Sanitize query to create a valid filename
-        filename_query = "".join(c if c.isalnum() else "_" for c in query)
-        if len(filename_query) > 50: # Truncate if too long
-            filename_query = filename_query[:50]
-        output_file = os.path.join(output_dir, f"twitter_data_{filename_query}.json")
-        print(f"Processing query: '{query}' -> {output_file}")
-        success = fetch_twitter_data_for_query(query, output_file, count_per_query, search_type)
-        if not success:
-            all_successful = False
-    return all_successful
+    queries = list(dict.fromkeys(queries)) # A repeated query would write the same file from two workers
+    client = ApiClient()
+    rate_limiter = TokenBucket(rate_limit) if rate_limit else None
+    tweet_index = TweetIndex(index_file) if index_file else None
+    output_files = [query_output_file(query, output_dir, file_extension) for query in queries]
+    started = time.perf_counter()
+    statuses = []
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        futures = {executor.submit(run_twitter_query, query, output_file, count_per_query, search_type, client, rate_limiter, tweet_index): (query, output_file) for query, output_file in zip(queries, output_files)}
+        for future in as_completed(futures):
+            try:
+                status = future.result()
+            except Exception as e:
+                query, output_file = futures[future]
+                status = {"query": query, "output_file": output_file, "status": "failed", "elapsed_sec": None, "error": str(e)}
+            statuses.append(status)
+            print(f"[{len(statuses)}/{len(queries)}] Query '{status['query']}': {status['status']} in {status['elapsed_sec'] or 0:.2f}s -> {status['output_file']}")
+
+    elapsed = time.perf_counter() - started
+    failed = sum(1 for status in statuses if status["status"] != "ok")
+    print(f"Batch finished in {elapsed:.1f}s: {len(statuses) - failed} ok, {failed} failed.")
+    if tweet_index is not None:
+        print(f"Tweet index {index_file}: {tweet_index.seen_count()} seen tweet IDs.")
+        tweet_index.close()
+    if status_file:
+        order = {query: i for i, query in enumerate(queries)}
+        statuses.sort(key=lambda status: order[status["query"]])
+        save_json(status_file, statuses)
+        print(f"Query statuses saved to {status_file}")
+    return failed == 0
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Fetch Twitter data for given queries.")
     parser.add_argument("-q", "--query", type=str, help="A single search query for Twitter. If --queries_file is used, this is ignored.")
     parser.add_argument("--queries_file", type=str, help="Path to a text file containing multiple queries, one per line.")
-    parser.add_argument("-o", "--output", type=str, required=True, help="The path to the output JSON file (for single query) or output directory (for multiple queries).")
+    parser.add_argument("-o", "--output", type=str, required=True, help="The path to the output JSON file (for single query; *.ndjson writes compact NDJSON) or output directory (for multiple queries).")
     parser.add_argument("-c", "--count", type=int, default=20, help="Number of tweets to return per query.")
+    parser.add_argument("--ndjson", action="store_true", help="With --queries_file, write one compact .ndjson file per query instead of indented .json.")
     parser.add_argument("-t", "--type", type=str, default="Top", choices=["Top", "Latest", "Photos", "Videos", "People"], help="Type of search.")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="With --queries_file, number of queries fetched concurrently.")
+    parser.add_argument("--rate_limit", type=float, default=None, help="With --queries_file, maximum API calls per second shared by all workers (default: no limit).")
+    parser.add_argument("--status_file", type=str, default=None, help="With --queries_file, save every query's status (ok/failed, elapsed time) to this JSON file.")
+    parser.add_argument("--index_file", type=str, default=os.getenv("TWEET_INDEX_FILE"), help="SQLite tweet index for incremental collection: only tweets newer than each query's watermark and not seen by any query or run before are saved (default: $TWEET_INDEX_FILE, unset fetches everything).")
 
     args = parser.parse_args()
 
@@ -82,12 +160,15 @@ if __name__ == "__main__":
                 print("Error: Queries file is empty or contains no valid queries.")
                 sys.exit(1)
             print(f"Loaded {len(queries_list)} queries from {args.queries_file}")
-            batch_fetch_twitter_data(queries_list, args.output, args.count, args.type)
+            batch_fetch_twitter_data(queries_list, args.output, args.count, args.type, ".ndjson" if args.ndjson else ".json", args.workers, args.rate_limit, args.status_file, args.index_file)
         except FileNotFoundError:
             print(f"Error: Queries file not found at {args.queries_file}")
             sys.exit(1)
     elif args.query:
-        fetch_twitter_data_for_query(args.query, args.output, args.count, args.type)
+        tweet_index = TweetIndex(args.index_file) if args.index_file else None
+        fetch_twitter_data_for_query(args.query, args.output, args.count, args.type, tweet_index=tweet_index)
+        if tweet_index is not None:
+            tweet_index.close()
     else:
         print("Error: You must provide either a single --query or a --queries_file.")
         parser.print_help()
@@ -1,14 +1,18 @@
 #!/usr/bin/env python3.11
+import os
 import requests
 from bs4 import BeautifulSoup
-import json
 import argparse
 import re
+from json_stream import save_json
+from http_client import get_http_client
+from response_cache import configure_response_cache, print_cache_stats
 
 def fetch_website_text_content(url: str, output_file: str):
     """
     Fetches the main textual content from a given URL and saves it to a JSON file.
     This is a basic scraper and might need adjustments for specific site structures.
+    Pages are read through the response cache when it is enabled, and revalidated with ETag/Last-Modified once stale.
 
     Args:
         url: The URL of the website to scrape.
@@ -19,7 +23,7 @@ def fetch_website_text_content(url: str, output_file: str):
         "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
     }
     try:
-        response = requests.get(url, headers=headers, timeout=30)
+        response = get_http_client().get(url, headers=headers, cache_type="website")
         response.raise_for_status()  # Raise an exception for HTTP errors
 
         soup = BeautifulSoup(response.content, "html.parser")
@@ -45,28 +49,28 @@ def fetch_website_text_content(url: str, output_file: str):
                 "title": title,
                 "scraped_text_content": cleaned_text
             }
-            with open(output_file, "w", encoding="utf-8") as f:
-                json.dump(data_to_save, f, ensure_ascii=False, indent=4)
+            save_json(output_file, data_to_save)
             print(f"Scraped data saved to {output_file}")
         else:
             print(f"No significant text content found at: {url}")
-            with open(output_file, "w", encoding="utf-8") as f:
-                json.dump({"error": "No significant text content found", "url": url}, f, ensure_ascii=False, indent=4)
+            save_json(output_file, {"error": "No significant text content found", "url": url})
 
     except requests.exceptions.RequestException as e:
         print(f"An error occurred while fetching URL {url}: {e}")
-        with open(output_file, "w", encoding="utf-8") as f:
-            json.dump({"error": str(e), "url": url}, f, ensure_ascii=False, indent=4)
+        save_json(output_file, {"error": str(e), "url": url})
     except Exception as e:
         print(f"An unexpected error occurred while processing {url}: {e}")
-        with open(output_file, "w", encoding="utf-8") as f:
-            json.dump({"error": f"Unexpected error: {str(e)}", "url": url}, f, ensure_ascii=False, indent=4)
+        save_json(output_file, {"error": f"Unexpected error: {str(e)}", "url": url})
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Fetch textual content from a website.")
     parser.add_argument("-u", "--url", type=str, required=True, help="The URL of the website to scrape.")
     parser.add_argument("-o", "--output_file", type=str, required=True, help="The path to the output JSON file.")
+    parser.add_argument("--cache_file", type=str, default=os.getenv("RESPONSE_CACHE_FILE"), help="SQLite response cache reused while fresh (default: $RESPONSE_CACHE_FILE, unset disables caching).")
 
     args = parser.parse_args()
+    configure_response_cache(args.cache_file)
     fetch_website_text_content(args.url, args.output_file)
+    get_http_client().print_stats()
+    print_cache_stats()
 
@@ -1,9 +1,11 @@
 #!/usr/bin/env python3.11
+import os
 import sys
 sys.path.append("/opt/.manus/.sandbox-runtime")
 from data_api import ApiClient
-import json
 import argparse
+from json_stream import save_json
+from response_cache import cached_call, configure_response_cache
 
 def fetch_yahoo_finance_chart_data(symbol: str, interval: str, data_range: str, output_file: str, region: str = "US", comparisons: str = "", events: str = "div,split", include_pre_post: bool = False, include_adjusted_close: bool = True):
     """
@@ -38,25 +40,23 @@ def fetch_yahoo_finance_chart_data(symbol: str, interval: str, data_range: str,
         # Note: The API docs mention period1 and period2 but also say not to use with range.
         # For simplicity, this script uses the 'range' parameter.
 
-        response = client.call_api(
+        # Served from the response cache while fresh, so repeated runs skip the API call
+        response = cached_call("yahoo_chart", "YahooFinance/get_stock_chart", params, lambda: client.call_api(
             "YahooFinance/get_stock_chart",
             query=params
-        )
+        ))
 
         if response:
             print(f"Successfully fetched chart data for symbol: {symbol}")
-            with open(output_file, "w", encoding="utf-8") as f:
-                json.dump(response, f, ensure_ascii=False, indent=4)
+            save_json(output_file, response)
             print(f"Yahoo Finance chart data saved to {output_file}")
         else:
             print(f"No data returned from Yahoo Finance API for symbol: {symbol}")
-            with open(output_file, "w", encoding="utf-8") as f:
-                json.dump({"error": "No data returned", "symbol": symbol}, f, ensure_ascii=False, indent=4)
+            save_json(output_file, {"error": "No data returned", "symbol": symbol})
 
     except Exception as e:
         print(f"An error occurred while fetching Yahoo Finance chart data for symbol \'{symbol}\': {e}")
-        with open(output_file, "w", encoding="utf-8") as f:
-            json.dump({"error": str(e), "symbol": symbol}, f, ensure_ascii=False, indent=4)
+        save_json(output_file, {"error": str(e), "symbol": symbol})
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Fetch stock chart data from Yahoo Finance.")
@@ -69,7 +69,9 @@ if __name__ == "__main__":
     parser.add_argument("--events", type=str, default="div,split", help="Comma-separated event types.")
     parser.add_argument("--include_pre_post", type=bool, default=False, help="Include pre/post market data.")
     parser.add_argument("--include_adjusted_close", type=bool, default=True, help="Include adjusted close data.")
+    parser.add_argument("--cache_file", type=str, default=os.getenv("RESPONSE_CACHE_FILE"), help="SQLite response cache reused while fresh (default: $RESPONSE_CACHE_FILE, unset disables caching).")
     
     args = parser.parse_args()
+    configure_response_cache(args.cache_file)
     fetch_yahoo_finance_chart_data(args.symbol, args.interval, args.range, args.output_file, args.region, args.comparisons, args.events, args.include_pre_post, args.include_adjusted_close)
 
@@ -1,9 +1,11 @@
 #!/usr/bin/env python3.11
+import os
 import sys
 sys.path.append("/opt/.manus/.sandbox-runtime")
 from data_api import ApiClient
-import json
 import argparse
+from json_stream import save_json
+from response_cache import cached_call, configure_response_cache
 
 def fetch_yahoo_finance_holders_data(symbol: str, output_file: str, region: str = "US", lang: str = "en-US"):
     """
@@ -24,25 +26,23 @@ def fetch_yahoo_finance_holders_data(symbol: str, output_file: str, region: str
             "lang": lang
         }
         
-        response = client.call_api(
+        # Served from the response cache while fresh, so repeated runs skip the API call
+        response = cached_call("yahoo_holders", "YahooFinance/get_stock_holders", params, lambda: client.call_api(
             "YahooFinance/get_stock_holders",
             query=params
-        )
+        ))
 
         if response:
             print(f"Successfully fetched holder data for symbol: {symbol}")
-            with open(output_file, "w", encoding="utf-8") as f:
-                json.dump(response, f, ensure_ascii=False, indent=4)
+            save_json(output_file, response)
             print(f"Yahoo Finance holder data saved to {output_file}")
         else:
             print(f"No holder data returned from Yahoo Finance API for symbol: {symbol}")
-            with open(output_file, "w", encoding="utf-8") as f:
-                json.dump({"error": "No data returned", "symbol": symbol}, f, ensure_ascii=False, indent=4)
+            save_json(output_file, {"error": "No data returned", "symbol": symbol})
 
     except Exception as e:
         print(f"An error occurred while fetching Yahoo Finance holder data for symbol \'{symbol}\': {e}")
-        with open(output_file, "w", encoding="utf-8") as f:
-            json.dump({"error": str(e), "symbol": symbol}, f, ensure_ascii=False, indent=4)
+        save_json(output_file, {"error": str(e), "symbol": symbol})
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Fetch stock holder data from Yahoo Finance.")
@@ -50,7 +50,9 @@ if __name__ == "__main__":
     parser.add_argument("-o", "--output_file", type=str, required=True, help="Path to the output JSON file.")
     parser.add_argument("--region", type=str, default="US", choices=["US", "BR", "AU", "CA", "FR", "DE", "HK", "IN", "IT", "ES", "GB", "SG"], help="Region for the stock symbol.")
     parser.add_argument("--lang", type=str, default="en-US", choices=["en-US", "pt-BR", "en-AU", "en-CA", "fr-FR", "de-DE", "zh-Hant-HK", "en-IN", "it-IT", "es-ES", "en-GB", "en-SG"], help="Language for the data.")
+    parser.add_argument("--cache_file", type=str, default=os.getenv("RESPONSE_CACHE_FILE"), help="SQLite response cache reused while fresh (default: $RESPONSE_CACHE_FILE, unset disables caching).")
     
     args = parser.parse_args()
+    configure_response_cache(args.cache_file)
     fetch_yahoo_finance_holders_data(args.symbol, args.output_file, args.region, args.lang)
 
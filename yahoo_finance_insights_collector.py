@@ -1,9 +1,11 @@
 #!/usr/bin/env python3.11
+import os
 import sys
 sys.path.append("/opt/.manus/.sandbox-runtime")
 from data_api import ApiClient
-import json
 import argparse
+from json_stream import save_json
+from response_cache import cached_call, configure_response_cache
 
 def fetch_yahoo_finance_insights_data(symbol: str, output_file: str):
     """
@@ -20,31 +22,31 @@ def fetch_yahoo_finance_insights_data(symbol: str, output_file: str):
             "symbol": symbol
         }
         
-        response = client.call_api(
+        # Served from the response cache while fresh, so repeated runs skip the API call
+        response = cached_call("yahoo_insights", "YahooFinance/get_stock_insights", params, lambda: client.call_api(
             "YahooFinance/get_stock_insights",
             query=params
-        )
+        ))
 
         if response:
             print(f"Successfully fetched insights data for symbol: {symbol}")
-            with open(output_file, "w", encoding="utf-8") as f:
-                json.dump(response, f, ensure_ascii=False, indent=4)
+            save_json(output_file, response)
             print(f"Yahoo Finance insights data saved to {output_file}")
         else:
             print(f"No insights data returned from Yahoo Finance API for symbol: {symbol}")
-            with open(output_file, "w", encoding="utf-8") as f:
-                json.dump({"error": "No data returned", "symbol": symbol}, f, ensure_ascii=False, indent=4)
+            save_json(output_file, {"error": "No data returned", "symbol": symbol})
 
     except Exception as e:
         print(f"An error occurred while fetching Yahoo Finance insights data for symbol \'{symbol}\': {e}")
-        with open(output_file, "w", encoding="utf-8") as f:
-            json.dump({"error": str(e), "symbol": symbol}, f, ensure_ascii=False, indent=4)
+        save_json(output_file, {"error": str(e), "symbol": symbol})
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Fetch stock insights data from Yahoo Finance.")
     parser.add_argument("-s", "--symbol", type=str, required=True, help="Stock symbol (e.g., AAPL)." )
     parser.add_argument("-o", "--output_file", type=str, required=True, help="Path to the output JSON file.")
+    parser.add_argument("--cache_file", type=str, default=os.getenv("RESPONSE_CACHE_FILE"), help="SQLite response cache reused while fresh (default: $RESPONSE_CACHE_FILE, unset disables caching).")
     
     args = parser.parse_args()
+    configure_response_cache(args.cache_file)
     fetch_yahoo_finance_insights_data(args.symbol, args.output_file)
 